@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local stub of a paginated log API, for throughput tests of collector.api_collector.
+
+GET /logs?after_id=<id>&limit=<n> returns up to n records with id > after_id
+(limit defaults to 100). Records are generated on the fly: `backlog` records are
+available at startup and `rate` new ones per second after that. When nothing new
+is available the response carries an ETag and a matching If-None-Match gets 304.
+With --throttle p, a fraction p of requests is answered 429 with Retry-After: 1.
+
+Usage: python benchmarks/api_stub_server.py [--port 8081] [--backlog 100000] [--rate 1000]
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_server(port=0, backlog=100000, rate=1000.0, throttle=0.0):
+    started = time.time()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients can reuse connections
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/logs":
+                self.send_error(404)
+                return
+            if throttle and random.random() < throttle:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            query = parse_qs(url.query)
+            after_id = int(query.get("after_id", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            available = backlog + int((time.time() - started) * rate)
+            etag = f'"{after_id}-{available}"'
+            if after_id >= available and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            logs = [
+                {
+                    "id": i,
+                    "timestamp": time.time(),
+                    "message": f"2025-01-01 00:00:00 INFO [user1] [svc-api] [req-{i}] event {i}",
+                }
+                for i in range(after_id + 1, min(after_id + limit, available) + 1)
+            ]
+            body = json.dumps(logs).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if not logs:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub paginated log API")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--backlog", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--throttle", type=float, default=0.0)
+    args = parser.parse_args()
+    server = make_server(args.port, args.backlog, args.rate, args.throttle)
+    print(f"🌐 Stub log API on http://127.0.0.1:{args.port}/logs")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
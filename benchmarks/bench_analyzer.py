@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LogAnalyzer's event-time window against the previous implementation
+(a deque of dicts rescanned on every call with wall-clock cutoffs, kept below
+as LegacyAnalyzer).
+
+First replays a backfill delivered out of order (each record up to
+allowed_lateness behind the newest one) and checks the sliding-window counts
+and closed tumbling windows against a brute-force count over event time; the
+legacy analyzer is scored on the same stream. Then times add_log + analyze()
+with 1k..1M logs already in the window, and add_log + tick() (a snapshot is only
+published when the tick is due or the anomaly state changes).
+
+Usage: python benchmarks/bench_analyzer.py [--sizes 1000,10000,100000,1000000] [--calls 2000]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intelligence import analyzer as analyzer_module
+from intelligence.analyzer import LogAnalyzer
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class LegacyAnalyzer:
+    def __init__(self, clock, window_seconds=60):
+        self.clock = clock
+        self.window_seconds = window_seconds
+        self.logs = deque()
+
+    def add_log(self, log):
+        now = self.clock.time()
+        self.logs.append(log)
+        while self.logs and now - self.logs[0]["timestamp"] > self.window_seconds:
+            self.logs.popleft()
+
+    def analyze(self):
+        levels = [log["level"] for log in self.logs]
+        counts = Counter(levels)
+        anomalies = []
+        now = self.clock.time()
+        recent_errors = [l for l in self.logs if l["level"] == "ERROR" and now - l["timestamp"] <= 10]
+        if len(recent_errors) >= 5:
+            anomalies.append("Error spike detected")
+        if "CRITICAL" in levels:
+            anomalies.append("Critical system failure detected")
+        total_logs = len(self.logs)
+        if total_logs > 0 and counts.get("ERROR", 0) / total_logs > 0.5:
+            anomalies.append("System instability: too many errors")
+        return {"counts": dict(counts), "anomalies": anomalies}
+
+
+def random_log(rng, now):
+    if rng.random() < 0.05:
+        burst = rng.random() < 0.5
+        level = "ERROR" if burst else rng.choice(["CRITICAL", "WARNING"])
+    else:
+        level = rng.choices(["INFO", "WARNING", "ERROR", "CRITICAL"], weights=[60, 20, 15, 5])[0]
+    offset = rng.choice([0, 0, 0, -rng.uniform(0, 120), rng.uniform(0, 15), -rng.uniform(0, 12)])
+    return {"timestamp": now + offset, "level": level, "message": "x"}
+
+
+def check_out_of_order(seed, steps=20000, lateness=10):
+    """Returns (checks, legacy checks wrong); exits on any wrong count from LogAnalyzer."""
+    rng = random.Random(seed)
+    clock = Clock(2_000_000.0)  # replaying old logs: wall clock far ahead of event time
+    analyzer_module.time = clock
+    new = LogAnalyzer(window_seconds=60, enable_bedrock=False, tumbling_seconds=60, allowed_lateness=lateness)
+    legacy = LegacyAnalyzer(clock)
+    events = [(1_000_000.0 + i * 0.05, rng.choice(["INFO", "INFO", "WARNING", "ERROR", "CRITICAL"]))
+              for i in range(steps)]
+    # Shuffle within the lateness bound: arrival order by event time plus a random delay
+    arrivals = sorted(events, key=lambda event: event[0] + rng.uniform(0, lateness * 0.9))
+
+    seen, newest, checks, legacy_wrong = [], 0.0, 0, 0
+    for step, (timestamp, level) in enumerate(arrivals):
+        log = {"timestamp": timestamp, "level": level, "message": "x"}
+        new.add_log(dict(log))
+        legacy.add_log(dict(log))
+        seen.append((timestamp, level))
+        newest = max(newest, timestamp)  # the event clock, since the wall clock stands still
+        if step % 97 == 0:
+            truth = dict(Counter(l for t, l in seen if math.floor(t) > math.floor(newest) - 60))
+            actual = new.analyze()["counts"]
+            checks += 1
+            if actual != truth:
+                print(f"❌ step {step}: expected {truth}, got {actual}")
+                sys.exit(1)
+            legacy_wrong += legacy.analyze()["counts"] != truth
+
+    if new.window.late or new.window.dropped:
+        print(f"❌ {new.window.late} late / {new.window.dropped} dropped within allowed lateness")
+        sys.exit(1)
+    # Move the wall clock on until every tumbling window is closed
+    clock.now += 10 ** 6
+    closed = {w["start"]: w["counts"] for w in new.tumbling_windows()}
+    truth = {}
+    for timestamp, level in events:
+        start = math.floor(timestamp / 60) * 60
+        truth.setdefault(start, Counter())[level] += 1
+    if closed != {start: dict(counts) for start, counts in truth.items()}:
+        print("❌ tumbling window counts differ from event-time truth")
+        sys.exit(1)
+    return checks, legacy_wrong
+
+
+def per_log_cost(make, size, calls, tick=False):
+    clock = Clock(1_000_000.0)
+    analyzer_module.time = clock
+    analyzer = make(clock)
+    rng = random.Random(1)
+    for _ in range(size):
+        analyzer.add_log(random_log(rng, clock.now))
+    logs = [random_log(rng, clock.now) for _ in range(calls)]
+    started = time.perf_counter()
+    for log in logs:
+        analyzer.add_log(log)
+        if tick:
+            analyzer.tick()
+        else:
+            analyzer.analyze()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Analyzer window benchmark")
+    arg_parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    arg_parser.add_argument("--calls", type=int, default=2000)
+    arg_parser.add_argument("--legacy-max", type=int, default=100000,
+                            help="skip the legacy analyzer above this window size (it is O(window) per call)")
+    args = arg_parser.parse_args()
+
+    checks = legacy_wrong = 0
+    for seed in range(5):
+        seed_checks, seed_wrong = check_out_of_order(seed)
+        checks += seed_checks
+        legacy_wrong += seed_wrong
+    print(f"✅ out-of-order backfill: counts and tumbling windows match event time on {checks} checks "
+          f"(legacy analyzer wrong on {legacy_wrong})")
+
+    # Large windows: everything stays inside it
+    def make_new(clock):
+        return LogAnalyzer(window_seconds=10 ** 9, enable_bedrock=False)
+
+    def make_legacy(clock):
+        return LegacyAnalyzer(clock, window_seconds=10 ** 9)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        new = per_log_cost(make_new, size, args.calls)
+        ticked = per_log_cost(make_new, size, args.calls, tick=True)
+        if size <= args.legacy_max:
+            legacy = per_log_cost(make_legacy, size, max(args.calls * 1000 // size, 20))
+            print(f"📈 window {size:>9,}: {new:8.1f} µs/log   tick {ticked:6.1f} µs/log   legacy {legacy:12.1f} µs/log")
+        else:
+            print(f"📈 window {size:>9,}: {new:8.1f} µs/log   tick {ticked:6.1f} µs/log   legacy (skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: records/s of the polling API collector vs. the async pooled fan-in,
+against local stub servers (see api_stub_server.py).
+
+Usage: python benchmarks/bench_api_collector.py [--endpoints 4] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.api_stub_server import make_server
+from collector import api_collector
+
+
+def measure(iterator, seconds):
+    count = 0
+    started = time.time()
+    for _ in iterator:
+        count += 1
+        if time.time() - started >= seconds:
+            break
+    return count / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API collector benchmark")
+    parser.add_argument("--endpoints", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--backlog", type=int, default=1000000)
+    args = parser.parse_args()
+
+    urls = []
+    for _ in range(args.endpoints):
+        server = make_server(backlog=args.backlog, rate=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls.append(f"http://127.0.0.1:{server.server_address[1]}/logs")
+
+    single = measure(api_collector.fetch_logs_from_api(urls[0]), args.seconds)
+    print(f"🌐 fetch_logs_from_api (1 endpoint, 2s poll):       {single:10.1f} records/s")
+
+    fan_in = measure(api_collector.fetch_logs_from_apis(urls), args.seconds)
+    print(f"🌐 fetch_logs_from_apis ({args.endpoints} endpoints, pooled):   {fan_in:10.1f} records/s")
+
+
+if __name__ == "__main__":
+    main()
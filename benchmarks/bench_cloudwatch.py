@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: events/s of the original single-stream CloudWatch loop (limit=10,
+fixed 2s sleep) vs. cloudwatch_logs and the multi-stream group collector,
+against an in-memory stub of the logs API.
+
+The stub adds a fixed per-call latency to mimic the network round trip.
+To run against a local moto server instead, start `moto_server -p 5000`,
+create a group with a few streams and pass --endpoint-url http://localhost:5000.
+
+Usage: python benchmarks/bench_cloudwatch.py [--streams 8] [--events 20000] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector import cloudwatch_collector
+
+
+class StubLogsClient:
+    """In-memory stand-in for the parts of the boto3 logs client the collectors use."""
+
+    def __init__(self, streams, events_per_stream, latency=0.02):
+        self.latency = latency
+        now = int(time.time() * 1000)
+        self.streams = {
+            f"stream-{i}": [
+                {"timestamp": now, "message": f"2025-01-01 00:00:00 INFO [user1] [svc-api] [req-{n}] event {n}"}
+                for n in range(events_per_stream)
+            ]
+            for i in range(streams)
+        }
+
+    def describe_log_streams(self, **kwargs):
+        time.sleep(self.latency)
+        now = int(time.time() * 1000)
+        return {"logStreams": [
+            {"logStreamName": name, "lastEventTimestamp": now} for name in self.streams
+        ]}
+
+    def get_log_events(self, logGroupName, logStreamName, limit=10000, nextToken=None, startFromHead=False):
+        time.sleep(self.latency)
+        events = self.streams[logStreamName]
+        # Without a token the whole backlog is served, so both collectors see the same data
+        start = int(nextToken.split("/")[1]) if nextToken else 0
+        page = events[start:start + limit]
+        return {"events": page, "nextForwardToken": f"f/{start + len(page)}"}
+
+
+def legacy_stream_logs(client, group_name, stream_name):
+    """The single-stream loop cloudwatch_logs used to run, kept as the baseline."""
+    next_token = None
+    while True:
+        kwargs = {"logGroupName": group_name, "logStreamName": stream_name, "limit": 10}
+        if next_token:
+            kwargs["nextToken"] = next_token
+        response = client.get_log_events(**kwargs)
+        for event in response["events"]:
+            yield {"timestamp": event["timestamp"] / 1000.0, "message": event["message"]}
+        next_token = response.get("nextForwardToken")
+        time.sleep(2)
+
+
+def measure(iterator, seconds, total):
+    """Events/s until `seconds` have passed or `total` events (the whole backlog) were read."""
+    count = 0
+    started = time.time()
+    for _ in iterator:
+        count += 1
+        if count >= total or time.time() - started >= seconds:
+            break
+    return count / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CloudWatch collector benchmark")
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--events", type=int, default=20000, help="events per stream")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency per API call (s)")
+    parser.add_argument("--endpoint-url", type=str, help="use a moto server instead of the stub")
+    parser.add_argument("--group", type=str, default="bench-group")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        import boto3
+        client = boto3.client("logs", region_name="us-east-1", endpoint_url=args.endpoint_url)
+    else:
+        client = StubLogsClient(args.streams, args.events, args.latency)
+
+    first_stream = client.describe_log_streams(logGroupName=args.group)["logStreams"][0]["logStreamName"]
+    legacy = measure(legacy_stream_logs(client, args.group, first_stream), args.seconds, args.events)
+    print(f"☁️  original loop (1 stream, limit=10, sleep 2s):  {legacy:10.1f} events/s")
+
+    single = measure(
+        cloudwatch_collector.cloudwatch_logs(args.group, first_stream, client=client, min_interval=0.05),
+        args.seconds,
+        args.events,
+    )
+    print(f"☁️  cloudwatch_logs (1 stream):                    {single:10.1f} events/s")
+
+    group = measure(
+        cloudwatch_collector.cloudwatch_group_logs(args.group, client=client, min_interval=0.05),
+        args.seconds,
+        args.streams * args.events,
+    )
+    print(f"☁️  cloudwatch_group_logs ({args.streams} streams):             {group:10.1f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: directory tailing with inotify vs. the polling loop.
+
+Measures idle CPU (collector thread, no writes) and append-to-yield latency
+for both modes of collector.dir_collector.tail_directory.
+
+Usage: python benchmarks/bench_dir_collector.py [--files 300] [--idle 5] [--appends 50]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector import dir_collector
+
+
+def run_mode(use_inotify, num_files, idle_seconds, appends, results):
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(num_files):
+            with open(os.path.join(directory, f"app{i}.log"), "w") as f:
+                f.write("2025-01-01 00:00:00 INFO [user1] [svc-api] [req-1000] Booting up\n")
+
+        yielded = {}
+        ready = threading.Event()
+
+        def consume():
+            seen = 0
+            for log in dir_collector.tail_directory(directory, use_inotify=use_inotify):
+                seen += 1
+                if seen == num_files:
+                    ready.set()
+                if log["message"].startswith("bench-"):
+                    yielded[log["message"]] = time.perf_counter()
+
+        threading.Thread(target=consume, daemon=True).start()
+        ready.wait()
+
+        # Idle CPU: nothing is written, only the collector thread is running
+        cpu_start = time.process_time()
+        time.sleep(idle_seconds)
+        idle_cpu = (time.process_time() - cpu_start) / idle_seconds * 100
+
+        latencies = []
+        for i in range(appends):
+            marker = f"bench-{i}"
+            target = os.path.join(directory, f"app{i % num_files}.log")
+            written = time.perf_counter()
+            with open(target, "a") as f:
+                f.write(marker + "\n")
+            deadline = time.time() + 5
+            while marker not in yielded and time.time() < deadline:
+                time.sleep(0.0005)
+            if marker in yielded:
+                latencies.append((yielded[marker] - written) * 1000)
+
+        results.put({
+            "mode": "inotify" if use_inotify else "polling",
+            "idle_cpu_percent": idle_cpu,
+            "latency_ms_p50": statistics.median(latencies) if latencies else float("nan"),
+            "latency_ms_max": max(latencies) if latencies else float("nan"),
+            "delivered": len(latencies),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dir_collector benchmark")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--idle", type=float, default=5.0)
+    parser.add_argument("--appends", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📂 {args.files} files, {args.idle}s idle window, {args.appends} appends")
+    ctx = multiprocessing.get_context("spawn")
+    for use_inotify in (False, True):
+        results = ctx.Queue()
+        proc = ctx.Process(target=run_mode, args=(use_inotify, args.files, args.idle, args.appends, results))
+        proc.start()
+        r = results.get()
+        proc.terminate()
+        print(
+            f"{r['mode']:>8}: idle CPU {r['idle_cpu_percent']:6.2f}%  "
+            f"latency p50 {r['latency_ms_p50']:8.2f} ms  max {r['latency_ms_max']:8.2f} ms  "
+            f"({r['delivered']}/{args.appends} delivered)"
+        )
+
+
+if __name__ == "__main__":
+    main()
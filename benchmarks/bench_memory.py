@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by the analyzer window at N records, for
+  - dict records in a deque (the previous representation),
+  - processor.record.LogRecord objects in a deque,
+  - intelligence.window.EventTimeWindow alone (what the analyzer keeps for the
+    whole window: per-second level counts and timestamp/level/template id
+    columns; full records are capped at max_records).
+
+Records look like the pipeline's output for log_generator lines.
+Sizes are measured with tracemalloc, so they include the message strings.
+
+Usage: python benchmarks/bench_memory.py [--records 1000000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.record import LogRecord
+from intelligence.window import EventTimeWindow
+from log_generator import LOG_LEVELS, USER_IDS, SERVICE_IDS
+
+
+def make_dict(rng, now, i):
+    level = rng.choice(list(LOG_LEVELS))
+    # Built per record like the parser does, so equal strings are separate objects
+    return {
+        "timestamp": now + i * 1e-3,
+        "source": "".join(["logs/", rng.choice(["app1", "app2", "db"]), ".log"]),
+        "level": level.upper(),
+        "message": rng.choice(LOG_LEVELS[level]) + f" ({i})",
+        "user_id": "".join(rng.choice(USER_IDS)),
+        "service_id": "".join(rng.choice(SERVICE_IDS)),
+        "request_id": f"req-{rng.randint(1000, 9999)}",
+        "template_id": rng.randint(1, 20),
+        "params": [str(i)],
+    }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, held
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Window memory benchmark")
+    arg_parser.add_argument("--records", type=int, default=1000000)
+    args = arg_parser.parse_args()
+    n = args.records
+    now = time.time()
+
+    def dicts():
+        rng = random.Random(1)
+        return deque(make_dict(rng, now, i) for i in range(n))
+
+    def records():
+        rng = random.Random(1)
+        return deque(LogRecord.from_dict(make_dict(rng, now, i)) for i in range(n))
+
+    def event_window():
+        rng = random.Random(1)
+        window = EventTimeWindow(window_seconds=10 ** 9)
+        for i in range(n):
+            log = make_dict(rng, now, i)
+            window.add(log["timestamp"], log["level"], wall=now, template_id=i % 500)
+        return window
+
+    results = []
+    for name, build in (("dict deque", dicts), ("LogRecord deque", records), ("EventTimeWindow", event_window)):
+        size, held = measure(build)
+        results.append((name, size))
+        del held
+    baseline = results[0][1]
+    for name, size in results:
+        print(f"🧠 {name:16s} {size / 1e6:10.1f} MB  {size / n:7.1f} B/record  ({baseline / size:.1f}x vs dicts)")
+
+
+if __name__ == "__main__":
+    main()
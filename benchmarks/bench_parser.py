@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark: processor.parser.categorize_log vs. the previous implementation
+(kept below as legacy_categorize_log).
+
+First checks that both assign identical levels on a golden corpus (the
+generator's plain and JSON formats, hand-written edge cases and random lines
+built from level-keyword fragments), then times both on a mixed workload.
+(Full rows, including the extracted timestamp/user/service/request fields,
+are checked against the same baseline by tests/test_parser.py.)
+
+Usage: python benchmarks/bench_parser.py [--lines 200000] [--json-ratio 0.2] [--fuzz 200000]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor import parser
+from log_generator import LOG_LEVELS as MESSAGES
+
+
+def legacy_categorize_log(log):
+    message = log.get("message", "")
+    try:
+        msg_obj = json.loads(message)
+        if isinstance(msg_obj, dict) and "level" in msg_obj:
+            log["level"] = msg_obj.get("level", "INFO")
+            log["message"] = msg_obj.get("message", message)
+            if "timestamp" in msg_obj:
+                log["timestamp"] = msg_obj["timestamp"]
+            return log
+    except Exception:
+        pass
+    bracket_match = re.search(r"\[(ERROR|WARNING|INFO|CRITICAL)\]", message, re.IGNORECASE)
+    if bracket_match:
+        log["level"] = bracket_match.group(1).upper()
+        return log
+    space_match = re.search(r"\b(ERROR|WARNING|INFO|CRITICAL)\b", message, re.IGNORECASE)
+    if space_match:
+        log["level"] = space_match.group(1).upper()
+        return log
+    for level, pattern in parser.LOG_LEVELS.items():
+        if pattern.search(message):
+            log["level"] = level
+            return log
+    log["level"] = "INFO"
+    return log
+
+
+EDGE_CASES = [
+    "", " ", "{", "{}", "[]", "null", "42", '"ERROR"', "  {\"level\": \"ERROR\"}",
+    '{"level": "WARNING", "message": "disk", "timestamp": 1}', '{"msg": "error here"}',
+    '{"level": null}', '{"level": "x"} trailing', "{not json ERROR}", "[ERROR]", "[error]",
+    "[Warning] x", "[WARN] x", "[INFO][ERROR]", "ERROR [INFO]", "warning: errors", "errors",
+    "ERRORS INFO", "info_error", "_ERROR_", "ERROR_", "x-ERROR-x", "é ERROR", "éERROR",
+    "ERRORé", "warnings", "Warninfo", "criticalerror", "CRITICAL", "Critical condition",
+    "information", "misinformation warning", "[ ERROR ]", "[[ERROR]]", "[ERROR", "ERROR]",
+    "2025-08-26 INFO Server started", "2025-08-26 ERROR Database down", "İNFO x",
+    "KERROR", "ERRØR", "WΑRN", "[ınfo]", "\tINFO\t", "ERROR\n", "\nwarn",
+    "﻿{\"level\": \"ERROR\"}", "\n {\"level\": \"CRITICAL\", \"message\": \"down\"}",
+]
+
+FRAGMENTS = ["error", "ERROR", "Error", "warn", "WARN", "warning", "Warning", "info", "INFO",
+             "critical", "CRITICAL", "[", "]", " ", "_", "-", "é", "1", "x", "s", "in", "fo", "{", "}"]
+
+
+def generator_line(rng, json_ratio):
+    level = rng.choice(list(MESSAGES))
+    message = rng.choice(MESSAGES[level])
+    if rng.random() < json_ratio:
+        return json.dumps({"timestamp": time.time(), "level": level, "message": message,
+                           "user_id": "user1", "service_id": "svc-api", "request_id": "req-1000"})
+    return f"2025-08-26 12:00:00 {level} [user1] [svc-api] [req-1000] {message}"
+
+
+def golden_corpus(rng, fuzz):
+    corpus = list(EDGE_CASES)
+    corpus += [generator_line(rng, 0.5) for _ in range(2000)]
+    for _ in range(fuzz):
+        corpus.append("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8))))
+    return corpus
+
+
+def check_equivalence(corpus):
+    mismatches = 0
+    for line in corpus:
+        expected = legacy_categorize_log({"message": line})["level"]
+        actual = parser.categorize_log({"message": line})["level"]
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ {line!r}: legacy {expected} != new {actual}")
+    return mismatches
+
+
+def time_it(fn, lines):
+    started = time.perf_counter()
+    for line in lines:
+        fn({"message": line})
+    return len(lines) / (time.perf_counter() - started)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Parser benchmark")
+    arg_parser.add_argument("--lines", type=int, default=200000)
+    arg_parser.add_argument("--json-ratio", type=float, default=0.2)
+    arg_parser.add_argument("--fuzz", type=int, default=200000)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    args = arg_parser.parse_args()
+    rng = random.Random(args.seed)
+
+    corpus = golden_corpus(rng, args.fuzz)
+    mismatches = check_equivalence(corpus)
+    if mismatches:
+        print(f"❌ {mismatches}/{len(corpus)} golden lines differ")
+        sys.exit(1)
+    print(f"✅ {len(corpus)} golden lines: identical levels")
+
+    lines = [generator_line(rng, args.json_ratio) for _ in range(args.lines)]
+    legacy = time_it(legacy_categorize_log, lines)
+    new = time_it(parser.categorize_log, lines)
+    print(f"🧮 legacy categorize_log: {legacy:12.0f} lines/s")
+    print(f"🧮 categorize_log:        {new:12.0f} lines/s  ({new / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: intelligence.rules.RuleEngine with hundreds of count/ratio rules
+against evaluating the same rules by rescanning the window (what Python rules
+in the analyzer did), on a stream of log_generator-like records.
+
+Checks both report the same active rules, then prints the cost per record
+with analyze() (evaluate) called once per batch.
+
+Usage: python benchmarks/bench_rules.py [--rules 100,300,1000] [--logs 50000] [--batch 500]
+"""
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intelligence.rules import RuleEngine
+from log_generator import LOG_LEVELS, SERVICE_IDS
+
+LEVELS = [level.upper() for level in LOG_LEVELS]
+SERVICES = list(SERVICE_IDS)
+WINDOW = 60
+
+
+def make_rules(n, rng):
+    rules = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            rules.append({"name": f"count-{i}", "type": "count", "service": rng.choice(SERVICES),
+                          "level": rng.choice(LEVELS), "window": WINDOW, "threshold": rng.randint(5, 400)})
+        elif kind == 1:
+            rules.append({"name": f"pattern-{i}", "type": "count", "level": rng.choice(LEVELS),
+                          "pattern": rng.choice(["timeout", "failed", r"code \d{3}", "disk", "memory"]),
+                          "window": WINDOW, "threshold": rng.randint(5, 400)})
+        else:
+            rules.append({"name": f"ratio-{i}", "type": "ratio", "numerator": {"level": rng.choice(LEVELS)},
+                          "denominator": {"service": rng.choice(SERVICES)}, "window": WINDOW,
+                          "threshold": rng.random(), "min_count": 10})
+    return rules
+
+
+def matches(spec, log):
+    if "level" in spec and log["level"] != spec["level"]:
+        return False
+    if "service" in spec and log["service_id"] != spec["service"]:
+        return False
+    return "pattern" not in spec or re.search(spec["pattern"], log["message"]) is not None
+
+
+class RescanRules:
+    """Every rule scans the records of the window on each evaluation."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.logs = deque()
+
+    def observe(self, log, now):
+        self.logs.append(log)
+
+    def evaluate(self, now):
+        cutoff = math.floor(now) - WINDOW
+        while self.logs and math.floor(self.logs[0]["timestamp"]) <= cutoff:
+            self.logs.popleft()
+        active = []
+        for rule in self.rules:
+            if rule["type"] == "count":
+                spec = {k: v for k, v in rule.items() if k in ("level", "service", "pattern")}
+                if sum(1 for log in self.logs if matches(spec, log)) >= rule["threshold"]:
+                    active.append(rule["name"])
+            else:
+                total = sum(1 for log in self.logs if matches(rule["denominator"], log))
+                part = sum(1 for log in self.logs if matches(rule["numerator"], log))
+                if total >= rule["min_count"] and round(part / total, 4) > rule["threshold"]:
+                    active.append(rule["name"])
+        return active
+
+
+def make_logs(n, rng):
+    now = 1_000_000.0
+    logs = []
+    for _ in range(n):
+        now += rng.expovariate(200)
+        level = rng.choice(list(LOG_LEVELS))
+        message = rng.choice(LOG_LEVELS[level]) + rng.choice(["", " timeout", f" code {rng.randint(100, 599)}"])
+        logs.append({"timestamp": now, "level": level.upper(), "message": message,
+                     "service_id": rng.choice(SERVICES), "source": "logs/app1.log"})
+    return logs
+
+
+def run(engine, logs, batch):
+    started = time.perf_counter()
+    states = []
+    for i, log in enumerate(logs):
+        engine.observe(log, log["timestamp"])
+        if i % batch == batch - 1:
+            result = engine.evaluate(log["timestamp"])
+            states.append(sorted(r["rule"] if isinstance(r, dict) else r for r in result))
+    return (time.perf_counter() - started) / len(logs) * 1e6, states
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Rule engine benchmark")
+    arg_parser.add_argument("--rules", default="100,300,1000")
+    arg_parser.add_argument("--logs", type=int, default=50000)
+    arg_parser.add_argument("--batch", type=int, default=500)
+    arg_parser.add_argument("--rescan-logs", type=int, default=5000,
+                            help="records replayed through the rescanning evaluator (it is O(rules x window))")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(7)
+    logs = make_logs(args.logs, rng)
+    for n in (int(s) for s in args.rules.split(",")):
+        rules = make_rules(n, rng)
+        compiled, compiled_states = run(RuleEngine(rules), logs, args.batch)
+        rescan, rescan_states = run(RescanRules(rules), logs[:args.rescan_logs], args.batch)
+        if compiled_states[:len(rescan_states)] != rescan_states:
+            print(f"❌ {n} rules: active rules differ from the rescanning evaluator")
+            sys.exit(1)
+        print(f"📏 {n:5d} rules: compiled {compiled:8.1f} µs/log   rescan {rescan:10.1f} µs/log   "
+              f"({rescan / compiled:.0f}x, same active rules)")
+
+
+if __name__ == "__main__":
+    main()
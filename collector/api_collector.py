@@ -1,5 +1,11 @@
 import requests
 import time
+import queue
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+import httpx
 
 def fetch_logs_from_api(api_url, poll_interval=2):
     """
@@ -7,10 +13,11 @@ def fetch_logs_from_api(api_url, poll_interval=2):
     Each log entry should be a dict with at least a 'message' field.
     """
     last_id = None
+    session = requests.Session()  # reuse the TCP/TLS connection between polls
     while True:
         params = {"after_id": last_id} if last_id else {}
         try:
-            response = requests.get(api_url, params=params, timeout=10)
+            response = session.get(api_url, params=params, timeout=10)
             response.raise_for_status()
             logs = response.json()  # Expecting a list of dicts
             for log in logs:
@@ -23,3 +30,128 @@ def fetch_logs_from_api(api_url, poll_interval=2):
         except Exception as e:
             print(f"API fetch error: {e}")
         time.sleep(poll_interval)
+
+
+def _retry_after(response, default):
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+async def _follow_endpoint(client, api_url, out, page_size, poll_interval, max_interval):
+    """Poll one endpoint forever, putting its records on the shared queue."""
+    last_id = None
+    etag = None
+    backoff = poll_interval
+    while True:
+        params = {"limit": page_size}
+        if last_id:
+            params["after_id"] = last_id
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            response = await client.get(api_url, params=params, headers=headers)
+            if response.status_code == 304:
+                delay = poll_interval
+            elif response.status_code in (429, 503):
+                backoff = min(backoff * 2, max_interval)
+                delay = _retry_after(response, backoff)
+            else:
+                response.raise_for_status()
+                logs = response.json()  # Expecting a list of dicts
+                for log in logs:
+                    last_id = log.get("id", last_id)
+                    await out.put({
+                        "timestamp": log.get("timestamp", time.time()),
+                        "source": api_url,
+                        "message": log.get("message", "")
+                    })
+                # An ETag only describes the page for the current cursor
+                etag = response.headers.get("ETag") if not logs else None
+                backoff = poll_interval
+                # A full page means there is a backlog: fetch the next one right away
+                delay = 0 if len(logs) >= page_size else poll_interval
+        except Exception as e:
+            print(f"API fetch error ({api_url}): {e}")
+            backoff = min(backoff * 2, max_interval)
+            delay = backoff
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)  # let the other endpoints run
+
+
+async def fetch_logs_from_apis_async(api_urls, page_size=500, poll_interval=2, max_interval=60,
+                                     max_connections=20, queue_size=10000):
+    """
+    Follow several API endpoints concurrently and yield their records as one stream.
+
+    A single pooled httpx.AsyncClient is shared by all endpoints. Each endpoint asks
+    for page_size records per request and fetches the next page immediately while
+    pages come back full; otherwise it waits poll_interval. 304 (ETag unchanged),
+    429/503 with Retry-After and errors are honoured with backoff up to max_interval.
+    """
+    if isinstance(api_urls, str):
+        api_urls = [api_urls]
+    out = asyncio.Queue(maxsize=queue_size)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        tasks = [
+            asyncio.create_task(_follow_endpoint(client, url, out, page_size, poll_interval, max_interval))
+            for url in api_urls
+        ]
+        try:
+            while True:
+                yield await out.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def fetch_logs_from_apis(api_urls, queue_size=10000, **kwargs):
+    """
+    Blocking wrapper around fetch_logs_from_apis_async for thread-based callers.
+
+    The event loop runs in a background thread; when the consumer falls behind,
+    the bounded queue fills up and the endpoints stop being polled.
+    """
+    records = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    async def pump():
+        agen = fetch_logs_from_apis_async(api_urls, queue_size=queue_size, **kwargs)
+        try:
+            async for record in agen:
+                if stop.is_set():
+                    break
+                try:
+                    records.put_nowait(record)
+                    continue
+                except queue.Full:
+                    pass
+                while not stop.is_set():
+                    try:
+                        # Consumer behind: wait in a worker thread so the endpoint tasks keep running
+                        await asyncio.to_thread(records.put, record, timeout=0.5)
+                        break
+                    except queue.Full:
+                        pass
+        finally:
+            await agen.aclose()
+
+    thread = threading.Thread(target=asyncio.run, args=(pump(),), daemon=True)
+    thread.start()
+    try:
+        while True:
+            yield records.get()
+    finally:
+        stop.set()
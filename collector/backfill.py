@@ -0,0 +1,221 @@
+import os
+import mmap
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from collector.checkpoint import file_key
+from processor import parser
+
+CHUNK_SIZE = 4 * 1024 * 1024  # bytes handed to a worker at a time
+BATCH_SIZE = 5000             # records handed to on_batch at a time
+
+
+def chunk_boundaries(mm, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Split mm[start:end] into (start, end) ranges of roughly chunk_size bytes
+    that always end just after a newline.
+    """
+    ranges = []
+    pos = start
+    while pos < end:
+        cut = min(pos + chunk_size, end)
+        if cut < end:
+            newline = mm.find(b"\n", cut - 1, end)
+            cut = end if newline == -1 else newline + 1
+        ranges.append((pos, cut))
+        pos = cut
+    return ranges
+
+
+def parse_chunk(file_path, start, end):
+    """
+    Worker: map the file and parse every line of [start, end).
+    Returns compact parser.parse_batch rows; they pickle far smaller than dicts.
+    """
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    lines = data.decode(errors="replace").split("\n")
+    lines.pop()  # chunks end with a newline
+    return parser.parse_batch([line.strip() for line in lines])
+
+
+def _to_records(rows, file_path):
+    now = time.time()
+    records = []
+    for row in rows:
+        parsed_log = {"timestamp": now, "source": file_path}
+        parsed_log.update(parser.row_to_dict(row))
+        records.append(parsed_log)
+    return records
+
+
+class _Acknowledgements:
+    """Commits a file's offset once every batch handed out for it has been acknowledged."""
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self._files = {}  # key -> [unacknowledged batches, all ok, final offset or None, path]
+        self._changed = threading.Condition()
+
+    def callback(self, key):
+        with self._changed:
+            self._files.setdefault(key, [0, True, None, None])[0] += 1
+
+        def done(ok=True):
+            with self._changed:
+                state = self._files[key]
+                state[0] -= 1
+                state[1] = state[1] and ok
+                self._settle(key)
+        return done
+
+    def finish(self, key, end, file_path):
+        with self._changed:
+            state = self._files.setdefault(key, [0, True, None, None])
+            state[2], state[3] = end, file_path
+            self._settle(key)
+
+    def _settle(self, key):
+        pending, ok, end, file_path = self._files[key]
+        if pending or end is None:
+            return
+        del self._files[key]
+        if ok and self.checkpoint:
+            self.checkpoint.set(key, {"offset": end, "path": file_path})
+        elif not ok:
+            print(f"[Backfill] {file_path}: a batch was not stored, its offset is left for a retry")
+        self._changed.notify_all()
+
+    def wait(self):
+        with self._changed:
+            self._changed.wait_for(lambda: not self._files)
+
+
+def _pending_ranges(directory_path, checkpoint, chunk_size):
+    """Collect (path, key, ranges, end) for every .log file with unread complete lines."""
+    work = []
+    for filename in sorted(os.listdir(directory_path)):
+        if not filename.endswith(".log"):
+            continue
+        file_path = os.path.join(directory_path, filename)
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            continue
+        with f:
+            st = os.fstat(f.fileno())
+            key = file_key(st)
+            saved = checkpoint.get(key) if checkpoint else None
+            start = saved.get("offset", 0) if saved and saved.get("offset", 0) <= st.st_size else 0
+            if st.st_size <= start:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # A trailing line without a newline is left for the tailer
+                end = mm.rfind(b"\n", start, st.st_size) + 1
+                if end <= start:
+                    continue
+                work.append((file_path, key, chunk_boundaries(mm, start, end, chunk_size), end))
+    return work
+
+
+def backfill_directory(directory_path, on_batch, checkpoint=None, workers=None,
+                       chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, progress_interval=2.0,
+                       acknowledge=False):
+    """
+    Parse every complete line not yet covered by the checkpoint, in parallel.
+
+    Files are memory-mapped and split on newline-aligned chunks that are parsed in a
+    process pool; parsed records are passed to on_batch in lists of up to batch_size,
+    in file order. Once a file is done its offset is stored in the checkpoint so
+    tail_directory picks up exactly where the backfill stopped.
+
+    By default a file is done when on_batch has returned for its last batch: if on_batch
+    only enqueues the records, a crash before they are stored loses them (at-most-once).
+    With acknowledge=True, on_batch is called as on_batch(records, done) and must call
+    done(ok) once the records are stored; a file's offset is committed when all of its
+    batches were acknowledged with ok, and the backfill returns after every batch has
+    been acknowledged. A file with a failed batch keeps its old offset, so its lines are
+    read again by the tailer or the next backfill (at-least-once).
+    Returns a dict with lines, bytes, seconds, lines_per_sec and mb_per_sec.
+    """
+    work = _pending_ranges(directory_path, checkpoint, chunk_size)
+    acks = _Acknowledgements(checkpoint) if acknowledge else None
+    total_bytes = sum(e - s for _, _, ranges, _ in work for s, e in ranges)
+    stats = {"lines": 0, "bytes": 0}
+    started = time.time()
+    last_report = started
+
+    def report(final=False):
+        elapsed = max(time.time() - started, 1e-9)
+        stats["seconds"] = elapsed
+        stats["lines_per_sec"] = stats["lines"] / elapsed
+        stats["mb_per_sec"] = stats["bytes"] / elapsed / (1024 * 1024)
+        print(
+            f"[Backfill] {'done: ' if final else ''}{stats['lines']} lines, "
+            f"{stats['bytes'] / (1024 * 1024):.1f}/{total_bytes / (1024 * 1024):.1f} MB "
+            f"({stats['lines_per_sec']:.0f} lines/s, {stats['mb_per_sec']:.2f} MB/s)"
+        )
+
+    def consume(rows, file_path, key, nbytes):
+        nonlocal last_report
+        records = _to_records(rows, file_path)
+        for i in range(0, len(records), batch_size):
+            if acks:
+                on_batch(records[i:i + batch_size], acks.callback(key))
+            else:
+                on_batch(records[i:i + batch_size])
+        stats["lines"] += len(records)
+        stats["bytes"] += nbytes
+        if time.time() - last_report >= progress_interval:
+            last_report = time.time()
+            report()
+
+    def commit(key, end, file_path):
+        if acks:
+            acks.finish(key, end, file_path)
+        elif checkpoint:
+            checkpoint.set(key, {"offset": end, "path": file_path})
+
+    def finish(task, future):
+        file_path, key, end, start, stop = task
+        consume(future.result(), file_path, key, stop - start)
+        if stop == end:
+            commit(key, end, file_path)
+
+    if not work:
+        report(final=True)
+        return stats
+
+    # Small backlogs are not worth starting worker processes for
+    if total_bytes <= chunk_size or workers == 1:
+        for file_path, key, ranges, end in work:
+            for start, stop in ranges:
+                consume(parse_chunk(file_path, start, stop), file_path, key, stop - start)
+            commit(key, end, file_path)
+    else:
+        workers = workers or os.cpu_count()
+        tasks = [
+            (file_path, key, end, start, stop)
+            for file_path, key, ranges, end in work
+            for start, stop in ranges
+        ]
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            # Keep a bounded number of chunks in flight so parsed results never pile up
+            in_flight = deque()
+            for task in tasks:
+                in_flight.append((task, pool.submit(parse_chunk, task[0], task[3], task[4])))
+                if len(in_flight) >= workers * 2:
+                    finish(*in_flight.popleft())
+            while in_flight:
+                finish(*in_flight.popleft())
+
+    if acks:
+        acks.wait()
+    if checkpoint:
+        checkpoint.flush()
+    report(final=True)
+    return stats
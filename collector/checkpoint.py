@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import threading
+
+
+def file_key(stat_result):
+    """
+    Identity of a file that survives renames: "<device>:<inode>".
+    """
+    return f"{stat_result.st_dev}:{stat_result.st_ino}"
+
+
+class Checkpoint:
+    """
+    Small JSON key/value store used by collectors to resume where they stopped.
+
+    Updates are kept in memory and written to disk in batches (every flush_every
+    updates or flush_interval seconds, whichever comes first). Writes go to a
+    temporary file that is atomically renamed over the checkpoint.
+    With path=None the checkpoint only lives in memory (for the current run).
+    """
+
+    def __init__(self, path, flush_every=100, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.time()
+        self._data = {}
+        if path is None:
+            return
+        try:
+            with open(path, "r") as f:
+                self._data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._pending += 1
+            due = (
+                self._pending >= self.flush_every
+                or time.time() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return
+            self._pending += 1
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending or self.path is None:
+                return
+            snapshot = json.dumps(self._data)
+            self._pending = 0
+            self._last_flush = time.time()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[Checkpoint] Failed to write {self.path}: {e}")
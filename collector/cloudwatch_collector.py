@@ -1,27 +1,156 @@
 import boto3
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-def cloudwatch_logs(group_name, stream_name, region="us-east-1"):
+def cloudwatch_logs(group_name, stream_name, region="us-east-1", **kwargs):
     """
-    Fetch logs from AWS CloudWatch.
+    Follow one CloudWatch log stream: cloudwatch_group_logs restricted to it, so it
+    gets the same full pages, adaptive backoff and checkpointed token.
     """
-    client = boto3.client("logs", region_name=region)
-    next_token = None
-
-    while True:
-        kwargs = {"logGroupName": group_name, "logStreamName": stream_name, "limit": 10}
-        if next_token:
-            kwargs["nextToken"] = next_token
-
-        response = client.get_log_events(**kwargs)
-        events = response["events"]
-
-        for event in events:
-            yield {
-                "timestamp": event["timestamp"] / 1000.0,
-                "source": f"cloudwatch:{group_name}/{stream_name}",
-                "message": event["message"],
-            }
-
-        next_token = response.get("nextForwardToken")
-        time.sleep(2)
\ No newline at end of file
+    return cloudwatch_group_logs(group_name, region, stream_names=[stream_name], **kwargs)
+
+
+class _StreamState:
+    __slots__ = ("name", "token", "from_head", "interval", "next_due")
+
+    def __init__(self, name, token, from_head, min_interval):
+        self.name = name
+        self.token = token
+        self.from_head = from_head
+        self.interval = min_interval
+        self.next_due = 0.0
+
+
+def cloudwatch_group_logs(group_name, region="us-east-1", checkpoint=None, client=None,
+                          endpoint_url=None, max_workers=8, max_streams=100, page_size=10000,
+                          min_interval=0.5, max_interval=30.0, discover_interval=30.0,
+                          active_window=3600, stream_names=None):
+    """
+    Follow every active stream of a CloudWatch log group, or only stream_names if given.
+
+    A bounded pool of max_workers threads reads full-size pages (page_size events)
+    from per-stream forward tokens. A stream that returned events is fetched again
+    right away; an idle one backs off exponentially from min_interval up to
+    max_interval. Streams dropping out of the newest max_streams (or silent for
+    active_window seconds) stop being polled at the next discovery pass; named
+    streams are always polled.
+    Tokens are stored in the checkpoint (key "cloudwatch:<group>/<stream>")
+    so a restart resumes where it stopped. Pass client (any object with the boto3
+    logs API) or endpoint_url (e.g. a local moto server) for testing.
+    """
+    if client is None:
+        client = boto3.client("logs", region_name=region, endpoint_url=endpoint_url)
+    streams = {}
+    last_discovery = 0.0
+    first_discovery = True
+
+    def checkpoint_key(stream_name):
+        return f"cloudwatch:{group_name}/{stream_name}"
+
+    def discover():
+        nonlocal first_discovery
+        cutoff = (time.time() - active_window) * 1000
+        found = list(stream_names or [])
+        kwargs = {"logGroupName": group_name, "orderBy": "LastEventTime", "descending": True}
+        while stream_names is None and len(found) < max_streams:
+            response = client.describe_log_streams(**kwargs)
+            for stream in response.get("logStreams", []):
+                last_event = stream.get("lastEventTimestamp") or stream.get("lastIngestionTime") or 0
+                if last_event < cutoff:
+                    break
+                found.append(stream["logStreamName"])
+            else:
+                if response.get("nextToken"):
+                    kwargs["nextToken"] = response["nextToken"]
+                    continue
+            break
+        found = found if stream_names is not None else found[:max_streams]
+        # Streams that left the active set are no longer polled; their token stays in the
+        # checkpoint, so one that becomes active again resumes where it stopped
+        for name in set(streams) - set(found):
+            del streams[name]
+        for name in found:
+            if name in streams:
+                continue
+            saved = checkpoint.get(checkpoint_key(name)) if checkpoint else None
+            # Streams created after startup are read from their first event;
+            # streams that existed before start from their latest page.
+            streams[name] = _StreamState(
+                name, saved.get("token") if saved else None, not first_discovery, min_interval
+            )
+        first_discovery = False
+
+    def fetch(state):
+        kwargs = {"logGroupName": group_name, "logStreamName": state.name, "limit": page_size}
+        if state.token:
+            kwargs["nextToken"] = state.token
+        elif state.from_head:
+            kwargs["startFromHead"] = True
+        return client.get_log_events(**kwargs)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}  # future -> stream state
+        try:
+            while True:
+                now = time.time()
+                if now - last_discovery >= discover_interval:
+                    try:
+                        discover()
+                    except Exception as e:
+                        print(f"[CloudWatch] Stream discovery failed: {e}")
+                    last_discovery = now
+
+                busy = {state.name for state in in_flight.values()}
+                for state in sorted(streams.values(), key=lambda s: s.next_due):
+                    if len(in_flight) >= max_workers or state.next_due > now:
+                        break
+                    if state.name not in busy:
+                        in_flight[pool.submit(fetch, state)] = state
+
+                if not in_flight:
+                    next_due = min((s.next_due for s in streams.values()), default=now + discover_interval)
+                    time.sleep(min(max(next_due - now, 0.01), discover_interval))
+                    continue
+
+                # Wake up when a fetch completes or when an idle stream becomes due again
+                busy = {state.name for state in in_flight.values()}
+                idle_due = [s.next_due for s in streams.values() if s.name not in busy]
+                timeout = None
+                if idle_due and len(in_flight) < max_workers:
+                    timeout = max(min(idle_due) - time.time(), 0.01)
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state = in_flight.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        print(f"[CloudWatch] {state.name}: {e}")
+                        state.interval = min(state.interval * 2, max_interval)
+                        state.next_due = time.time() + state.interval
+                        continue
+
+                    events = response.get("events", [])
+                    for event in events:
+                        yield {
+                            "timestamp": event["timestamp"] / 1000.0,
+                            "source": f"cloudwatch:{group_name}/{state.name}",
+                            "message": event["message"],
+                        }
+
+                    token = response.get("nextForwardToken")
+                    if token and token != state.token:
+                        state.token = token
+                        if checkpoint:
+                            checkpoint.set(checkpoint_key(state.name), {"token": token})
+                    if events:
+                        # Backlog: fetch the next page immediately
+                        state.interval = min_interval
+                        state.next_due = 0.0
+                    else:
+                        state.interval = min(state.interval * 2, max_interval)
+                        state.next_due = time.time() + state.interval
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if checkpoint:
+                checkpoint.flush()
@@ -1,42 +1,274 @@
 import os
+import sys
 import time
+import select
+import struct
+import ctypes
+import ctypes.util
 
-def tail_directory(directory_path):
+from collector.checkpoint import file_key
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+TAIL_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
     """
-    Continuously tails all .log files in a directory.
+    Minimal ctypes wrapper around the Linux inotify API watching a single directory.
     """
-    file_positions = {}
-
-    # On startup, yield all existing lines in all log files
-    for filename in os.listdir(directory_path):
-        if not filename.endswith(".log"):
-            continue
-        file_path = os.path.join(directory_path, filename)
-        with open(file_path, "r") as f:
-            for line in f:
-                yield {
-                    "timestamp": time.time(),
-                    "source": file_path,
-                    "message": line.strip(),
-                }
-        file_positions[file_path] = os.path.getsize(file_path)
-
-    # Now tail new lines as before
-    while True:
-        for filename in os.listdir(directory_path):
+
+    def __init__(self, directory_path, mask=TAIL_MASK):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory_path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err))
+
+    def read_events(self, timeout=None):
+        """
+        Block until events are available (or timeout) and return a list of (mask, name).
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+            offset += name_len
+            events.append((mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _TailedFile:
+    __slots__ = ("path", "f", "partial")
+
+    def __init__(self, path, f):
+        self.path = path
+        self.f = f
+        self.partial = b""
+
+
+class DirectoryTailer:
+    """
+    Tracks the .log files of a directory by (device, inode) rather than by path.
+
+    A rotated file (app1.log -> app1_<ts>.log) keeps its inode and therefore its
+    offset, so it is never re-read as new data; it is followed to EOF before the
+    freshly created app1.log is read. When a Checkpoint is given, offsets are
+    stored in it so a restart resumes after the last line already yielded.
+    """
+
+    def __init__(self, directory_path, checkpoint=None):
+        self.directory_path = directory_path
+        self.checkpoint = checkpoint
+        self.files = {}  # key -> _TailedFile (handles stay open between reads)
+        self.paths = {}  # path -> key
+        self.moved_out = set()  # keys renamed away in the last event batch, kept in case the rename continues
+
+    def _open(self, file_path):
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        key = file_key(st)
+        tailed = self.files.get(key)
+        if tailed:
+            # Known inode under a new name: keep reading from where we were
+            if self.paths.get(tailed.path) == key:
+                del self.paths[tailed.path]
+            tailed.path = file_path
+        else:
+            offset = 0
+            saved = self.checkpoint.get(key) if self.checkpoint else None
+            if saved and saved.get("offset", 0) <= st.st_size:
+                offset = saved["offset"]
+            try:
+                f = open(file_path, "rb")
+            except FileNotFoundError:
+                return None
+            f.seek(offset)
+            self.files[key] = _TailedFile(file_path, f)
+        self.paths[file_path] = key
+        return key
+
+    def _close(self, key, forget=False):
+        tailed = self.files.pop(key, None)
+        if tailed is None:
+            return
+        if self.paths.get(tailed.path) == key:
+            del self.paths[tailed.path]
+        self.moved_out.discard(key)
+        tailed.f.close()
+        if forget and self.checkpoint:
+            self.checkpoint.delete(key)
+
+    def read(self, key):
+        """Yield every complete line appended to the file since the last read."""
+        tailed = self.files.get(key)
+        if tailed is None:
+            return
+        f = tailed.f
+        if os.fstat(f.fileno()).st_size < f.tell():
+            # Truncated in place (copytruncate): start over
+            f.seek(0)
+            tailed.partial = b""
+        data = f.read()
+        if not data:
+            return
+        offset = f.tell() - len(data) - len(tailed.partial)
+        lines = (tailed.partial + data).split(b"\n")
+        tailed.partial = lines.pop()
+        for line in lines:
+            yield {
+                "timestamp": time.time(),
+                "source": tailed.path,
+                "message": line.decode(errors="replace").strip(),
+            }
+            # Only count a line as consumed once the caller has come back for the next one
+            offset += len(line) + 1
+            if self.checkpoint:
+                self.checkpoint.set(key, {"offset": offset, "path": tailed.path})
+
+    def scan(self, prune=False):
+        """
+        Reconcile with a directory listing: drain known files, drop vanished
+        ones and start reading new ones.
+        """
+        # Follow every known inode to EOF first, so rotated files finish before their successors
+        for key in list(self.files):
+            yield from self.read(key)
+
+        live = {}
+        for filename in sorted(os.listdir(self.directory_path)):
             if not filename.endswith(".log"):
                 continue
-            file_path = os.path.join(directory_path, filename)
-            if file_path not in file_positions:
-                file_positions[file_path] = 0
-            with open(file_path, "r") as f:
-                f.seek(file_positions[file_path])
-                new_lines = f.readlines()
-                file_positions[file_path] = f.tell()
-            for line in new_lines:
-                yield {
-                    "timestamp": time.time(),
-                    "source": file_path,
-                    "message": line.strip(),
-                }
-        time.sleep(1)
\ No newline at end of file
+            file_path = os.path.join(self.directory_path, filename)
+            try:
+                live[file_key(os.stat(file_path))] = file_path
+            except FileNotFoundError:
+                continue
+
+        for key in list(self.files):
+            if key not in live:
+                self._close(key, forget=True)
+
+        if prune and self.checkpoint:
+            directory = os.path.abspath(self.directory_path)
+            for key in self.checkpoint.keys():
+                saved = self.checkpoint.get(key) or {}
+                saved_dir = os.path.dirname(os.path.abspath(saved.get("path", "")))
+                if key not in live and saved_dir == directory:
+                    self.checkpoint.delete(key)
+
+        for key, file_path in live.items():
+            if key not in self.files or self.files[key].path != file_path:
+                key = self._open(file_path)
+            if key:
+                yield from self.read(key)
+
+    def handle_events(self, events):
+        """Read only the files named by a batch of inotify events."""
+        moved_out, self.moved_out = self.moved_out, set()
+        for mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: fall back to a full rescan
+                yield from self.scan()
+                continue
+            file_path = os.path.join(self.directory_path, name)
+            if mask & IN_MOVED_FROM:
+                key = self.paths.pop(file_path, None)
+                if key:
+                    yield from self.read(key)
+                continue
+            if not name.endswith(".log"):
+                continue
+            if mask & IN_DELETE:
+                key = self.paths.get(file_path)
+                if key:
+                    yield from self.read(key)
+                    self._close(key, forget=True)
+            elif mask & (IN_CREATE | IN_MOVED_TO | IN_MODIFY):
+                key = self.paths.get(file_path)
+                if key is None or mask & (IN_CREATE | IN_MOVED_TO):
+                    key = self._open(file_path)
+                if key:
+                    yield from self.read(key)
+
+        # Files renamed to a non-.log name or moved out of the directory. The IN_MOVED_TO of a
+        # rename may only arrive with the next batch, so a key is forgotten once a whole batch
+        # went by without its file reappearing
+        for key, tailed in list(self.files.items()):
+            if self.paths.get(tailed.path) != key:
+                yield from self.read(key)
+                if key in moved_out:
+                    self._close(key, forget=True)
+                else:
+                    self.moved_out.add(key)
+
+    def close(self):
+        for key in list(self.files):
+            self._close(key)
+        if self.checkpoint:
+            self.checkpoint.flush()
+
+
+def tail_directory(directory_path, use_inotify=None, poll_interval=1, checkpoint=None):
+    """
+    Continuously tails all .log files in a directory.
+
+    On Linux an inotify watch is used so only files that actually changed are read;
+    elsewhere (or if inotify cannot be initialised) the directory is polled every
+    poll_interval seconds. Pass use_inotify=False to force polling.
+
+    Files are tracked by (device, inode). Without a checkpoint all existing lines
+    are yielded on startup; with one, only lines written after the stored offsets.
+    """
+    watcher = None
+    if use_inotify is not False:
+        try:
+            watcher = Inotify(directory_path)
+        except (OSError, AttributeError) as e:
+            if use_inotify:
+                raise
+            print(f"[dir_collector] inotify unavailable ({e}), falling back to polling")
+
+    tailer = DirectoryTailer(directory_path, checkpoint)
+    try:
+        # With inotify the watch is already active, so nothing appended during this pass is lost
+        yield from tailer.scan(prune=True)
+        while True:
+            if watcher:
+                yield from tailer.handle_events(watcher.read_events())
+            else:
+                time.sleep(poll_interval)
+                yield from tailer.scan()
+    finally:
+        tailer.close()
+        if watcher:
+            watcher.close()
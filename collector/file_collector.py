@@ -1,23 +1,69 @@
+import os
 import time, json
 
-def tail_file(filepath):
+from collector.checkpoint import file_key
+
+
+def tail_file(filepath, checkpoint=None):
     """
     Continuously read new lines from a log file and yield them as JSON.
+
+    The file is followed across rotations: when filepath starts pointing at a new
+    inode, the old one is read to EOF before switching over. With a checkpoint,
+    a restart resumes after the last line yielded instead of at the end of file.
     """
-    with open(filepath, "r") as f:
+    f = open(filepath, "rb")
+    key = file_key(os.fstat(f.fileno()))
+    saved = checkpoint.get(key) if checkpoint else None
+    if saved and saved.get("offset", 0) <= os.fstat(f.fileno()).st_size:
+        f.seek(saved["offset"])
+    else:
         f.seek(0, 2)  # go to end of file
+    partial = b""
+    try:
         while True:
-            line = f.readline()
-            if not line:
+            chunk = f.readline()
+            if chunk:
+                if not chunk.endswith(b"\n"):
+                    partial += chunk
+                    continue
+                line, partial = partial + chunk, b""
+                yield {
+                    "timestamp": time.time(),
+                    "source": filepath,
+                    "message": line.decode(errors="replace").strip()
+                }
+                if checkpoint:
+                    checkpoint.set(key, {"offset": f.tell(), "path": filepath})
+                continue
+
+            # At EOF: check whether the path was rotated to a new file
+            try:
+                current = os.stat(filepath)
+            except FileNotFoundError:
                 time.sleep(0.5)
                 continue
-            yield {
-                "timestamp": time.time(),
-                "source": filepath,
-                "message": line.strip()
-            }
+            if file_key(current) != key:
+                # The old inode has been read to EOF above, switch to the new file
+                f.close()
+                if checkpoint:
+                    checkpoint.delete(key)
+                f = open(filepath, "rb")
+                key = file_key(os.fstat(f.fileno()))
+                partial = b""
+                continue
+            if current.st_size < f.tell():
+                # Truncated in place
+                f.seek(0)
+                partial = b""
+                continue
+            time.sleep(0.5)
+    finally:
+        f.close()
+        if checkpoint:
+            checkpoint.flush()
 
 if __name__ == "__main__":
     # test with a sample file
     for log in tail_file("test.log"):
-        print(json.dumps(log, indent=2))
\ No newline at end of file
+        print(json.dumps(log, indent=2))
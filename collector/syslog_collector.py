@@ -0,0 +1,186 @@
+import re
+import time
+import asyncio
+from datetime import datetime
+
+# <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+RFC5424_PATTERN = re.compile(
+    r'^<(\d{1,3})>(\d{1,2}) (\S+) (\S+) (\S+) (\S+) (\S+) (-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (.*))?$',
+    re.DOTALL,
+)
+# Older BSD-style lines: <PRI>Mmm dd hh:mm:ss HOST TAG: MSG
+RFC3164_PATTERN = re.compile(r'^<(\d{1,3})>(\w{3} [ \d]\d \d{2}:\d{2}:\d{2}) (\S+) ([^:]+): ?(.*)$', re.DOTALL)
+OCTET_COUNT = re.compile(rb'(\d{1,10}) ')
+
+# Syslog severities 0-7 mapped onto the analyzer's levels
+SEVERITY_LEVELS = ["CRITICAL", "CRITICAL", "CRITICAL", "ERROR", "WARNING", "INFO", "INFO", "DEBUG"]
+
+FLUSH_SIZE = 500        # records per callback
+FLUSH_INTERVAL = 0.05   # seconds a partial UDP batch may wait
+MAX_FRAME = 64 * 1024   # longest TCP message: longer lines are truncated, larger octet counts drop the connection
+
+
+def parse_syslog_message(line):
+    """
+    Parse one RFC5424 (or RFC3164) syslog message into a log record with its level set.
+    """
+    line = line.rstrip("\r\n")
+    match = RFC5424_PATTERN.match(line)
+    if match:
+        pri, _, timestamp, hostname, app_name, _, _, _, message = match.groups()
+        try:
+            ts = datetime.fromisoformat(timestamp).timestamp() if timestamp != "-" else time.time()
+        except ValueError:
+            ts = time.time()
+        message = (message or "").lstrip("\ufeff")
+    else:
+        match = RFC3164_PATTERN.match(line)
+        if match:
+            pri, _, hostname, app_name, message = match.groups()
+        else:
+            pri_match = re.match(r'^<(\d{1,3})>', line)
+            pri = pri_match.group(1) if pri_match else "13"  # user.notice
+            hostname, app_name = "-", "-"
+            message = line[pri_match.end():] if pri_match else line
+        ts = time.time()
+    severity = int(pri) % 8
+    return {
+        "timestamp": ts,
+        "source": f"syslog:{hostname}/{app_name}",
+        "hostname": hostname,
+        "level": SEVERITY_LEVELS[severity],
+        "message": message.strip(),
+        "log_type": "syslog",
+    }
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, submit, stats):
+        self.submit = submit
+        self.stats = stats
+        self.batch = []
+        self.flush_handle = None
+
+    def datagram_received(self, data, addr):
+        self.batch.append(parse_syslog_message(data.decode(errors="replace")))
+        if len(self.batch) >= FLUSH_SIZE:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(FLUSH_INTERVAL, self.flush)
+
+    def flush(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.batch = self.batch, []
+        if batch:
+            asyncio.ensure_future(self._submit(batch))
+
+    async def _submit(self, batch):
+        # UDP has no flow control: when the pipeline is full the batch is dropped
+        if await asyncio.get_running_loop().run_in_executor(None, self.submit, batch):
+            self.stats["received"] += len(batch)
+        else:
+            self.stats["dropped"] += len(batch)
+
+
+async def _handle_tcp(reader, writer, submit, stats):
+    """
+    RFC6587 framing: octet-counted ("<len> <msg>") or newline-delimited messages.
+    Reading stops while a batch waits to be enqueued, so TCP flow control pushes back on the sender.
+    At most MAX_FRAME bytes of a message are buffered.
+    """
+    buffer = b""
+    discarding = False  # skipping the rest of a truncated line
+    try:
+        while True:
+            data = await reader.read(64 * 1024)
+            if not data:
+                break
+            buffer += data
+            batch = []
+            pos = 0
+            oversized = False
+            while pos < len(buffer):
+                if discarding:
+                    newline = buffer.find(b"\n", pos)
+                    if newline == -1:
+                        pos = len(buffer)
+                        break
+                    pos, discarding = newline + 1, False
+                    continue
+                counted = OCTET_COUNT.match(buffer, pos)
+                if counted:
+                    length = int(counted.group(1))
+                    if length > MAX_FRAME:
+                        oversized = True
+                        break
+                    start = counted.end()
+                    end = start + length
+                    if len(buffer) < end:
+                        break
+                    frame, pos = buffer[start:end], end
+                else:
+                    newline = buffer.find(b"\n", pos, pos + MAX_FRAME + 1)
+                    if newline == -1:
+                        if len(buffer) - pos <= MAX_FRAME:
+                            break
+                        # Line too long: keep its first MAX_FRAME bytes, skip to the next newline
+                        frame, pos, discarding = buffer[pos:pos + MAX_FRAME], pos + MAX_FRAME, True
+                        stats["truncated"] = stats.get("truncated", 0) + 1
+                    else:
+                        frame, pos = buffer[pos:newline], newline + 1
+                if frame.strip():
+                    batch.append(parse_syslog_message(frame.decode(errors="replace")))
+            buffer = buffer[pos:]
+            for i in range(0, len(batch), FLUSH_SIZE):
+                chunk = batch[i:i + FLUSH_SIZE]
+                while not await asyncio.get_running_loop().run_in_executor(None, submit, chunk):
+                    await asyncio.sleep(0.1)
+                stats["received"] += len(chunk)
+            if oversized:
+                print(f"[Syslog] Octet count above {MAX_FRAME} bytes, closing the connection")
+                stats["rejected"] = stats.get("rejected", 0) + 1
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_syslog(submit, host="0.0.0.0", udp_port=5514, tcp_port=5514, stats=None):
+    """
+    Run RFC5424 syslog listeners on UDP and TCP (port None disables one).
+
+    submit(records) is called from a worker thread with batches of parsed records and
+    must return True once they are enqueued (False if the queue is full).
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("received", 0)
+    stats.setdefault("dropped", 0)
+    loop = asyncio.get_running_loop()
+    transport = None
+    server = None
+    if udp_port:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProtocol(submit, stats), local_addr=(host, udp_port)
+        )
+        print(f"[Syslog] Listening on udp://{host}:{udp_port}")
+    if tcp_port:
+        server = await asyncio.start_server(
+            lambda r, w: _handle_tcp(r, w, submit, stats), host, tcp_port
+        )
+        print(f"[Syslog] Listening on tcp://{host}:{tcp_port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if transport:
+            transport.close()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+
+def run_syslog_server(submit, host="0.0.0.0", udp_port=5514, tcp_port=5514, stats=None):
+    """Blocking entry point for a background thread."""
+    asyncio.run(serve_syslog(submit, host, udp_port, tcp_port, stats))
@@ -5,6 +5,18 @@ import subprocess
 import platform
 import threading
 
+from processor.matcher import KeywordMatcher
+
+# Level keywords (substrings, case-insensitive), all found in one pass over the message
+LEVEL_KEYWORDS = {
+    "CRITICAL": ["critical", "fatal", "panic", "emergency"],
+    "ERROR": ["error", "err", "failed", "failure", "exception"],
+    "WARNING": ["warn", "warning", "caution"],
+    "DEBUG": ["debug", "trace"],
+}
+LEVEL_PRECEDENCE = ("CRITICAL", "ERROR", "WARNING", "DEBUG")
+LEVEL_MATCHER = KeywordMatcher(LEVEL_KEYWORDS)
+
 def parse_system_log_line(line):
     # Handle different log formats
     
@@ -52,18 +64,12 @@ def parse_system_log_line(line):
     }
 
 def detect_log_level(message):
-    """Detect log level from message content"""
-    message_lower = message.lower()
-    if any(word in message_lower for word in ["critical", "fatal", "panic", "emergency"]):
-        return "CRITICAL"
-    elif any(word in message_lower for word in ["error", "err", "failed", "failure", "exception"]):
-        return "ERROR"
-    elif any(word in message_lower for word in ["warn", "warning", "caution"]):
-        return "WARNING"
-    elif any(word in message_lower for word in ["debug", "trace"]):
-        return "DEBUG"
-    else:
-        return "INFO"
+    """Detect log level from message content: the most severe level with a keyword in it"""
+    found = LEVEL_MATCHER.labels(message)
+    for level in LEVEL_PRECEDENCE:
+        if level in found:
+            return level
+    return "INFO"
 
 def generate_mock_system_logs(callback=None, stop_event=None):
     """Generate mock system logs for demonstration purposes"""
@@ -1,10 +1,11 @@
 import React, { useEffect, useState } from 'react';
-import { Bar } from 'react-chartjs-2';
+import { Line } from 'react-chartjs-2';
 import {
   Chart as ChartJS,
   CategoryScale,
   LinearScale,
-  BarElement,
+  PointElement,
+  LineElement,
   Title,
   Tooltip,
   Legend
@@ -12,44 +13,46 @@ import {
 import config from './config';
 import './App.css';
 
-ChartJS.register(CategoryScale, LinearScale, BarElement, Title, Tooltip, Legend);
+ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
+
+const LEVEL_COLORS = { INFO: '#2980b9', WARNING: '#f39c12', ERROR: '#e74c3c', CRITICAL: '#8e44ad' };
 
 function LogChart({ sourceKey }) {
-  const [counts, setCounts] = useState({});
+  const [timeseries, setTimeseries] = useState({ timestamps: [], series: {} });
   const [loading, setLoading] = useState(true);
   useEffect(() => {
-    setCounts({}); // Reset chart on source change
+    setTimeseries({ timestamps: [], series: {} }); // Reset chart on source change
     setLoading(true);
     const interval = setInterval(() => {
-      fetch(`${config.API_BASE_URL}/api/anomalies`, { credentials: 'include' })
+      fetch(`${config.API_BASE_URL}/api/timeseries?timeframe=5m&step=10`, { credentials: 'include' })
         .then(res => res.json())
         .then(data => {
-          setCounts(data.counts || {});
+          setTimeseries({ timestamps: data.timestamps || [], series: data.series || {} });
           setLoading(false);
         })
         .catch(() => {
-          setCounts({});
+          setTimeseries({ timestamps: [], series: {} });
           setLoading(false);
         });
     }, 2000);
     return () => clearInterval(interval);
   }, [sourceKey]);
   const data = {
-    labels: Object.keys(counts),
-    datasets: [{
-      label: 'Log Levels',
-      data: Object.values(counts),
-      backgroundColor: ['#2980b9', '#f39c12', '#e74c3c', '#8e44ad', '#16a085'],
-      borderRadius: 8,
-      barPercentage: 0.6,
-      categoryPercentage: 0.6
-    }]
+    labels: timeseries.timestamps.map(t => new Date(t * 1000).toLocaleTimeString()),
+    datasets: Object.entries(timeseries.series).map(([level, values]) => ({
+      label: level,
+      data: values,
+      borderColor: LEVEL_COLORS[level] || '#16a085',
+      backgroundColor: LEVEL_COLORS[level] || '#16a085',
+      pointRadius: 0,
+      tension: 0.3
+    }))
   };
   const options = {
     responsive: true,
     plugins: {
       legend: { position: 'top', labels: { font: { size: 15, family: 'Inter, Segoe UI, Arial, sans-serif' } } },
-      title: { display: true, text: 'Log Level Counts (Last 60s)', font: { size: 18, weight: 'bold', family: 'Inter, Segoe UI, Arial, sans-serif' } }
+      title: { display: true, text: 'Logs per Level (Last 5 min)', font: { size: 18, weight: 'bold', family: 'Inter, Segoe UI, Arial, sans-serif' } }
     },
     scales: {
       x: { ticks: { font: { size: 14, family: 'Inter, Segoe UI, Arial, sans-serif' } } },
@@ -58,7 +61,7 @@ function LogChart({ sourceKey }) {
   };
   return (
     <div className="card">
-      {loading ? <div>Waiting for chart data...</div> : <Bar data={data} options={options} />}
+      {loading ? <div>Waiting for chart data...</div> : <Line data={data} options={options} />}
     </div>
   );
 }
@@ -109,10 +109,21 @@ import threading
 import time
 import os
 import secrets
-from collector import dir_collector, cloudwatch_collector, api_collector, system_collector
+import zlib
+import queue
+import asyncio
+from collector import dir_collector, cloudwatch_collector, api_collector, system_collector, backfill, syslog_collector
+from collector.checkpoint import Checkpoint
 from processor import parser
+from processor.pipeline import Pipeline
+from processor.template_miner import TemplateMiner
+from processor.matcher import ReloadingMatcher
+from processor.record import LogRecord
 from intelligence.analyzer import LogAnalyzer
-from db import Log, SessionLocal
+from intelligence.llm_cache import ResponseCache
+from intelligence.embeddings import EmbeddingService, EmbeddingStore
+from intelligence.vector_index import VectorIndex
+from db import Log, LogVector, SessionLocal
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
@@ -142,7 +153,6 @@ app.add_middleware(
 
 # Shared state for logs and analysis
 dashboard_logs = []
-dashboard_analysis = {"counts": {}, "anomalies": []}
 # State for API source warnings
 api_source_warning = ""
 # System log collection state
@@ -151,14 +161,56 @@ system_log_thread = None
 
 # Initialize analyzer with Bedrock configuration
 bedrock_config = config.get("bedrock", {})
+analyzer_config = config.get("analyzer", {})
+cache_config = bedrock_config.get("cache", {})
+# Model responses keyed by (model, prompt): the AI endpoints polled by every open tab
+# re-send identical window summaries, which then cost no model call
+llm_cache = ResponseCache(
+    max_entries=cache_config.get("max_entries", 1000),
+    ttl=cache_config.get("ttl", 300),
+    path=cache_config.get("path")
+)
+template_config = config.get("templates", {})
+template_miner = TemplateMiner(
+    path=template_config.get("path", "log_templates.json"),
+    depth=template_config.get("depth", 4),
+    sim_threshold=template_config.get("sim_threshold", 0.4),
+    max_templates=template_config.get("max_templates", 5000)
+)
+embedding_config = bedrock_config.get("embeddings", {})
+# Titan vectors, deduplicated by text and template and kept in a memory-mapped float32 file
+embedding_service = EmbeddingService(
+    EmbeddingStore(embedding_config.get("path", "embedding_cache"), max_rows=embedding_config.get("max_rows", 100000)),
+    max_concurrency=embedding_config.get("max_concurrency", 4),
+    rate_limit=embedding_config.get("rate_limit", 10.0),
+    templates=template_miner.template
+)
+# Event-time windowing: sliding window, tumbling interval and how late a record may arrive;
+# detectors: DetectorBank settings (interval, per-detector parameters, state file);
+# rules: anomaly rules (intelligence.rules), the built-in defaults when not configured;
+# tick_seconds: how often the analysis snapshot served to the API and alerts is refreshed
+analyzer_settings = {
+    "window_seconds": analyzer_config.get("window_seconds", 60),
+    "tumbling_seconds": analyzer_config.get("tumbling_seconds", 60),
+    "allowed_lateness": analyzer_config.get("allowed_lateness", 10),
+    "tick_seconds": analyzer_config.get("tick_seconds", 1.0),
+    "detectors": {"path": "detector_state.json", **analyzer_config.get("detectors", {})},
+    "rules": config.get("rules"),
+    "llm_cache": llm_cache,
+    "embeddings": embedding_service,
+}
 analyzer = LogAnalyzer(
-    window_seconds=60,
     enable_bedrock=bedrock_config.get("enabled", False),
-    aws_region=bedrock_config.get("region", "ap-south-1")
+    aws_region=bedrock_config.get("region", "ap-south-1"),
+    **analyzer_settings
 )
 
 log_source = config.get("log_source", {"type": "local", "group": None, "stream": None, "region": None, "api_url": None})
 log_thread = None
+# Byte offsets of the files under logs/, keyed by (device, inode)
+log_offsets = Checkpoint(config.get("offsets_file", "log_offsets.json"))
+# CloudWatch forward tokens per stream
+cloudwatch_tokens = Checkpoint(config.get("cloudwatch_tokens_file", "cloudwatch_tokens.json"))
 
 SESSION_COOKIE = "session_id"
 # User store with roles
@@ -168,6 +220,105 @@ USERS = {
 }
 SESSIONS = {}  # session_id -> username
 
+# ==========================================
+# INGESTION PIPELINE
+# ==========================================
+# collect -> parse -> enrich -> analyze -> persist / alert, connected by bounded queues.
+# Every source (directory tail, CloudWatch, API, system logs, push ingestion) submits raw
+# records here instead of running the stages itself.
+
+def parse_stage(raw_logs):
+    # System logs and syslog arrive already parsed at the source
+    unparsed = [i for i, raw_log in enumerate(raw_logs) if "level" not in raw_log]
+    rows = line_parser.parse([raw_logs[i]["message"] for i in unparsed])
+    # From here on records are compact LogRecords rather than dicts
+    parsed_logs = [LogRecord.from_dict(raw_log) for raw_log in raw_logs]
+    for i, row in zip(unparsed, rows):
+        parsed_logs[i].update(parser.row_to_dict(row))
+    return parsed_logs
+
+def enrich_stage(parsed_logs):
+    for parsed_log in parsed_logs:
+        # System log timestamps arrive as strings; use receive time for now
+        if not isinstance(parsed_log.get("timestamp"), (int, float)):
+            parsed_log["timestamp"] = time.time()
+        message = str(parsed_log.get("message", ""))
+        parsed_log["template_id"], parsed_log["params"] = template_miner.add(message)
+        watched = watch_matcher.labels(message)
+        if watched:
+            parsed_log["watch"] = sorted(watched)
+    return parsed_logs
+
+def analyze_stage(parsed_logs):
+    analyzer.add_logs(parsed_logs)
+    dashboard_logs.extend(parsed_logs[-100:])
+    del dashboard_logs[:-100]
+    # Publishes a new snapshot only when the tick is due or an anomaly appeared or cleared
+    analyzer.tick()
+    return parsed_logs
+
+def persist_stage(parsed_logs):
+    # Raising fails the batch, so acknowledged submits (backfill) learn it was not stored
+    if not save_logs_to_db(parsed_logs):
+        raise RuntimeError("logs were not stored")
+    queue_semantic_indexing(parsed_logs)
+
+alert_lock = threading.Lock()
+
+def alert_stage(parsed_logs):
+    with alert_lock:
+        check_alerts(parsed_logs)
+
+def check_alerts(parsed_logs):
+    # Snapshot and alert cursors of the same analyzer (the Bedrock toggle may replace it)
+    current = analyzer
+    analysis = current.snapshot
+    error_count = analysis['counts'].get('ERROR', 0)
+    critical_count = analysis['counts'].get('CRITICAL', 0)
+    # Alert on new detector findings (spikes relative to each service's own baseline)
+    # and on rules that became active since the last alert
+    detections = [d for d in analysis.get("detections", []) if d["id"] > current.alerted_detection]
+    rules = [r for r in analysis.get("rules", []) if r["activation"] > current.alerted_rule]
+    if not detections and not rules:
+        return
+    if detections:
+        current.alerted_detection = detections[-1]["id"]
+    if rules:
+        current.alerted_rule = max(r["activation"] for r in rules)
+    findings = "\n".join([d["message"] for d in detections] + [r["message"] for r in rules])
+    if any(parsed_log.get("log_type") == "system" for parsed_log in parsed_logs):
+        alert_msg = f"System log anomaly:\n{findings}\nCounts: ERROR={error_count}, CRITICAL={critical_count}"
+        send_slack_alert(alert_msg)
+    elif log_source["type"] in ("cloudwatch", "api"):
+        send_email_alert(
+            subject="Log Anomaly Detected!",
+            body=f"{findings}\n\nCounts in the last {analyzer.window_seconds} seconds: ERROR={error_count}, CRITICAL={critical_count}"
+        )
+    else:
+        alert_msg = f"{findings}\nCounts in the last {analyzer.window_seconds} seconds: ERROR={error_count}, CRITICAL={critical_count}"
+        send_slack_alert(alert_msg)
+
+watch_config = config.get("watch", {})
+# User-defined watch phrases (label -> phrases), found in one pass per message and
+# recompiled when the file changes; matching records carry the labels in "watch"
+watch_matcher = ReloadingMatcher(
+    watch_config.get("path", "watch_patterns.yaml"),
+    keywords=watch_config.get("patterns"),
+    check_interval=watch_config.get("check_interval", 5.0),
+    whole_words=watch_config.get("whole_words", False)
+)
+
+pipeline_config = config.get("pipeline", {})
+# Large batches (bulk pushes, backfill bursts) are parsed across processes
+line_parser = parser.ParallelParser(workers=pipeline_config.get("parse_workers", 1))
+pipeline = Pipeline(
+    parse_stage, enrich_stage, analyze_stage, persist_stage, alert_stage,
+    queue_size=pipeline_config.get("queue_size", 1000),
+    batch_size=pipeline_config.get("batch_size", 500),
+    batch_timeout=pipeline_config.get("batch_timeout", 0.05),
+    persist_workers=pipeline_config.get("persist_workers", 2)
+)
+
 # Helper to start the correct log collector thread
 def start_log_collector():
     global log_thread
@@ -176,114 +327,54 @@ def start_log_collector():
         print("[DEBUG] Log collector thread already running.")
         return
     def collector():
-        global dashboard_analysis
         dashboard_logs.clear()
-        analyzer.logs.clear()
+        analyzer.clear()
         if log_source["type"] == "local":
             print("[DEBUG] Local log collector started.")
-            # One-time batch load of all existing log lines
-            import os
-            for filename in os.listdir("logs"):
-                if not filename.endswith(".log"):
-                    continue
-                file_path = os.path.join("logs", filename)
-                with open(file_path, "r") as f:
-                    for line in f:
-                        raw_log = {
-                            "timestamp": time.time(),
-                            "source": file_path,
-                            "message": line.strip(),
-                        }
-                        parsed_log = parser.parse_log(raw_log["message"])
-                        parsed_log.update(raw_log)
-                        dashboard_logs.append(parsed_log)
-                        if len(dashboard_logs) > 100:
-                            dashboard_logs.pop(0)
-                        analyzer.add_log(parsed_log)
-                        save_log_to_db(parsed_log)
-            dashboard_analysis = analyzer.analyze()
-            print(f"[DEBUG] Initial dashboard_analysis: {dashboard_analysis}")
-            # Now tail new lines as before
-            for raw_log in dir_collector.tail_directory("logs"):
-                print(f"[DEBUG] Processing log: {raw_log}")
-                parsed_log = parser.parse_log(raw_log["message"])
-                parsed_log.update(raw_log)
-                dashboard_logs.append(parsed_log)
-                if len(dashboard_logs) > 100:
-                    dashboard_logs.pop(0)
-                analyzer.add_log(parsed_log)
-                save_log_to_db(parsed_log)
-                dashboard_analysis = analyzer.analyze()
-                print(f"[DEBUG] Updated dashboard_analysis: {dashboard_analysis}")
-                # --- ALERTING LOGIC START ---
-                error_count = dashboard_analysis['counts'].get('ERROR', 0)
-                critical_count = dashboard_analysis['counts'].get('CRITICAL', 0)
-                if error_count + critical_count > 5:
-                    alert_msg = f"More than 5 ERROR/CRITICAL logs detected in the last 60 seconds.\nCounts: ERROR={error_count}, CRITICAL={critical_count}"
-                    send_slack_alert(alert_msg)
-                # --- ALERTING LOGIC END ---
+            # Bulk-load whatever is not covered by the checkpoint yet (everything on first run);
+            # a file's offset is only committed once the persist stage stored all of its records
+            backfill.backfill_directory(
+                "logs", lambda batch, done: pipeline.submit(batch, source="backfill", done=done),
+                checkpoint=log_offsets, acknowledge=True
+            )
+            # Existing lines are only read once: offsets are checkpointed per (device, inode),
+            # so tailing resumes right after the backfill (or the last line already stored).
+            pipeline.run_source("local", dir_collector.tail_directory("logs", checkpoint=log_offsets))
         elif log_source["type"] == "cloudwatch":
-            for raw_log in cloudwatch_collector.cloudwatch_logs(
-                log_source["group"], log_source["stream"], log_source["region"] or "us-east-1"
-            ):
-                parsed_log = parser.parse_log(raw_log["message"])
-                parsed_log.update(raw_log)
-                dashboard_logs.append(parsed_log)
-                if len(dashboard_logs) > 100:
-                    dashboard_logs.pop(0)
-                analyzer.add_log(parsed_log)
-                save_log_to_db(parsed_log)
-                dashboard_analysis = analyzer.analyze()
-                # --- ALERTING LOGIC START ---
-                error_count = dashboard_analysis['counts'].get('ERROR', 0)
-                critical_count = dashboard_analysis['counts'].get('CRITICAL', 0)
-                if error_count + critical_count > 5:
-                    send_email_alert(
-                        subject="Log Anomaly Detected!",
-                        body=f"More than 5 ERROR/CRITICAL logs detected in the last 60 seconds.\n\nCounts: ERROR={error_count}, CRITICAL={critical_count}"
-                    )
-                # --- ALERTING LOGIC END ---
+            region = log_source["region"] or "us-east-1"
+            # Without a configured stream, every active stream of the group is followed
+            stream_names = [log_source["stream"]] if log_source.get("stream") else None
+            cloudwatch_iter = cloudwatch_collector.cloudwatch_group_logs(
+                log_source["group"], region, checkpoint=cloudwatch_tokens, stream_names=stream_names
+            )
+            pipeline.run_source("cloudwatch", cloudwatch_iter)
         elif log_source["type"] == "api":
             print(f"[DEBUG] Fetching logs from API: {log_source['api_url']}")
-            global api_source_warning
-            empty_count = 0
-            for raw_log in api_collector.fetch_logs_from_api(log_source["api_url"]):
-                if raw_log is None or raw_log.get("message", "") == "":
-                    empty_count += 1
-                    if empty_count >= 5:
-                        warning_msg = "API source has returned no logs for 5 consecutive polls. Check API availability or configuration."
-                        print(f"[WARNING] {warning_msg}")
-                        api_source_warning = warning_msg
-                        empty_count = 0
-                    continue
-                else:
-                    empty_count = 0
-                    api_source_warning = ""
-                print(f"[DEBUG] Raw log from API: {raw_log}")
-                parsed_log = parser.parse_log(raw_log["message"])
-                print(f"[DEBUG] Parsed log: {parsed_log}")
-                parsed_log.update(raw_log)
-                dashboard_logs.append(parsed_log)
-                if len(dashboard_logs) > 100:
-                    dashboard_logs.pop(0)
-                analyzer.add_log(parsed_log)
-                save_log_to_db(parsed_log)
-                dashboard_analysis = analyzer.analyze()
-                # --- ALERTING LOGIC START ---
-                error_count = dashboard_analysis['counts'].get('ERROR', 0)
-                critical_count = dashboard_analysis['counts'].get('CRITICAL', 0)
-                if error_count + critical_count > 5:
-                    send_email_alert(
-                        subject="Log Anomaly Detected!",
-                        body=f"More than 5 ERROR/CRITICAL logs detected in the last 60 seconds.\n\nCounts: ERROR={error_count}, CRITICAL={critical_count}"
-                    )
-                # --- ALERTING LOGIC END ---
-                # --- ALERTING LOGIC END ---
+            # One pooled async client follows every configured endpoint
+            api_urls = log_source.get("api_urls") or [log_source["api_url"]]
+            pipeline.run_source("api", watch_api_logs(api_collector.fetch_logs_from_apis(api_urls)))
     
     log_thread = threading.Thread(target=collector, daemon=True)
     log_thread.start()
     print("[DEBUG] Log collector thread started.")
 
+def watch_api_logs(log_iter):
+    """Pass API records through, raising a warning after 5 consecutive empty polls."""
+    global api_source_warning
+    empty_count = 0
+    for raw_log in log_iter:
+        if raw_log is None or raw_log.get("message", "") == "":
+            empty_count += 1
+            if empty_count >= 5:
+                warning_msg = "API source has returned no logs for 5 consecutive polls. Check API availability or configuration."
+                print(f"[WARNING] {warning_msg}")
+                api_source_warning = warning_msg
+                empty_count = 0
+            continue
+        empty_count = 0
+        api_source_warning = ""
+        yield raw_log
+
 # System log collection state
 system_log_stop_event = None
 
@@ -299,29 +390,7 @@ def start_system_log_collector():
     system_log_stop_event = threading.Event()
     
     def system_log_callback(parsed_log):
-        global dashboard_analysis
-        # Add timestamp conversion for system logs
-        if parsed_log.get('timestamp') and isinstance(parsed_log['timestamp'], str):
-            parsed_log['timestamp'] = time.time()  # Use current time for now
-        
-        # Add to dashboard logs
-        dashboard_logs.append(parsed_log)
-        if len(dashboard_logs) > 100:
-            dashboard_logs.pop(0)
-        
-        # Add to analyzer
-        analyzer.add_log(parsed_log)
-        save_log_to_db(parsed_log)
-        
-        # Update analysis
-        dashboard_analysis = analyzer.analyze()
-        
-        # Alert on system errors
-        error_count = dashboard_analysis['counts'].get('ERROR', 0)
-        critical_count = dashboard_analysis['counts'].get('CRITICAL', 0)
-        if error_count + critical_count > 5:
-            alert_msg = f"System log anomaly: More than 5 ERROR/CRITICAL logs detected.\nCounts: ERROR={error_count}, CRITICAL={critical_count}"
-            send_slack_alert(alert_msg)
+        pipeline.submit([parsed_log], source="system")
     
     def system_log_worker():
         try:
@@ -420,11 +489,11 @@ def dashboard(request: Request):
 
 @app.get("/api/logs")
 def get_logs():
-    return JSONResponse(dashboard_logs[-50:])
+    return JSONResponse([log.to_dict() for log in dashboard_logs[-50:]])
 
 @app.get("/api/anomalies")
 def get_anomalies():
-    return JSONResponse(dashboard_analysis)
+    return JSONResponse(dict(analyzer.snapshot))
 
 @app.get("/api/source")
 def get_source():
@@ -479,33 +548,22 @@ def get_db_logs(
     finally:
         db.close()
 
+def _db_row(parsed_log):
+    # The parser has already pulled the fields out of JSON and plain-text lines
+    return {
+        "timestamp": parsed_log.get('timestamp'),
+        "level": parsed_log.get('level'),
+        "message": parsed_log.get('message'),
+        "user_id": parsed_log.get('user_id'),
+        "service_id": parsed_log.get('service_id'),
+        "request_id": parsed_log.get('request_id'),
+        "source": parsed_log.get('source')
+    }
+
 def save_log_to_db(parsed_log):
     db = SessionLocal()
     try:
-        # Handle both JSON and plain text logs
-        user_id = parsed_log.get('user_id')
-        service_id = parsed_log.get('service_id')
-        request_id = parsed_log.get('request_id')
-        # Try to extract from JSON message if not present
-        try:
-            import json
-            msg_obj = json.loads(parsed_log.get('message', ''))
-            if isinstance(msg_obj, dict):
-                user_id = user_id or msg_obj.get('user_id')
-                service_id = service_id or msg_obj.get('service_id')
-                request_id = request_id or msg_obj.get('request_id')
-        except Exception:
-            pass
-        db_log = Log(
-            timestamp=parsed_log.get('timestamp'),
-            level=parsed_log.get('level'),
-            message=parsed_log.get('message'),
-            user_id=user_id,
-            service_id=service_id,
-            request_id=request_id,
-            source=parsed_log.get('source')
-        )
-        db.add(db_log)
+        db.add(Log(**_db_row(parsed_log)))
         db.commit()
     except SQLAlchemyError as e:
         db.rollback()
@@ -513,6 +571,22 @@ def save_log_to_db(parsed_log):
     finally:
         db.close()
 
+def save_logs_to_db(parsed_logs):
+    """Insert a batch of logs with one session and a single commit; returns False on a DB error."""
+    if not parsed_logs:
+        return True
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(Log, [_db_row(parsed_log) for parsed_log in parsed_logs])
+        db.commit()
+        return True
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"DB error: {e}")
+        return False
+    finally:
+        db.close()
+
 @app.delete("/logs/{log_id}")
 @require_role("admin")
 def delete_log(log_id: int, session_id: str = Cookie(None)):
@@ -578,7 +652,15 @@ def get_bedrock_status():
         "available": analyzer.bedrock_client is not None,
         "region": bedrock_config.get("region", "ap-south-1"),
         "models": bedrock_config.get("models", {}),
-        "last_analysis": getattr(analyzer, 'last_bedrock_analysis', 0)
+        "last_analysis": getattr(analyzer, 'last_bedrock_analysis', 0),
+        # Background round: in flight, rounds completed, last start/finish and duration
+        "worker": analyzer.bedrock_worker.status(),
+        # Response cache size, hits, misses, evictions and hit rate
+        "cache": llm_cache.stats(),
+        "embeddings": embedding_service.stats(),
+        # Insights/predictions computed vs served stale while refreshing
+        "insights": analyzer.insights.stats(),
+        "predictions": analyzer.predictions.stats()
     }
 
 @app.get("/api/bedrock/insights")
@@ -599,11 +681,13 @@ def toggle_bedrock_analysis(data: dict = Body(...)):
     
     try:
         if enabled and not analyzer.enable_bedrock:
-            # Re-initialize with Bedrock enabled
+            # Re-initialize with Bedrock enabled; the new detectors load the current state
+            # (and next detection id) from disk, so write it out first
+            analyzer.detectors.save()
             analyzer = LogAnalyzer(
-                window_seconds=60,
                 enable_bedrock=True,
-                aws_region=bedrock_config.get("region", "us-east-1")
+                aws_region=bedrock_config.get("region", "us-east-1"),
+                **analyzer_settings
             )
             message = "Bedrock analysis enabled"
         elif not enabled and analyzer.enable_bedrock:
@@ -629,26 +713,364 @@ def toggle_bedrock_analysis(data: dict = Body(...)):
 
 @app.get("/api/bedrock/predictions")
 def get_ai_predictions():
-    """Get AI predictions about potential system issues"""
-    if not analyzer.enable_bedrock or not analyzer.bedrock_client:
-        return {"error": "Bedrock not available"}
-    
+    """Get AI predictions about potential system issues (shared by concurrent requests)"""
+    return analyzer.predict_issues()
+
+# ==========================================
+# PUSH INGESTION (bulk HTTP, syslog)
+# ==========================================
+
+ingest_config = config.get("ingest", {})
+ingest_stats = {"accepted": 0, "rejected": 0}
+syslog_stats = {}
+
+def submit_logs(raw_logs, timeout=1.0, source="push"):
+    """Enqueue a batch of pushed records. Returns False if the pipeline stayed full for timeout seconds."""
+    if not pipeline.submit(raw_logs, source=source, timeout=timeout):
+        ingest_stats["rejected"] += len(raw_logs)
+        return False
+    ingest_stats["accepted"] += len(raw_logs)
+    return True
+
+@app.post("/api/ingest")
+async def ingest_logs(request: Request, source: Optional[str] = Query(None, description="Source name for these logs")):
+    """
+    Accept a batch of newline-delimited logs (plain lines or JSON objects), optionally gzip-compressed.
+    Returns once the whole batch is enqueued; 503 with Retry-After when the ingest queue is full,
+    413 when the body, compressed or not, exceeds ingest.max_body_bytes.
+    """
+    max_body = ingest_config.get("max_body_bytes", 16 * 1024 * 1024)
+    too_large = HTTPException(status_code=413, detail=f"Body larger than {max_body} bytes")
+    if int(request.headers.get("content-length") or 0) > max_body:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_body:
+            raise too_large
+    body = bytes(body)
+    if request.headers.get("content-encoding", "").lower() == "gzip" or body[:2] == b"\x1f\x8b":
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(body, max_body)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip body")
+        if inflater.unconsumed_tail:
+            raise too_large
+        if not inflater.eof:
+            raise HTTPException(status_code=400, detail="Truncated gzip body")
+    now = time.time()
+    source = source or f"ingest:{request.client.host if request.client else 'unknown'}"
+    raw_logs = [
+        {"timestamp": now, "source": source, "message": line.strip()}
+        for line in body.decode(errors="replace").splitlines()
+        if line.strip()
+    ]
+    if not raw_logs:
+        return {"accepted": 0}
+    # When the pipeline falls behind, producers are refused instead of buffering forever
+    if not await asyncio.to_thread(submit_logs, raw_logs, ingest_config.get("enqueue_timeout", 5.0), "ingest"):
+        raise HTTPException(status_code=503, detail="Ingest queue full", headers={"Retry-After": "1"})
+    return {"accepted": len(raw_logs)}
+
+@app.get("/api/ingest/status")
+def get_ingest_status():
+    return {
+        **ingest_stats,
+        "queued_batches": pipeline.parse.queue.qsize(),
+        "syslog": syslog_stats if syslog_config.get("enabled") else None
+    }
+
+@app.get("/api/pipeline/stats")
+def get_pipeline_stats():
+    """Per-stage queue depth, throughput and latency of the ingestion pipeline"""
+    return pipeline.stats()
+
+@app.get("/api/templates")
+def get_templates(limit: int = Query(50, ge=1, le=1000)):
+    """Message templates mined at ingest, most frequent first"""
+    return {"total": len(template_miner), "templates": template_miner.templates(limit)}
+
+@app.get("/api/templates/window")
+def get_window_templates(
+    level: Optional[str] = Query(None, description="Only records of this level, e.g. ERROR"),
+    k: int = Query(10, ge=1, le=100)
+):
+    """Templates most frequent within the analyzer window, from its per-record columns"""
+    top = analyzer.window_templates(level.upper() if level else None, k)
+    for entry in top:
+        entry["template"] = template_miner.template(entry["template_id"])
+    return {"level": level, "window_seconds": analyzer.window_seconds, "templates": top}
+
+@app.get("/api/timeseries")
+def get_timeseries(
+    timeframe: str = Query("5m", description="Range ending now, e.g. 1m, 15m, 1h, 6h, 24h, 7d"),
+    group: str = Query("level", description="Series per 'level' or per 'service'"),
+    step: Optional[int] = Query(None, description="Bucket seconds, a multiple of 1, 60, 3600 or 86400 (default: finest that fits)")
+):
+    """Log counts over time for charts, from the analyzer's multi-resolution rollups"""
     try:
-        logs_list = list(analyzer.logs)
-        predictions = analyzer.bedrock_client.predict_system_issues(logs_list)
-        return predictions
+        return analyzer.timeseries(timeframe, group, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/sketches")
+def get_sketches(
+    level: Optional[str] = Query(None, description="Only records of this level, e.g. ERROR"),
+    k: int = Query(10, ge=1, le=100)
+):
+    """Top services, users and sources and distinct users/request ids over the analyzer window"""
+    now = analyzer.window.now()
+    summary = analyzer.sketches.summary(now, level.upper() if level else None, k)
+    summary.update({"level": level, "window_seconds": analyzer.window_seconds})
+    return summary
+
+@app.get("/api/sketches/estimate")
+def get_sketch_estimate(
+    dimension: str = Query(..., description="service_id, user_id or source"),
+    value: str = Query(...),
+    level: Optional[str] = Query(None)
+):
+    """Approximate number of records in the window with dimension == value (never underestimated)"""
+    try:
+        count = analyzer.sketches.estimate(dimension, value, analyzer.window.now(), level.upper() if level else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"dimension": dimension, "value": value, "level": level, "count": count}
+
+@app.get("/api/detections")
+def get_detections(since: Optional[float] = Query(None, description="Only intervals starting at or after this epoch time")):
+    """Recent findings of the streaming anomaly detectors, oldest first"""
+    bank = analyzer.detectors
+    return {
+        "interval_seconds": bank.interval,
+        "detectors": sorted(bank.detector_config),
+        "detections": bank.recent(since),
+    }
+
+@app.get("/api/rules")
+def get_rules():
+    """Configured anomaly rules with their current state"""
+    return {"rules": analyzer.rules.states()}
+
+@app.get("/api/windows")
+def get_windows():
+    """Closed tumbling windows (per-level counts) and the analyzer's event clock"""
+    closed = analyzer.tumbling_windows()
+    window = analyzer.window
+    return {
+        "event_time": window.now(),
+        "watermark": window.watermark(),
+        "tumbling_seconds": window.tumbling_seconds,
+        "allowed_lateness": window.allowed_lateness,
+        "late_logs": window.late,
+        "dropped_logs": window.dropped,
+        "windows": closed,
+    }
+
+# ==========================================
+# SEMANTIC SEARCH
+# ==========================================
+# Persisted logs are embedded (one vector per distinct message or template, see
+# intelligence.embeddings) and added to an in-memory nearest-neighbour index; what each
+# vector stands for is kept in the log_vectors table of logs.db, the vectors themselves
+# in the embedding cache, so the index is rebuilt from both on startup.
+
+semantic_config = config.get("semantic_search", {})
+semantic_index = VectorIndex(
+    exact_max=semantic_config.get("exact_max", 50000),
+    nprobe=semantic_config.get("nprobe", 8)
+)
+semantic_keys = {}  # embedding key -> LogVector id (the id in semantic_index)
+semantic_queue = queue.Queue(maxsize=semantic_config.get("queue_size", 100))
+semantic_stats = {"indexed_logs": 0, "dropped_batches": 0}
+
+def queue_semantic_indexing(parsed_logs):
+    # Only while Bedrock can embed; when indexing falls behind, batches are skipped
+    if not semantic_config.get("enabled", True) or analyzer.bedrock_client is None:
+        return
+    try:
+        semantic_queue.put_nowait(parsed_logs)
+    except queue.Full:
+        semantic_stats["dropped_batches"] += 1
+
+def load_semantic_index():
+    store = embedding_service.store
+    db = SessionLocal()
+    try:
+        rows = db.query(LogVector.id, LogVector.key).all()
+    finally:
+        db.close()
+    ids, vectors = [], []
+    for vector_id, key in rows:
+        vector = store.get(key)
+        if vector is not None:
+            ids.append(vector_id)
+            vectors.append(vector)
+            semantic_keys[key] = vector_id
+    if ids:
+        semantic_index.add(ids, vectors)
+    print(f"[Semantic] Loaded {len(ids)} vectors into the search index")
+
+def index_semantic_batch(client, parsed_logs):
+    seen = {}  # key -> (first log, vector, count, first_seen, last_seen)
+    for parsed_log, (key, vector) in zip(parsed_logs, client.embed_logs(parsed_logs, keyed=True)):
+        if vector is None:
+            continue
+        timestamp = parsed_log.get("timestamp", time.time())
+        entry = seen.get(key)
+        if entry is None:
+            seen[key] = [parsed_log, vector, 1, timestamp, timestamp]
+        else:
+            entry[2] += 1
+            entry[3], entry[4] = min(entry[3], timestamp), max(entry[4], timestamp)
+    if not seen:
+        return
+    db = SessionLocal()
+    try:
+        existing = {row.key: row for row in db.query(LogVector).filter(LogVector.key.in_(list(seen)))}
+        new_rows = []
+        for key, (parsed_log, vector, count, first_seen, last_seen) in seen.items():
+            row = existing.get(key)
+            if row is not None:
+                row.count += count
+                row.first_seen, row.last_seen = min(row.first_seen, first_seen), max(row.last_seen, last_seen)
+                continue
+            row = LogVector(
+                key=key, text=str(parsed_log.get("message", "")), template_id=parsed_log.get("template_id"),
+                level=parsed_log.get("level"), service_id=parsed_log.get("service_id"),
+                source=parsed_log.get("source"), count=count, first_seen=first_seen, last_seen=last_seen
+            )
+            db.add(row)
+            new_rows.append((row, vector))
+        db.commit()
+        fresh = [(row.id, vector) for row, vector in new_rows if row.key not in semantic_keys]
+        for row, _ in new_rows:
+            semantic_keys[row.key] = row.id
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"DB error: {e}")
+        return
+    finally:
+        db.close()
+    if fresh:
+        semantic_index.add([vector_id for vector_id, _ in fresh], [vector for _, vector in fresh])
+    semantic_stats["indexed_logs"] += len(parsed_logs)
+
+def semantic_indexer():
+    try:
+        load_semantic_index()
     except Exception as e:
-        return {"error": f"Prediction failed: {str(e)}"}
+        print(f"[ERROR] Loading the semantic index failed: {e}")
+    while True:
+        parsed_logs = semantic_queue.get()
+        client = analyzer.bedrock_client
+        if client is None:
+            continue
+        try:
+            index_semantic_batch(client, parsed_logs)
+        except Exception as e:
+            print(f"[ERROR] Semantic indexing failed: {e}")
+
+@app.get("/api/search/semantic")
+def semantic_search(q: Optional[str] = None, template_id: Optional[int] = None,
+                    k: int = Query(10, ge=1, le=100)):
+    """Past log lines and templates closest in meaning to q (or to a known template)"""
+    if not q and template_id is None:
+        raise HTTPException(status_code=400, detail="Provide q or template_id")
+    started = time.perf_counter()
+    if q:
+        client = analyzer.bedrock_client
+        if client is None:
+            raise HTTPException(status_code=503, detail="Bedrock not available: semantic search needs embeddings")
+        query = client.embed_query(q)
+        if query is None:
+            raise HTTPException(status_code=502, detail="Embedding the query failed")
+        exclude = None
+    else:
+        db = SessionLocal()
+        try:
+            row = (db.query(LogVector).filter(LogVector.template_id == template_id)
+                   .order_by(LogVector.id.desc()).first())  # the newest row follows the current template text
+        finally:
+            db.close()
+        query = embedding_service.store.get(row.key) if row is not None else None
+        if query is None:
+            raise HTTPException(status_code=404, detail=f"Template {template_id} is not indexed")
+        exclude = row.id
+    try:
+        hits = [(vector_id, score) for vector_id, score in semantic_index.search(query, k + 1)
+                if vector_id != exclude][:k]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db = SessionLocal()
+    try:
+        rows = {row.id: row for row in db.query(LogVector).filter(LogVector.id.in_([i for i, _ in hits]))}
+    finally:
+        db.close()
+    results = []
+    for vector_id, score in hits:
+        row = rows.get(vector_id)
+        if row is None:
+            continue
+        results.append({
+            "score": round(score, 4),
+            "text": row.text,
+            "template_id": row.template_id,
+            "template": template_miner.template(row.template_id) if row.template_id is not None else None,
+            "level": row.level,
+            "service_id": row.service_id,
+            "source": row.source,
+            "count": row.count,
+            "first_seen": row.first_seen,
+            "last_seen": row.last_seen,
+        })
+    return {
+        "query": q,
+        "template_id": template_id,
+        "results": results,
+        "indexed_vectors": len(semantic_index),
+        "mode": semantic_index.mode,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        **semantic_stats,
+    }
+
+syslog_config = config.get("syslog", {})
+if syslog_config.get("enabled"):
+    threading.Thread(
+        target=syslog_collector.run_syslog_server,
+        args=(
+            lambda raw_logs: submit_logs(raw_logs, source="syslog"),
+            syslog_config.get("host", "0.0.0.0"),
+            syslog_config.get("udp_port", 5514),
+            syslog_config.get("tcp_port", 5514),
+            syslog_stats,
+        ),
+        daemon=True
+    ).start()
+
+def analysis_ticker():
+    # Keeps the snapshot current while no logs arrive (windows expiring, absence rules firing)
+    while True:
+        time.sleep(analyzer.tick_seconds)
+        try:
+            if analyzer.tick():
+                alert_stage([])
+        except Exception as e:
+            print(f"[ERROR] Analysis tick failed: {e}")
 
 # Start with local logs by default
+pipeline.start()
+threading.Thread(target=analysis_ticker, daemon=True).start()
+threading.Thread(target=semantic_indexer, daemon=True).start()
 start_log_collector()
 
 @app.get("/api/debug_logs")
 def get_debug_logs():
     return {
         "log_count": len(dashboard_logs),
-        "sample_logs": dashboard_logs[-10:],
-        "analysis": dashboard_analysis
+        "sample_logs": [log.to_dict() for log in dashboard_logs[-10:]],
+        "analysis": dict(analyzer.snapshot)
     }
 
 # ==========================================
@@ -725,11 +1147,16 @@ def get_ai_trends(
     format: Optional[str] = Query("json", description="Response format: json, csv")
 ):
     """Get detailed AI trend analysis and forecasting"""
+    try:
+        # Per-level counts over the requested timeframe, served from the analyzer's rollups
+        timeseries = analyzer.timeseries(timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         insights = analyzer.get_detailed_insights()
         
         if "error" in insights:
-            return {"error": insights["error"], "trends": []}
+            return {"error": insights["error"], "trends": [], "timeseries": timeseries}
         
         classification = insights.get("classification", {})
         trends = classification.get("trends", [])
@@ -757,10 +1184,12 @@ def get_ai_trends(
         
         return {
             "trends": enhanced_trends,
+            "timeseries": timeseries,
             "analysis_summary": {
                 "total_trends": len(enhanced_trends),
                 "timeframe": timeframe,
                 "analysis_timestamp": time.time(),
+                "level_totals": {level: sum(values) for level, values in timeseries["series"].items()},
                 "trend_categories": list(set(t.get("type", "unknown") for t in enhanced_trends))
             }
         }
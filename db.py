@@ -19,5 +19,19 @@ class Log(Base):
     request_id = Column(String(50), index=True, nullable=True)
     source = Column(String(100), index=True, nullable=True)
 
+class LogVector(Base):
+    """One embedded message or template: its key in the embedding cache and where it was seen."""
+    __tablename__ = "log_vectors"
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(32), unique=True, index=True)
+    text = Column(Text)
+    template_id = Column(Integer, index=True, nullable=True)
+    level = Column(String(20), nullable=True)
+    service_id = Column(String(50), nullable=True)
+    source = Column(String(100), nullable=True)
+    count = Column(Integer, default=0)
+    first_seen = Column(Float)
+    last_seen = Column(Float)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -1,9 +1,19 @@
 import time
+import types
 import logging
 import asyncio
-from collections import deque, Counter
+import threading
+from collections import deque
 from typing import Dict, List, Optional
 
+from .window import EventTimeWindow
+from .rollup import RollupStore, parse_timeframe
+from .sketches import WindowSketches
+from .detectors import DetectorBank
+from .rules import RuleEngine
+from .bedrock_worker import BedrockWorker
+from .singleflight import CachedCall
+
 # Conditional import for Bedrock (fallback if not available)
 try:
     from .bedrock_client import BedrockLogAnalyzer
@@ -15,9 +25,35 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 class LogAnalyzer:
-    def __init__(self, window_seconds=60, enable_bedrock=True, aws_region="ap-south-1"):
+    def __init__(self, window_seconds=60, enable_bedrock=True, aws_region="ap-south-1", max_records=10000,
+                 tumbling_seconds=60, allowed_lateness=10, detectors: Optional[Dict] = None,
+                 rules: Optional[List[Dict]] = None, tick_seconds: float = 1.0, llm_cache=None,
+                 embeddings=None):
         self.window_seconds = window_seconds
-        self.logs = deque()
+        # analyze() results are published as a read-only snapshot at most every tick_seconds,
+        # or as soon as an anomaly appears or clears; readers never take the ingest lock
+        self.tick_seconds = tick_seconds
+        self.snapshot = types.MappingProxyType({"counts": {}, "anomalies": [], "version": 0, "published_at": None})
+        self._lock = threading.RLock()  # serializes writers: add_log(s), tick, clear
+        self._published_at = 0.0
+        self._published_state = None
+        # Newest detection id and rule activation already alerted on; kept per analyzer
+        # because both count up per instance (a replaced analyzer starts over)
+        self.alerted_detection = 0
+        self.alerted_rule = 0
+        # Statistics run on event-time buckets covering the whole window; full records
+        # are only kept for the most recent max_records logs (AI context, APIs)
+        self.window = EventTimeWindow(window_seconds, tumbling_seconds, allowed_lateness)
+        self.logs = deque(maxlen=max_records)
+        # Counts per level and service at 1s/1m/1h/1d resolution for time-series queries
+        self.rollups = RollupStore()
+        # Top values, frequencies and distinct counts of service/user/source over the window
+        self.sketches = WindowSketches(window_seconds)
+        # EWMA / seasonal / CUSUM detectors per (service, level) and template, replacing
+        # fixed thresholds; detectors holds DetectorBank keyword arguments
+        self.detectors = DetectorBank(**(detectors or {}))
+        # Declarative count/ratio/absence/sequence rules (see intelligence.rules; None = defaults)
+        self.rules = RuleEngine(rules)
         
         # Bedrock integration
         self.enable_bedrock = enable_bedrock and BEDROCK_AVAILABLE
@@ -27,10 +63,20 @@ class LogAnalyzer:
         self.analysis_cache = {}
         self.last_bedrock_analysis = 0
         self.bedrock_interval = 30  # Run Bedrock analysis every 30 seconds
+        # Model calls run in the background; analyze() merges the latest finished round
+        self.bedrock_worker = BedrockWorker()
+        # On-demand insights for the API: one computation shared by concurrent requests,
+        # the last result served while a newer window is analyzed in the background
+        self.window_version = 0  # number of records added, the input version of the insights
+        self.insights = CachedCall(self._compute_detailed_insights, refresh_interval=self.bedrock_interval)
+        self.predictions = CachedCall(self._compute_predictions, refresh_interval=self.bedrock_interval)
         
         if self.enable_bedrock:
             try:
-                self.bedrock_client = BedrockLogAnalyzer(region_name=aws_region)
+                # llm_cache / embeddings: a ResponseCache and an EmbeddingService shared by
+                # every client (they outlive analyzer re-creation)
+                self.bedrock_client = BedrockLogAnalyzer(region_name=aws_region, cache=llm_cache,
+                                                         embeddings=embeddings)
                 logger.info("Bedrock-enhanced analysis enabled")
             except Exception as e:
                 logger.warning(f"Failed to initialize Bedrock client: {e}")
@@ -39,60 +85,153 @@ class LogAnalyzer:
                 self.bedrock_client = None
 
     def add_log(self, log):
-        """Add new log and clean up old logs outside window"""
-        now = time.time()
+        """Add new log (in any order of timestamps) and clean up old logs outside window"""
+        with self._lock:
+            self._add(log, time.time())
+
+    def add_logs(self, logs):
+        """Add a batch of logs under one lock acquisition"""
+        with self._lock:
+            wall = time.time()
+            for log in logs:
+                self._add(log, wall)
+
+    def _add(self, log, wall: float):
+        self.window_version += 1
         self.logs.append(log)
+        self.window.add(log["timestamp"], log["level"], wall, log.get("template_id"))
+        self.rollups.add(log["timestamp"], log["level"], log.get("service_id"))
+        now = self.window.now(wall)
+        self.sketches.add(log, now)
+        self.detectors.observe(log, now)
+        self.rules.observe(log, now)
 
         # Keep only logs within rolling window
-        while self.logs and now - self.logs[0]["timestamp"] > self.window_seconds:
+        cutoff = now - self.window_seconds
+        while self.logs and self.logs[0]["timestamp"] < cutoff:
             self.logs.popleft()
 
+    def clear(self):
+        with self._lock:
+            self.logs.clear()
+            self.window.clear()
+            self.rollups.clear()
+            self.sketches.clear()
+            self.detectors.clear()
+            self.rules.clear()
+            self.bedrock_worker.clear()
+            self.insights.clear()
+            self.predictions.clear()
+            self.publish()
+
+    def tick(self, force: bool = False) -> bool:
+        """
+        Publish a new snapshot if tick_seconds passed since the last one or the anomaly
+        state changed (a new detection, a rule turning on or off, a Bedrock round
+        finishing); cheap otherwise.
+        Returns whether a snapshot was published.
+        """
+        with self._lock:
+            wall = time.time()
+            now = self.window.advance(wall)
+            self.detectors.advance(now)
+            self.rules.refresh(now)
+            state = (self.detectors.last_id, self.rules.version, self.bedrock_worker.version)
+            if not force and state == self._published_state and wall - self._published_at < self.tick_seconds:
+                return False
+            self.publish()
+            return True
+
+    def publish(self) -> Dict:
+        """Run analyze() and swap in the result as the latest snapshot"""
+        with self._lock:
+            analysis = self.analyze()
+            self._published_state = (self.detectors.last_id, self.rules.version, self.bedrock_worker.version)
+            self._published_at = time.time()
+            analysis["version"] = self.snapshot["version"] + 1
+            analysis["published_at"] = self._published_at
+            # One reference assignment: readers see either the old or the new snapshot, never a mix
+            self.snapshot = types.MappingProxyType(analysis)
+            return self.snapshot
+
     def analyze(self) -> Dict:
         """
         Enhanced analysis combining traditional rules with Bedrock AI insights
         """
-        # Basic statistical analysis (always available)
-        basic_analysis = self._basic_analysis()
-        
-        # Enhanced Bedrock analysis (if enabled and conditions met)
-        bedrock_analysis = {}
-        if self.enable_bedrock and self._should_run_bedrock_analysis():
-            try:
-                bedrock_analysis = self._bedrock_analysis()
-                self.last_bedrock_analysis = time.time()
-            except Exception as e:
-                logger.error(f"Bedrock analysis failed: {e}")
-        
-        # Combine results
+        with self._lock:
+            # Basic statistical analysis (always available)
+            basic_analysis = self._basic_analysis()
+
+            # Start a Bedrock round in the background when due; never waits for the model
+            if self.enable_bedrock and self._should_run_bedrock_analysis():
+                if self.bedrock_worker.submit(self.bedrock_client, list(self.logs)):
+                    self.last_bedrock_analysis = time.time()
+
+        # Combine with the latest finished Bedrock round
+        bedrock_analysis = self.bedrock_worker.result if self.enable_bedrock else {}
         return self._merge_analysis_results(basic_analysis, bedrock_analysis)
     
     def _basic_analysis(self) -> Dict:
-        """Traditional rule-based analysis"""
-        levels = [log["level"] for log in self.logs]
-        counts = Counter(levels)
+        """Statistical analysis, O(1) in the window size"""
+        now = self.window.advance(time.time())
+        self.detectors.advance(now)
+        counts = self.window.level_counts()
 
-        anomalies = []
-        now = time.time()
-
-        # Rule 1: Error spike (>=5 errors in last 10 sec)
-        recent_errors = [l for l in self.logs if l["level"] == "ERROR" and now - l["timestamp"] <= 10]
-        if len(recent_errors) >= 5:
-            anomalies.append("Error spike detected")
+        # Spikes and shifts each series' own detectors found within the window
+        detections = self.detectors.recent(since=now - self.window_seconds)
+        anomalies = [detection["message"] for detection in detections]
 
-        # Rule 2: Critical escalation
-        if "CRITICAL" in levels:
-            anomalies.append("Critical system failure detected")
-
-        # Rule 3: Error-to-info ratio (more than 50% errors)
-        total_logs = len(self.logs)
-        if total_logs > 0 and counts.get("ERROR", 0) / total_logs > 0.5:
-            anomalies.append("System instability: too many errors")
+        # Configured rules, re-evaluated only where their inputs changed
+        rule_results = self.rules.evaluate(now)
+        anomalies.extend(result["message"] for result in rule_results)
 
         return {
-            "counts": dict(counts),
+            "counts": counts,
             "anomalies": anomalies,
-            "analysis_type": "basic"
+            "detections": detections,
+            "rules": rule_results,
+            "analysis_type": "basic",
+            # Which services, users and sources the window's errors come from
+            "error_sources": {
+                dimension: self.sketches.top(dimension, now, "ERROR", k=3)
+                for dimension in self.sketches.dimensions
+            },
+            "distinct": {
+                dimension: self.sketches.distinct(dimension, now)
+                for dimension in self.sketches.distinct_dimensions
+            },
+            "window": {
+                "event_time": now,
+                "watermark": now - self.window.allowed_lateness,
+                "late_logs": self.window.late,
+                "dropped_logs": self.window.dropped,
+            },
         }
+
+    def timeseries(self, timeframe: str = "1h", group: str = "level", step: Optional[int] = None) -> Dict:
+        """
+        Log counts per level (or service) over the last timeframe of event time, e.g. '15m', '24h'
+        """
+        result = self.rollups.query(parse_timeframe(timeframe), self.window.now(time.time()), group, step)
+        result["timeframe"] = timeframe
+        result["group"] = group
+        return result
+
+    def window_templates(self, level: Optional[str] = None, k: int = 10) -> List[Dict]:
+        """
+        The k most frequent template ids over the whole window (of one level if given)
+        """
+        with self._lock:
+            now = self.window.advance(time.time())
+            return self.window.template_counts(now, level, k)
+
+    def tumbling_windows(self) -> List[Dict]:
+        """
+        Per-level counts of the tumbling windows closed by the watermark, oldest first
+        """
+        with self._lock:
+            self.window.advance(time.time())
+            return self.window.closed_windows()
     
     def _should_run_bedrock_analysis(self) -> bool:
         """Determine if Bedrock analysis should run"""
@@ -102,43 +241,6 @@ class LogAnalyzer:
             (now - self.last_bedrock_analysis) > self.bedrock_interval  # Interval passed
         )
     
-    def _bedrock_analysis(self) -> Dict:
-        """AI-powered analysis using AWS Bedrock"""
-        if not self.bedrock_client:
-            return {}
-        
-        try:
-            logs_list = list(self.logs)
-            
-            # 1. Classify log patterns
-            classification = self.bedrock_client.classify_log_patterns(logs_list)
-            
-            # 2. Analyze recent logs for anomalies
-            anomaly_results = []
-            if logs_list:
-                # Analyze the most recent log with context
-                recent_log = logs_list[-1]
-                context_logs = logs_list[-10:] if len(logs_list) > 10 else logs_list[:-1]
-                
-                anomaly_analysis = self.bedrock_client.analyze_log_anomaly(
-                    recent_log, context_logs
-                )
-                anomaly_results.append(anomaly_analysis)
-            
-            # 3. Predict potential issues
-            predictions = self.bedrock_client.predict_system_issues(logs_list)
-            
-            return {
-                "bedrock_classification": classification,
-                "bedrock_anomalies": anomaly_results,
-                "bedrock_predictions": predictions,
-                "analysis_type": "bedrock_enhanced"
-            }
-            
-        except Exception as e:
-            logger.error(f"Bedrock analysis error: {e}")
-            return {}
-    
     def _merge_analysis_results(self, basic: Dict, bedrock: Dict) -> Dict:
         """Merge basic and Bedrock analysis results"""
         merged = basic.copy()
@@ -192,33 +294,56 @@ class LogAnalyzer:
         
         return anomalies
     
-    def get_detailed_insights(self) -> Dict:
-        """Get comprehensive analysis including Bedrock insights"""
+    def get_detailed_insights(self, stale_ok: bool = True) -> Dict:
+        """
+        Get comprehensive analysis including Bedrock insights; concurrent callers share
+        one computation and, with stale_ok, get the last result while it is refreshed
+        """
         if not self.enable_bedrock or not self.bedrock_client:
             return {"error": "Bedrock not available"}
         
         try:
-            logs_list = list(self.logs)
-            
-            # Get comprehensive analysis
-            classification = self.bedrock_client.classify_log_patterns(logs_list)
-            predictions = self.bedrock_client.predict_system_issues(logs_list)
-            
-            # Generate embeddings for semantic analysis (sample)
-            if logs_list:
-                sample_messages = [log.get("message", "") for log in logs_list[-5:]]
-                embeddings = self.bedrock_client.generate_log_embeddings(sample_messages)
-            else:
-                embeddings = []
-            
-            return {
-                "classification": classification,
-                "predictions": predictions,
-                "embeddings_count": len(embeddings),
-                "semantic_analysis_ready": len(embeddings) > 0,
-                "total_logs_analyzed": len(logs_list)
-            }
-            
+            return self.insights.get(self.window_version, stale_ok)
         except Exception as e:
             logger.error(f"Detailed insights error: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    def predict_issues(self, stale_ok: bool = True) -> Dict:
+        """
+        Bedrock predictions of upcoming issues, coalesced like get_detailed_insights()
+        """
+        if not self.enable_bedrock or not self.bedrock_client:
+            return {"error": "Bedrock not available"}
+
+        try:
+            return self.predictions.get(self.window_version, stale_ok)
+        except Exception as e:
+            logger.error(f"Prediction error: {e}")
+            return {"error": f"Prediction failed: {str(e)}"}
+
+    def _window_logs(self) -> List[Dict]:
+        with self._lock:
+            return list(self.logs)
+
+    def _compute_predictions(self) -> Dict:
+        return self.bedrock_client.predict_system_issues(self._window_logs())
+
+    def _compute_detailed_insights(self) -> Dict:
+        logs_list = self._window_logs()
+        
+        # Get comprehensive analysis
+        classification = self.bedrock_client.classify_log_patterns(logs_list)
+        predictions = self.bedrock_client.predict_system_issues(logs_list)
+        
+        # Embed the whole window for semantic analysis (cached, one request per new template)
+        embeddings = [(key, vector) for key, vector in self.bedrock_client.embed_logs(logs_list, keyed=True)
+                      if vector is not None]
+        
+        return {
+            "classification": classification,
+            "predictions": predictions,
+            "embeddings_count": len(embeddings),
+            "distinct_embeddings": len({key for key, _ in embeddings}),
+            "semantic_analysis_ready": len(embeddings) > 0,
+            "total_logs_analyzed": len(logs_list)
+        }
@@ -8,6 +8,9 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import time
 
+from .llm_cache import ResponseCache
+from .embeddings import EmbeddingService
+
 logger = logging.getLogger(__name__)
 
 class BedrockLogAnalyzer:
@@ -15,8 +18,11 @@ class BedrockLogAnalyzer:
     AWS Bedrock client for intelligent log analysis using foundation models
     """
     
-    def __init__(self, region_name: str = "ap-south-1"):
-        """Initialize Bedrock client"""
+    def __init__(self, region_name: str = "ap-south-1", cache: Optional[ResponseCache] = None,
+                 embeddings: Optional[EmbeddingService] = None):
+        """Initialize Bedrock client; responses are memoized in cache, vectors in embeddings, when given"""
+        self.cache = cache
+        self.embeddings = embeddings if embeddings is not None else EmbeddingService()
         try:
             self.bedrock_runtime = boto3.client(
                 service_name='bedrock-runtime',
@@ -148,36 +154,40 @@ class BedrockLogAnalyzer:
             List of embedding vectors
         """
         try:
-            embeddings = []
-            
-            for message in log_messages:
-                # Prepare input for Titan
-                body = json.dumps({
-                    "inputText": message[:1000]  # Titan has input limits
-                })
-                
-                # Call Titan embedding model
-                response = self.bedrock_runtime.invoke_model(
-                    body=body,
-                    modelId=self.models["titan_embed"],
-                    accept='application/json',
-                    contentType='application/json'
-                )
-                
-                # Parse embedding response
-                response_body = json.loads(response.get('body').read())
-                embedding = response_body.get('embedding', [])
-                embeddings.append(embedding)
-                
-                # Rate limiting
-                time.sleep(0.1)
-            
+            vectors = self.embeddings.embed(log_messages, self._embed_text, self.models["titan_embed"])
+            embeddings = [vector.tolist() for vector in vectors if vector is not None]
             logger.info(f"Generated {len(embeddings)} embeddings")
             return embeddings
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             return []
+
+    def embed_logs(self, logs: List[Dict], keyed: bool = False) -> List[Any]:
+        """
+        float32 embedding of each log's message (None where it failed); logs of
+        one template share a vector, so whole windows cost one request per template.
+        With keyed, (cache key, vector) pairs: equal keys mean the same vector.
+        """
+        embed = self.embeddings.embed_keyed if keyed else self.embeddings.embed
+        return embed(
+            [log.get("message", "") for log in logs], self._embed_text, self.models["titan_embed"],
+            template_ids=[log.get("template_id") for log in logs]
+        )
+
+    def embed_query(self, text: str) -> Any:
+        """float32 embedding of a search query (None if it failed), not kept in the embedding cache"""
+        return self.embeddings.embed_query(text, self._embed_text, self.models["titan_embed"])
+
+    def _embed_text(self, text: str) -> List[float]:
+        """One Titan embedding request"""
+        response = self.bedrock_runtime.invoke_model(
+            body=json.dumps({"inputText": text}),
+            modelId=self.models["titan_embed"],
+            accept='application/json',
+            contentType='application/json'
+        )
+        return json.loads(response.get('body').read()).get('embedding', [])
     
     def predict_system_issues(self, recent_logs: List[Dict], system_metrics: Dict = None) -> Dict:
         """
@@ -217,7 +227,12 @@ class BedrockLogAnalyzer:
             return {"risk_level": "unknown", "predicted_issues": [], "preventive_actions": []}
     
     def _invoke_claude(self, prompt: str, model: str = "claude_haiku") -> str:
-        """Invoke Claude model with prompt"""
+        """Invoke Claude model with prompt (answered from the cache when the same prompt was seen)"""
+        key = self.cache.key(self.models[model], prompt) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         try:
             body = json.dumps({
                 "anthropic_version": "bedrock-2023-05-31",
@@ -238,7 +253,10 @@ class BedrockLogAnalyzer:
             )
             
             response_body = json.loads(response.get('body').read())
-            return response_body["content"][0]["text"]
+            text = response_body["content"][0]["text"]
+            if key:
+                self.cache.put(key, text)
+            return text
             
         except Exception as e:
             logger.error(f"Error invoking Claude: {e}")
@@ -406,6 +424,22 @@ Respond with valid JSON only.
         for level, count in level_counts.items():
             summary += f"  {level}: {count}\n"
         
+        # Templates mined at ingest already group the messages: list the most frequent
+        templates = {}
+        for log in logs:
+            template_id = log.get('template_id')
+            if template_id is None:
+                continue
+            if template_id not in templates:
+                templates[template_id] = [0, log.get('level', 'UNKNOWN'), log.get('message', '')[:150]]
+            templates[template_id][0] += 1
+        if templates:
+            summary += f"\nMessage Templates ({len(templates)} distinct, most frequent first):\n"
+            ranked = sorted(templates.values(), key=lambda t: t[0], reverse=True)
+            for count, level, msg in ranked[:15]:
+                summary += f"  {count}x {level}: {msg}\n"
+            return summary
+        
         # Add sample messages
         summary += "\nSample Messages by Level:\n"
         for level, messages in sample_messages.items():
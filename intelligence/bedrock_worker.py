@@ -0,0 +1,92 @@
+"""
+Background Bedrock analysis for the analyzer
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class BedrockWorker:
+    """
+    Runs Bedrock analysis rounds off the ingest path. submit() hands over a copy
+    of the window's records and returns at once; the round's three model calls
+    (pattern classification, anomaly analysis of the newest record, issue
+    prediction) run concurrently on a small thread pool, so a round takes as
+    long as the slowest call rather than the sum.
+
+    The latest completed round is kept in `result` (the keys analyze() merges)
+    and `version` counts completed rounds. At most one round is in flight; a
+    submit() while one is running is ignored. A call that fails only drops its
+    own part of the result.
+    """
+
+    def __init__(self, max_workers: int = 3):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock")
+        self._lock = threading.Lock()
+        self._busy = False
+        self.result: Dict = {}
+        self.version = 0
+        self.started_at = None
+        self.completed_at = None
+        self.last_duration = None
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    def submit(self, client, logs: List[Dict]) -> bool:
+        """Start a round on logs (a list the caller no longer mutates); False if one is running."""
+        if client is None or not logs:
+            return False
+        with self._lock:
+            if self._busy:
+                return False
+            self._busy = True
+            self.started_at = time.time()
+        threading.Thread(target=self._run, args=(client, logs), daemon=True).start()
+        return True
+
+    def _run(self, client, logs: List[Dict]):
+        try:
+            recent_log = logs[-1]
+            context_logs = logs[-10:] if len(logs) > 10 else logs[:-1]
+            futures = {
+                "bedrock_classification": self._pool.submit(client.classify_log_patterns, logs),
+                "bedrock_anomalies": self._pool.submit(client.analyze_log_anomaly, recent_log, context_logs),
+                "bedrock_predictions": self._pool.submit(client.predict_system_issues, logs),
+            }
+            result = {}
+            for name, future in futures.items():
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.error(f"Bedrock {name} failed: {e}")
+                    continue
+                result[name] = [value] if name == "bedrock_anomalies" else value
+            if result:
+                result["analysis_type"] = "bedrock_enhanced"
+                self.completed_at = time.time()
+                self.last_duration = self.completed_at - self.started_at
+                self.result = result
+                self.version += 1
+        except Exception as e:
+            logger.error(f"Bedrock analysis error: {e}")
+        finally:
+            with self._lock:
+                self._busy = False
+
+    def clear(self):
+        self.result = {}
+
+    def status(self) -> Dict:
+        return {
+            "busy": self._busy,
+            "rounds": self.version,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "last_duration": self.last_duration,
+        }
@@ -0,0 +1,355 @@
+"""
+Streaming anomaly detectors over per-interval log counts
+"""
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Detector:
+    """
+    Base class: fed one count per closed interval, O(1) time and memory per update.
+    update() returns {"expected": ..., "score": ...} when the count is anomalous.
+    Subclasses list their learned state in STATE so it can be saved and restored.
+    """
+
+    STATE = ()
+
+    def update(self, value: float, timestamp: float) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def state(self) -> Dict:
+        return {name: getattr(self, name) for name in self.STATE}
+
+    def load(self, state: Dict):
+        for name in self.STATE:
+            if name in state:
+                setattr(self, name, state[name])
+
+
+def _noise_floor(mean: float) -> float:
+    # Counts are roughly Poisson: never trust a standard deviation below sqrt(mean)
+    return math.sqrt(mean + 1.0)
+
+
+class EwmaDetector(Detector):
+    """
+    Z-score of each count against an exponentially weighted mean and variance
+    (alpha is the weight of the newest interval). Catches sudden spikes
+    relative to the series' own recent level.
+    """
+
+    STATE = ("mean", "var", "n")
+
+    def __init__(self, alpha: float = 0.1, threshold: float = 4.0, warmup: int = 10, min_count: int = 3):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_count = min_count
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+
+    def update(self, value, timestamp):
+        result = None
+        if self.n >= self.warmup and value >= self.min_count:
+            score = (value - self.mean) / max(math.sqrt(self.var), _noise_floor(self.mean))
+            if score > self.threshold:
+                result = {"expected": self.mean, "score": score}
+        self.n += 1
+        # Plain running mean until 1/n drops below alpha, so the start does not bias the baseline
+        alpha = max(self.alpha, 1.0 / self.n)
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        return result
+
+
+class SeasonalDetector(Detector):
+    """
+    Z-score against the same slot of earlier periods (by default the same hour
+    of the day, UTC), each slot with its own EWMA mean and variance. Only fires
+    once a full period has been seen, so daily peaks stop looking like spikes.
+    """
+
+    STATE = ("means", "vars", "first_timestamp")
+
+    def __init__(self, period: int = 86400, slot_seconds: int = 3600, alpha: float = 0.05,
+                 threshold: float = 4.0, min_count: int = 3):
+        self.period = period
+        self.slot_seconds = slot_seconds
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        slots = max(period // slot_seconds, 1)
+        self.means = [None] * slots
+        self.vars = [0.0] * slots
+        self.first_timestamp = None
+
+    def update(self, value, timestamp):
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        slot = int(timestamp // self.slot_seconds) % len(self.means)
+        mean = self.means[slot]
+        if mean is None:
+            self.means[slot] = float(value)
+            return None
+        result = None
+        if timestamp - self.first_timestamp >= self.period and value >= self.min_count:
+            score = (value - mean) / max(math.sqrt(self.vars[slot]), _noise_floor(mean))
+            if score > self.threshold:
+                result = {"expected": mean, "score": score}
+        diff = value - mean
+        increment = self.alpha * diff
+        self.means[slot] = mean + increment
+        self.vars[slot] = (1 - self.alpha) * (self.vars[slot] + diff * increment)
+        return result
+
+
+class CusumDetector(Detector):
+    """
+    One-sided CUSUM change-point detector (Page, 1954) on counts standardized by
+    a slow EWMA baseline: sums how far each count sits above baseline + k
+    standard deviations and fires when the sum passes h. Catches sustained
+    small increases that never make a single interval stand out.
+    """
+
+    STATE = ("mean", "var", "n", "cusum")
+
+    def __init__(self, alpha: float = 0.01, k: float = 0.5, h: float = 8.0, warmup: int = 30, min_count: int = 3):
+        self.alpha = alpha
+        self.k = k
+        self.h = h
+        self.warmup = warmup
+        self.min_count = min_count
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+        self.cusum = 0.0
+
+    def update(self, value, timestamp):
+        result = None
+        if self.n >= self.warmup:
+            z = (value - self.mean) / max(math.sqrt(self.var), _noise_floor(self.mean))
+            self.cusum = max(0.0, self.cusum + z - self.k)
+            if self.cusum > self.h:
+                if value >= self.min_count:
+                    result = {"expected": self.mean, "score": self.cusum}
+                self.cusum = 0.0
+        self.n += 1
+        # Plain running mean until 1/n drops below alpha, so the start does not bias the baseline
+        alpha = max(self.alpha, 1.0 / self.n)
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        return result
+
+
+# Detector name -> class; register more here to make them configurable
+DETECTORS = {
+    "ewma": EwmaDetector,
+    "seasonal": SeasonalDetector,
+    "cusum": CusumDetector,
+}
+
+
+class DetectorBank:
+    """
+    Runs every configured detector on the log count of each series per interval
+    of event time. Series are (service, level) for the watched levels and
+    (template id) for records of those levels.
+
+    observe() only increments a counter; when the event clock passes the end of
+    an interval, its counts (0 for silent series) are fed to the detectors, so
+    the cost is O(1) per record plus O(series) per interval. At most max_series
+    are tracked (idle ones are dropped after idle_seconds) and a series fires
+    at most once per cooldown seconds per detector.
+
+    detectors maps names in DETECTORS to keyword arguments, e.g.
+    {"ewma": {"threshold": 5}, "cusum": {}}. With a path, detector state is
+    saved there every save_interval seconds and loaded on startup.
+    """
+
+    def __init__(self, interval: float = 10, detectors: Optional[Dict[str, Dict]] = None,
+                 levels=("WARNING", "ERROR", "CRITICAL"), max_series: int = 1000, idle_seconds: float = 86400,
+                 cooldown: float = 60, max_catchup: int = 60, history: int = 200,
+                 path: Optional[str] = None, save_interval: float = 30.0):
+        self.interval = interval
+        self.detector_config = {name: {} for name in DETECTORS} if detectors is None else detectors
+        unknown = set(self.detector_config) - set(DETECTORS)
+        if unknown:
+            raise ValueError(f"Unknown detectors {sorted(unknown)} (available: {sorted(DETECTORS)})")
+        self.levels = frozenset(levels)
+        self.max_series = max_series
+        self.idle_intervals = idle_seconds / interval
+        self.cooldown = cooldown
+        self.max_catchup = max_catchup
+        self.path = path
+        self.save_interval = save_interval
+        self._series = {}      # key -> {detector name: Detector}
+        self._last_seen = {}   # key -> last interval index with a record
+        self._last_fired = {}  # (key, detector name) -> timestamp
+        self._pending = {}     # key -> count in the open interval
+        self._open = None      # index of the open interval
+        self.detections = deque(maxlen=history)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._last_save = time.time()
+        if path:
+            self._load()
+
+    def _new_series(self) -> Dict[str, Detector]:
+        return {name: DETECTORS[name](**kwargs) for name, kwargs in self.detector_config.items()}
+
+    def observe(self, log, now: float):
+        """Count one record; now is the event clock. Late records count toward the open interval."""
+        if log["level"] not in self.levels:
+            return
+        self.advance(now)
+        keys = [("service", log.get("service_id") or "unknown", log["level"])]
+        if log.get("template_id") is not None:
+            keys.append(("template", log["template_id"]))
+        with self._lock:
+            for key in keys:
+                self._pending[key] = self._pending.get(key, 0) + 1
+
+    def advance(self, now: float) -> List[Dict]:
+        """Close every interval that ended before now; returns the new detections."""
+        target = math.floor(now / self.interval)
+        with self._lock:
+            if self._open is None:
+                self._open = target
+            if target <= self._open:
+                return []
+            new = self._close(self._open, self._pending)
+            self._pending = {}
+            # Silent intervals count as zeros; after a long gap only the latest max_catchup are replayed
+            for index in range(max(self._open + 1, target - self.max_catchup), target):
+                new.extend(self._close(index, {}))
+            self._open = target
+            due = self.path and time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+        return new
+
+    def _close(self, index: int, counts: Dict) -> List[Dict]:
+        for key in counts:
+            if key not in self._series:
+                if len(self._series) >= self.max_series:
+                    continue  # untracked series keep no state at all
+                self._series[key] = self._new_series()
+            self._last_seen[key] = index
+        timestamp = index * self.interval
+        new, idle = [], []
+        for key, detectors in self._series.items():
+            value = counts.get(key, 0)
+            for name, detector in detectors.items():
+                result = detector.update(value, timestamp)
+                if result is None:
+                    continue
+                fired = self._last_fired.get((key, name))
+                if fired is not None and timestamp - fired < self.cooldown:
+                    continue
+                self._last_fired[key, name] = timestamp
+                new.append(self._detection(key, name, timestamp, value, result))
+            if index - self._last_seen.get(key, index) > self.idle_intervals:
+                idle.append(key)
+        for key in idle:
+            del self._series[key], self._last_seen[key]
+            for name in self.detector_config:
+                self._last_fired.pop((key, name), None)
+        self.detections.extend(new)
+        return new
+
+    def _detection(self, key, detector: str, timestamp: float, value: int, result: Dict) -> Dict:
+        if key[0] == "service":
+            subject = {"service": key[1], "level": key[2]}
+            label = f"{key[2]} spike on {key[1]}"
+        else:
+            subject = {"template_id": key[1]}
+            label = f"Spike of template {key[1]}"
+        detection = {
+            "id": self._next_id,
+            "timestamp": timestamp,
+            "interval_seconds": self.interval,
+            "detector": detector,
+            "value": value,
+            "expected": round(result["expected"], 2),
+            "score": round(result["score"], 2),
+            "message": f"{label}: {value} in {self.interval}s, expected {result['expected']:.1f} "
+                       f"({detector} score {result['score']:.1f})",
+        }
+        detection.update(subject)
+        self._next_id += 1
+        return detection
+
+    @property
+    def last_id(self) -> int:
+        """Id of the newest detection (0 before the first); changes whenever one is added."""
+        return self._next_id - 1
+
+    def recent(self, since: Optional[float] = None) -> List[Dict]:
+        """Detections (oldest first), only those for intervals starting at or after since if given."""
+        with self._lock:
+            return [d for d in self.detections if since is None or d["timestamp"] >= since]
+
+    def clear(self):
+        with self._lock:
+            self._series, self._last_seen, self._last_fired, self._pending = {}, {}, {}, {}
+            self._open = None
+            self.detections.clear()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = json.dumps({
+                "interval": self.interval,
+                "next_id": self._next_id,
+                "series": [
+                    {
+                        "key": list(key),
+                        "last_seen": self._last_seen.get(key),
+                        "detectors": {name: detector.state() for name, detector in detectors.items()},
+                    }
+                    for key, detectors in self._series.items()
+                ],
+            })
+            self._last_save = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write detector state {self.path}: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("interval") != self.interval:
+            logger.info(f"Detector interval changed, not loading {self.path}")
+            return
+        self._next_id = data.get("next_id", 1)
+        for saved in data.get("series", [])[:self.max_series]:
+            key = tuple(saved["key"])
+            detectors = self._new_series()
+            for name, state in saved.get("detectors", {}).items():
+                if name in detectors:
+                    detectors[name].load(state)
+            self._series[key] = detectors
+            if saved.get("last_seen") is not None:
+                self._last_seen[key] = saved["last_seen"]
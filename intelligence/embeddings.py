@@ -0,0 +1,272 @@
+"""
+Embedding generation with deduplication, rate limiting and a persistent vector cache
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class EmbeddingStore:
+    """
+    float32 vectors keyed by content hash. With a path, vectors live in a
+    memory-mapped matrix at <path>.f32 (one row per key, grown by doubling up
+    to max_rows) and the keys, in row order, in <path>.json; rows are flushed
+    before the key list naming them is written, so a crash loses at most the
+    newest vectors. Without a path the matrix is kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_rows: int = 100000, initial_rows: int = 1024):
+        self.path = path
+        self.max_rows = max_rows
+        self.initial_rows = initial_rows
+        self.dim = None
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._data = None  # (capacity, dim) float32, np.memmap with a path
+        self._flushed = 0  # rows already listed in the key file
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def _allocate(self, rows: int):
+        if not self.path:
+            data = np.zeros((rows, self.dim), dtype=np.float32)
+            if self._data is not None:
+                data[:len(self._keys)] = self._data[:len(self._keys)]
+            self._data = data
+            return
+        data_path = f"{self.path}.f32"
+        os.makedirs(os.path.dirname(os.path.abspath(data_path)), exist_ok=True)
+        if self._data is not None:
+            self._data.flush()
+            self._data = None
+        with open(data_path, "ab") as f:
+            f.truncate(rows * self.dim * 4)
+        self._data = np.memmap(data_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(key)
+            return None if row is None else np.array(self._data[row])
+
+    def put(self, key: str, vector) -> bool:
+        """Store a vector; False if the store is full or the dimension does not match."""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if key in self._rows:
+                return True
+            if self.dim is None:
+                self.dim = len(vector)
+                self._allocate(self.initial_rows)
+            if vector.shape != (self.dim,):
+                logger.warning(f"Embedding of dimension {vector.shape} does not match the store ({self.dim})")
+                return False
+            row = len(self._keys)
+            if row >= len(self._data):
+                if row >= self.max_rows:
+                    return False
+                self._allocate(min(len(self._data) * 2, self.max_rows))
+            self._data[row] = vector
+            self._keys.append(key)
+            self._rows[key] = row
+            return True
+
+    def vectors(self) -> Tuple[List[str], np.ndarray]:
+        """Keys and the (rows, dim) matrix of their vectors, in insertion order (a read-only view)."""
+        with self._lock:
+            if self._data is None:
+                return [], np.zeros((0, 0), dtype=np.float32)
+            view = self._data[:len(self._keys)].view(np.ndarray)
+            view.flags.writeable = False
+            return list(self._keys), view
+
+    def flush(self):
+        if not self.path:
+            return
+        with self._lock:
+            if self._data is None or self._flushed == len(self._keys):
+                return
+            self._data.flush()
+            index = json.dumps({"dim": self.dim, "keys": self._keys})
+            self._flushed = len(self._keys)
+        tmp_path = f"{self.path}.json.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(index)
+            os.replace(tmp_path, f"{self.path}.json")
+        except OSError as e:
+            logger.warning(f"Failed to write embedding index {self.path}.json: {e}")
+
+    def _load(self):
+        try:
+            with open(f"{self.path}.json", "r") as f:
+                index = json.load(f)
+            size = os.path.getsize(f"{self.path}.f32")
+        except (FileNotFoundError, ValueError):
+            return
+        self.dim = index["dim"]
+        rows = size // (self.dim * 4)
+        keys = index["keys"][:min(rows, self.max_rows)]
+        self._data = np.memmap(f"{self.path}.f32", dtype=np.float32, mode="r+", shape=(rows, self.dim))
+        self._keys = keys
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._flushed = len(keys)
+        logger.info(f"Loaded {len(keys)} cached embeddings from {self.path}.f32")
+
+
+class RateLimiter:
+    """Token bucket: at most rate acquisitions per second, bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve a token even when none is left; the debt sets how long later callers wait
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+
+
+class EmbeddingService:
+    """
+    Embeds texts through embed_fn (one text -> vector), each distinct text once.
+
+    Texts are normalized (whitespace collapsed, cut at max_chars) and keyed by
+    a hash of (model, text); vectors already in the store are reused. With
+    templates (template id -> current template text, None if unknown), records
+    that carry a template id are keyed by a hash of (model, template text)
+    instead and share the vector of the first message embedded for it; a
+    template that generalizes, or an id reused for another template, gets a
+    new key and so a new vector. Missing vectors are requested
+    concurrently on max_concurrency threads, at most rate_limit requests per
+    second.
+    """
+
+    def __init__(self, store: Optional[EmbeddingStore] = None, max_concurrency: int = 4,
+                 rate_limit: Optional[float] = 10.0, max_chars: int = 1000,
+                 templates: Optional[Callable[[int], Optional[str]]] = None):
+        self.store = store if store is not None else EmbeddingStore()
+        self.templates = templates
+        self.max_chars = max_chars
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed")
+        self._limiter = RateLimiter(rate_limit, burst=max_concurrency) if rate_limit else None
+        self.requests = 0
+        self.reused = 0
+        self.failures = 0
+
+    def normalize(self, text: str) -> str:
+        return WHITESPACE.sub(" ", str(text)).strip()[:self.max_chars]
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    @classmethod
+    def template_key(cls, model: str, template: str) -> str:
+        return cls.key(model, f"\0template {template}")
+
+    def _request(self, embed_fn: Callable, key: str, text: str):
+        if self._limiter:
+            self._limiter.acquire()
+        try:
+            return key, embed_fn(text)
+        except Exception as e:
+            logger.error(f"Embedding request failed: {e}")
+            return key, None
+
+    def embed(self, texts: Sequence[str], embed_fn: Callable, model: str,
+              template_ids: Optional[Sequence[Optional[int]]] = None) -> List[Optional[np.ndarray]]:
+        """
+        One vector per text (None where the request failed); equal texts and
+        records of the same template get the same array object.
+        """
+        return [vector for _, vector in self.embed_keyed(texts, embed_fn, model, template_ids)]
+
+    def embed_keyed(self, texts: Sequence[str], embed_fn: Callable, model: str,
+                    template_ids: Optional[Sequence[Optional[int]]] = None) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """Like embed(), with the cache key of each vector: (key, vector) per text."""
+        keys, missing = [], {}
+        template_texts = {}  # template id -> template text, looked up once per call
+        for i, text in enumerate(texts):
+            template_id = template_ids[i] if template_ids is not None and self.templates else None
+            if template_id is not None and template_id not in template_texts:
+                template_texts[template_id] = self.templates(template_id)
+            template = template_texts.get(template_id)
+            if template is not None:
+                key = self.template_key(model, template)
+            else:
+                key = self.key(model, self.normalize(text))
+            keys.append(key)
+            if key not in missing and key not in self.store:
+                missing[key] = self.normalize(text)
+
+        self.reused += len(set(keys)) - len(missing)
+        self.requests += len(missing)
+        fresh = {}
+        for key, vector in self._pool.map(lambda item: self._request(embed_fn, *item), missing.items()):
+            if vector is None or len(vector) == 0:
+                self.failures += 1
+                continue
+            fresh[key] = np.asarray(vector, dtype=np.float32)
+            self.store.put(key, fresh[key])
+        if fresh:
+            self.store.flush()
+
+        vectors = {}
+        for key in set(keys):
+            vectors[key] = fresh[key] if key in fresh else self.store.get(key)
+        return [(key, vectors[key]) for key in keys]
+
+    def embed_query(self, text: str, embed_fn: Callable, model: str) -> Optional[np.ndarray]:
+        """
+        Vector of a search query (None if the request failed): reused from the
+        store when the text was embedded before, but never added to it, so
+        ad-hoc queries do not fill the store meant for log messages.
+        """
+        text = self.normalize(text)
+        vector = self.store.get(self.key(model, text))
+        if vector is not None:
+            self.reused += 1
+            return vector
+        self.requests += 1
+        _, vector = self._request(embed_fn, None, text)
+        if vector is None or len(vector) == 0:
+            self.failures += 1
+            return None
+        return np.asarray(vector, dtype=np.float32)
+
+    def stats(self) -> Dict:
+        return {
+            "cached_vectors": len(self.store),
+            "dimension": self.store.dim,
+            "requests": self.requests,
+            "reused": self.reused,
+            "failures": self.failures,
+        }
@@ -0,0 +1,128 @@
+"""
+Content-addressed cache of model responses
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    Model responses keyed by a SHA-256 of (model, normalized prompt), where
+    normalizing collapses runs of whitespace, so the same window summary sent
+    twice costs one model call. Entries expire after ttl seconds; beyond
+    max_entries the least recently used is evicted.
+
+    With a path, entries are saved there as JSON (at most every save_interval
+    seconds, when something changed) and unexpired ones are loaded on startup.
+    hits / misses / evictions are exposed by stats().
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300, path: Optional[str] = None,
+                 save_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self._entries = OrderedDict()  # key -> (expires_at, response), least recently used first
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self._load()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        normalized = WHITESPACE.sub(" ", prompt).strip()
+        return hashlib.sha256(f"{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Cached response, or None when missing or expired (counted as a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, response):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+            due = self.path and time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            snapshot = json.dumps([
+                [key, expires_at, response]
+                for key, (expires_at, response) in self._entries.items()
+                if expires_at > now
+            ])
+            self._dirty = False
+            self._last_save = now
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache {self.path}: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        now = time.time()
+        for key, expires_at, response in entries[-self.max_entries:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, response)
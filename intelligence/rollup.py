@@ -0,0 +1,150 @@
+"""
+Multi-resolution rolling aggregates (per level and per service) for time-series queries
+"""
+import math
+import re
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# (bucket seconds, buckets kept): 10 minutes of seconds, a day of minutes,
+# a week of hours, 90 days of days
+RESOLUTIONS = ((1, 600), (60, 1440), (3600, 168), (86400, 90))
+TIMEFRAME_PATTERN = re.compile(r"^(\d+)([smhd])$")
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+OTHER_SERVICE = "other"
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """'15m' -> 900. Raises ValueError for anything else."""
+    match = TIMEFRAME_PATTERN.match(timeframe.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid timeframe '{timeframe}' (expected e.g. 30s, 15m, 1h, 24h, 7d)")
+    return int(match.group(1)) * UNIT_SECONDS[match.group(2)]
+
+
+class _Ring:
+    """
+    Fixed number of buckets of one width. Slot i holds bucket index starts[i]
+    (or -1); a bucket is reused once a newer one maps to the same slot, so every
+    series costs exactly `size` counters.
+    """
+
+    __slots__ = ("step", "size", "starts", "series")
+
+    def __init__(self, step: int, size: int):
+        self.step = step
+        self.size = size
+        self.starts = array("q", [-1]) * size
+        self.series = {}  # series key -> array of counts, one per slot
+
+    def add(self, timestamp: float, keys):
+        index = math.floor(timestamp / self.step)
+        slot = index % self.size
+        start = self.starts[slot]
+        if start != index:
+            if start > index:
+                return  # older than everything this resolution keeps
+            self.starts[slot] = index
+            for counts in self.series.values():
+                counts[slot] = 0
+        for key in keys:
+            counts = self.series.get(key)
+            if counts is None:
+                counts = self.series[key] = array("q", [0]) * self.size
+            counts[slot] += 1
+
+    def values(self, key, first: int, last: int) -> List[int]:
+        counts = self.series.get(key)
+        if counts is None:
+            return [0] * (last - first + 1)
+        size, starts = self.size, self.starts
+        return [counts[index % size] if starts[index % size] == index else 0 for index in range(first, last + 1)]
+
+
+class RollupStore:
+    """
+    Log counts per level and per service at several resolutions (default 1s, 1m,
+    1h, 1d; see RESOLUTIONS). Every record is counted into each resolution when
+    it arrives, in any timestamp order, so a range query reads O(buckets) counters
+    from the finest resolution that still covers it and never touches raw logs.
+
+    Memory is fixed per series: the sum of the bucket counts in RESOLUTIONS
+    (about 18 KB). Services beyond max_services are counted as 'other'.
+    """
+
+    def __init__(self, resolutions: Tuple[Tuple[int, int], ...] = RESOLUTIONS, max_services: int = 50):
+        self.resolutions = tuple(sorted(resolutions))
+        self.max_services = max_services
+        self._rings = [_Ring(step, size) for step, size in self.resolutions]
+        self._services = set()
+        self._lock = threading.Lock()
+
+    def add(self, timestamp: float, level: str, service: Optional[str] = None):
+        keys = [("level", level)]
+        with self._lock:
+            if service:
+                if service not in self._services:
+                    if len(self._services) >= self.max_services:
+                        service = OTHER_SERVICE
+                    else:
+                        self._services.add(service)
+                keys.append(("service", service))
+            for ring in self._rings:
+                ring.add(timestamp, keys)
+
+    def clear(self):
+        with self._lock:
+            self._rings = [_Ring(step, size) for step, size in self.resolutions]
+            self._services = set()
+
+    def max_range(self) -> int:
+        return max(step * size for step, size in self.resolutions)
+
+    def _ring_for(self, seconds: int, step: Optional[int], max_points: int) -> _Ring:
+        covering = [ring for ring in self._rings if seconds <= ring.step * ring.size]
+        if not covering:
+            raise ValueError(f"Timeframe longer than the {self.max_range()}s kept")
+        if step is not None:
+            # Coarsest resolution the step is a multiple of
+            fitting = [ring for ring in covering if step % ring.step == 0]
+            if not fitting:
+                raise ValueError(f"Step {step}s is not a multiple of a resolution covering {seconds}s "
+                                 f"({[ring.step for ring in covering]})")
+            return fitting[-1]
+        for ring in covering:
+            if seconds / ring.step <= max_points:
+                return ring
+        return covering[-1]
+
+    def query(self, seconds: int, now: float, group: str = "level", step: Optional[int] = None,
+              max_points: int = 1440) -> Dict:
+        """
+        Counts per level or per service over the last `seconds` ending at now, in
+        buckets of `step` seconds (a multiple of a resolution), or by default from
+        the finest resolution giving at most max_points buckets.
+        """
+        if group not in ("level", "service"):
+            raise ValueError(f"Unknown group '{group}' (expected 'level' or 'service')")
+        if step is not None and step <= 0:
+            raise ValueError("Step must be positive")
+        with self._lock:
+            ring = self._ring_for(seconds, step, max_points)
+            step = step or ring.step
+            last = math.floor(now / step)
+            first = last - max(math.ceil(seconds / step), 1) + 1
+            factor = step // ring.step
+            series = {}
+            for key in ring.series:
+                if key[0] == group:
+                    values = ring.values(key, first * factor, (last + 1) * factor - 1)
+                    if factor > 1:
+                        values = [sum(values[i:i + factor]) for i in range(0, len(values), factor)]
+                    series[key[1]] = values
+        return {
+            "step": step,
+            "start": first * step,
+            "end": (last + 1) * step,
+            "timestamps": [index * step for index in range(first, last + 1)],
+            "series": {name: values for name, values in series.items() if any(values)},
+        }
@@ -0,0 +1,413 @@
+"""
+Declarative anomaly rules compiled to incremental evaluators
+"""
+import re
+import math
+import heapq
+import itertools
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+FILTER_FIELDS = {"level": "level", "service": "service_id", "source": "source"}
+RULE_TYPES = ("count", "ratio", "absence", "sequence")
+
+# Used when the configuration defines no rules
+DEFAULT_RULES = [
+    {"name": "critical", "type": "count", "level": "CRITICAL", "window": 60, "threshold": 1,
+     "message": "Critical system failure detected"},
+]
+
+
+class _Predicate:
+    """One distinct filter: field values (any of), an optional regex on the message and watch labels."""
+
+    __slots__ = ("id", "fields", "regex", "watch")
+
+    def __init__(self, predicate_id: int, fields: Dict[str, tuple], regex, watch: Optional[frozenset]):
+        self.id = predicate_id
+        self.fields = fields
+        self.regex = regex
+        self.watch = watch
+
+
+class _Counter:
+    """Matches of one predicate over the last window seconds of event time, in per-second buckets."""
+
+    __slots__ = ("predicate", "window", "buckets", "seconds", "total", "rules")
+
+    def __init__(self, predicate: _Predicate, window: float):
+        self.predicate = predicate
+        self.window = window
+        self.buckets = {}
+        self.seconds = []  # min-heap of bucket seconds
+        self.total = 0
+        self.rules = []    # rules to re-evaluate when total changes
+
+    def add(self, second: int) -> bool:
+        """Count one match; True if this created a new oldest bucket (expiry moves earlier)."""
+        self.total += 1
+        if second in self.buckets:
+            self.buckets[second] += 1
+            return False
+        self.buckets[second] = 1
+        heapq.heappush(self.seconds, second)
+        return self.seconds[0] == second
+
+    def expire(self, now: float) -> bool:
+        changed = False
+        cutoff = math.floor(now) - self.window
+        while self.seconds and self.seconds[0] <= cutoff:
+            self.total -= self.buckets.pop(heapq.heappop(self.seconds))
+            changed = True
+        return changed
+
+    def next_expiry(self) -> Optional[float]:
+        # expire() drops second s once floor(now) - window >= s
+        return self.seconds[0] + self.window if self.seconds else None
+
+
+class Rule:
+    """Base class: evaluate() recomputes the state from the rule's inputs."""
+
+    def __init__(self, spec: Dict):
+        self.name = spec["name"]
+        self.type = spec["type"]
+        self.custom_message = spec.get("message")
+        self.active = False
+        self.since = None
+        self.activation = None  # id of the current activation
+        self.value = None
+
+    def check(self, now: float) -> bool:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        raise NotImplementedError
+
+    def result(self) -> Dict:
+        return {
+            "rule": self.name,
+            "type": self.type,
+            "active": self.active,
+            "value": self.value,
+            "since": self.since,
+            "activation": self.activation,
+            "message": self.custom_message or self.describe(),
+        }
+
+
+class CountRule(Rule):
+    def __init__(self, spec, counter: _Counter):
+        super().__init__(spec)
+        self.counter = counter
+        self.threshold = spec.get("threshold", 1)
+
+    def check(self, now):
+        self.value = self.counter.total
+        return self.value >= self.threshold
+
+    def describe(self):
+        return f"{self.name}: {self.value} matching logs in {self.counter.window}s (threshold {self.threshold})"
+
+
+class RatioRule(Rule):
+    def __init__(self, spec, numerator: _Counter, denominator: _Counter):
+        super().__init__(spec)
+        self.numerator = numerator
+        self.denominator = denominator
+        self.threshold = spec.get("threshold", 0.5)
+        self.min_count = spec.get("min_count", 1)
+
+    def check(self, now):
+        total = self.denominator.total
+        self.value = round(self.numerator.total / total, 4) if total else 0.0
+        return total >= self.min_count and self.value > self.threshold
+
+    def describe(self):
+        return f"{self.name}: ratio {self.value:.0%} in {self.numerator.window}s (threshold {self.threshold:.0%})"
+
+
+class AbsenceRule(Rule):
+    def __init__(self, spec, counter: _Counter, started: Optional[float]):
+        super().__init__(spec)
+        self.counter = counter
+        self.started = started  # event time the engine first saw; absence counts from there
+
+    def check(self, now):
+        self.value = self.counter.total
+        return self.value == 0 and now - self.started >= self.counter.window
+
+    def describe(self):
+        return f"{self.name}: no matching logs in the last {self.counter.window}s"
+
+
+class SequenceRule(Rule):
+    """
+    Fires when records matching steps[0], steps[1], ... arrive in that order
+    within `within` seconds, per value of the `by` field if given. Stays
+    active for `hold` seconds after the last completed sequence.
+    """
+
+    def __init__(self, spec, steps: List[_Predicate]):
+        super().__init__(spec)
+        self.steps = steps
+        self.within = spec.get("within", 60)
+        self.hold = spec.get("hold", self.within)
+        self.by = spec.get("by")
+        self.max_keys = spec.get("max_keys", 10000)
+        self.partial = OrderedDict()  # correlation value -> (next step, start time)
+        self.completed_at = None
+        self.value = 0
+
+    def step(self, matched_ids, log, timestamp: float) -> bool:
+        """Advance on one record (matched_ids: ids of the predicates it matched). True on completion."""
+        key = log.get(self.by) if self.by else None
+        if self.by and key is None:
+            return False
+        state = self.partial.get(key)
+        if state is not None:
+            index, start = state
+            if timestamp - start > self.within:
+                del self.partial[key]
+                state = None
+            elif self.steps[index].id in matched_ids:
+                if index + 1 == len(self.steps):
+                    del self.partial[key]
+                    self.completed_at = timestamp
+                    self.value += 1
+                    return True
+                self.partial[key] = (index + 1, start)
+                self.partial.move_to_end(key)
+                return False
+        if state is None and self.steps[0].id in matched_ids:
+            self.partial[key] = (1, timestamp)
+            self.partial.move_to_end(key)
+            if len(self.partial) > self.max_keys:
+                self.partial.popitem(last=False)
+        return False
+
+    def check(self, now):
+        return self.completed_at is not None and now - self.completed_at <= self.hold
+
+    def describe(self):
+        return f"{self.name}: sequence of {len(self.steps)} steps completed {self.value} times"
+
+
+class RuleEngine:
+    """
+    Anomaly rules from configuration, compiled so all rules share one pass per record.
+
+    Rule types (each with a unique name and an optional message):
+      count    - filter, window, threshold: at least threshold matches in window seconds
+      ratio    - numerator / denominator filters, window, threshold, min_count
+      absence  - filter, window: no match for window seconds
+      sequence - steps (list of filters), within, optional by (e.g. user_id), hold
+    A filter has any of level, service, source (a value or a list), pattern
+    (a regex searched in the message) and watch (labels of the watch list,
+    see processor.matcher); count and absence rules take it inline.
+    message overrides the anomaly text reported while the rule is active.
+
+    Identical filters are compiled once and dispatched through an index on
+    level/service/source, so a record only runs the regexes of filters whose
+    fields it matches, each once. Matches increment shared per-second counters;
+    only rules whose counters changed (or whose deadline passed) are
+    re-evaluated by refresh() / evaluate(); version counts rules turning on or off.
+    """
+
+    def __init__(self, rules: Optional[List[Dict]] = None):
+        self._specs = rules
+        self.rules = []
+        self._predicates = {}   # canonical filter -> _Predicate
+        self._index = {}        # level -> service -> source -> [_Predicate] (None = any)
+        self._counters = {}     # (predicate id, window) -> _Counter
+        self._by_predicate = {}  # predicate id -> [_Counter]
+        self._sequences = []
+        self._dirty = set()
+        self._expiry = []       # (time, seq, _Counter)
+        self._wakeups = []      # (time, seq, Rule)
+        self._seq = itertools.count()
+        self._activations = itertools.count(1)
+        self.version = 0
+        self._absence = []
+        self.started = None
+        names = set()
+        for spec in DEFAULT_RULES if rules is None else rules:
+            rule = self._compile(spec)
+            if rule.name in names:
+                raise ValueError(f"Duplicate rule name '{rule.name}'")
+            names.add(rule.name)
+            self.rules.append(rule)
+            self._dirty.add(rule)
+
+    def _predicate(self, spec: Dict, rule_name: str) -> _Predicate:
+        fields = {}
+        for name in FILTER_FIELDS:
+            value = spec.get(name)
+            if value is not None:
+                values = value if isinstance(value, (list, tuple)) else [value]
+                fields[name] = tuple(sorted(str(v).upper() if name == "level" else str(v) for v in values))
+        pattern = spec.get("pattern")
+        watch = spec.get("watch")
+        if watch is not None:
+            watch = frozenset(watch if isinstance(watch, (list, tuple)) else [watch])
+        unknown = set(spec) - set(FILTER_FIELDS) - {"pattern", "watch"}
+        if unknown:
+            raise ValueError(f"Rule '{rule_name}': unknown filter fields {sorted(unknown)}")
+        canonical = (tuple(sorted(fields.items())), pattern, watch)
+        predicate = self._predicates.get(canonical)
+        if predicate is not None:
+            return predicate
+        try:
+            regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f"Rule '{rule_name}': invalid pattern: {e}") from None
+        predicate = self._predicates[canonical] = _Predicate(len(self._predicates), fields, regex, watch)
+        for level in fields.get("level", (None,)):
+            for service in fields.get("service", (None,)):
+                for source in fields.get("source", (None,)):
+                    by_service = self._index.setdefault(level, {}).setdefault(service, {})
+                    by_service.setdefault(source, []).append(predicate)
+        return predicate
+
+    def _counter(self, predicate: _Predicate, window: float) -> _Counter:
+        counter = self._counters.get((predicate.id, window))
+        if counter is None:
+            counter = self._counters[predicate.id, window] = _Counter(predicate, window)
+            self._by_predicate.setdefault(predicate.id, []).append(counter)
+        return counter
+
+    def _compile(self, spec: Dict) -> Rule:
+        name = spec.get("name")
+        rule_type = spec.get("type", "count")
+        if not name:
+            raise ValueError(f"Rule without a name: {spec}")
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Rule '{name}': unknown type '{rule_type}' (expected one of {list(RULE_TYPES)})")
+        spec = dict(spec, type=rule_type)
+        options = {"name", "type", "message", "window", "threshold", "min_count", "numerator", "denominator",
+                   "steps", "within", "by", "hold", "max_keys"}
+        inline = {key: value for key, value in spec.items() if key not in options}
+        window = spec.get("window", 60)
+        if rule_type == "count":
+            rule = CountRule(spec, self._counter(self._predicate(inline, name), window))
+        elif rule_type == "absence":
+            rule = AbsenceRule(spec, self._counter(self._predicate(inline, name), window), self.started)
+            self._absence.append(rule)
+        elif rule_type == "ratio":
+            if "numerator" not in spec:
+                raise ValueError(f"Rule '{name}': ratio rules need a numerator filter")
+            rule = RatioRule(spec, self._counter(self._predicate(spec["numerator"], name), window),
+                             self._counter(self._predicate(spec.get("denominator") or {}, name), window))
+        else:
+            steps = spec.get("steps") or []
+            if len(steps) < 2:
+                raise ValueError(f"Rule '{name}': sequence rules need at least two steps")
+            rule = SequenceRule(spec, [self._predicate(step, name) for step in steps])
+            self._sequences.append(rule)
+        for counter in (getattr(rule, attr, None) for attr in ("counter", "numerator", "denominator")):
+            if counter is not None:
+                counter.rules.append(rule)
+        return rule
+
+    def _match(self, log) -> List[_Predicate]:
+        level, service, source = log.get("level"), log.get("service_id"), log.get("source")
+        matched = []
+        for level_key in (level, None) if level is not None else (None,):
+            by_service = self._index.get(level_key)
+            if not by_service:
+                continue
+            for service_key in (service, None) if service is not None else (None,):
+                by_source = by_service.get(service_key)
+                if not by_source:
+                    continue
+                for source_key in (source, None) if source is not None else (None,):
+                    matched.extend(by_source.get(source_key, ()))
+        if not matched:
+            return matched
+        message = log.get("message") or ""
+        searched = {}  # regex -> result, so shared patterns run once per record
+        result = []
+        for predicate in matched:
+            if predicate.watch is not None and predicate.watch.isdisjoint(log.get("watch") or ()):
+                continue
+            regex = predicate.regex
+            if regex is not None:
+                hit = searched.get(regex)
+                if hit is None:
+                    hit = searched[regex] = regex.search(message) is not None
+                if not hit:
+                    continue
+            result.append(predicate)
+        return result
+
+    def observe(self, log, now: float):
+        """One pass over a record; now is the event clock."""
+        if self.started is None:
+            self._start(now)
+        matched = self._match(log)
+        if not matched:
+            return
+        timestamp = min(log["timestamp"], now)
+        second = math.floor(timestamp)
+        for predicate in matched:
+            for counter in self._by_predicate.get(predicate.id, ()):
+                if second <= math.floor(now) - counter.window:
+                    continue  # already outside this counter's window
+                if counter.add(second):
+                    heapq.heappush(self._expiry, (counter.next_expiry(), next(self._seq), counter))
+                self._dirty.update(counter.rules)
+        if self._sequences:
+            matched_ids = {predicate.id for predicate in matched}
+            for rule in self._sequences:
+                if rule.step(matched_ids, log, timestamp):
+                    self._dirty.add(rule)
+
+    def _start(self, now: float):
+        self.started = now
+        for rule in self._absence:
+            rule.started = now
+            heapq.heappush(self._wakeups, (now + rule.counter.window, next(self._seq), rule))
+
+    def refresh(self, now: float) -> bool:
+        """Re-evaluate the rules whose inputs changed; returns whether any turned on or off."""
+        if self.started is None:
+            self._start(now)
+        while self._expiry and self._expiry[0][0] <= now:
+            _, _, counter = heapq.heappop(self._expiry)
+            if counter.expire(now):
+                self._dirty.update(counter.rules)
+                if counter.seconds:
+                    heapq.heappush(self._expiry, (counter.next_expiry(), next(self._seq), counter))
+        while self._wakeups and self._wakeups[0][0] <= now:
+            self._dirty.add(heapq.heappop(self._wakeups)[2])
+        dirty, self._dirty = self._dirty, set()
+        version = self.version
+        for rule in dirty:
+            active = rule.check(now)
+            if active and not rule.active:
+                rule.since = now
+                rule.activation = next(self._activations)
+            elif not active:
+                rule.since = rule.activation = None
+            if active != rule.active:
+                self.version += 1
+            rule.active = active
+            if isinstance(rule, SequenceRule) and active:
+                heapq.heappush(self._wakeups, (rule.completed_at + rule.hold + 1, next(self._seq), rule))
+            elif isinstance(rule, AbsenceRule) and not active and rule.value == 0:
+                heapq.heappush(self._wakeups, (rule.started + rule.counter.window, next(self._seq), rule))
+        return self.version != version
+
+    def evaluate(self, now: float) -> List[Dict]:
+        """refresh(), then the results of the active rules."""
+        self.refresh(now)
+        return [rule.result() for rule in self.rules if rule.active]
+
+    def states(self) -> List[Dict]:
+        return [rule.result() for rule in self.rules]
+
+    def clear(self):
+        # Activation ids and the version keep counting, so consumers never see an id twice
+        activations, version = self._activations, self.version
+        self.__init__(self._specs)
+        self._activations, self.version = activations, version + 1
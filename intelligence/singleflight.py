@@ -0,0 +1,119 @@
+"""
+Request coalescing for expensive model-backed computations
+"""
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution: the first caller
+    runs fn, the others wait for its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _join(self, key):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _run(self, key, fn, future: Future):
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do(self, key, fn: Callable):
+        """fn() run once for all concurrent callers with key; blocks until it returns."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, fn, future)
+        return future.result()
+
+    def start(self, key, fn: Callable) -> Future:
+        """Like do(), but fn runs on a background thread; returns its future at once."""
+        future, leader = self._join(key)
+        if leader:
+            threading.Thread(target=self._run, args=(key, fn, future), daemon=True).start()
+        return future
+
+
+class CachedCall:
+    """
+    Result of fn() cached per version of its input (e.g. the analyzer window).
+    Runs go through a SingleFlight: callers arriving while one is in progress
+    share it instead of starting their own, even if the version moved on
+    meanwhile (under steady ingest it moves with every record).
+
+    Stale-while-revalidate: when the version moved on, get() returns the last
+    result at once (if younger than max_stale seconds) and, once that result
+    is refresh_interval seconds old, recomputes it in the background. Without
+    a usable result, or with stale_ok=False, callers wait for a fresh one.
+    """
+
+    def __init__(self, fn: Callable, refresh_interval: float = 30, max_stale: float = 300):
+        self.fn = fn
+        self.refresh_interval = refresh_interval
+        self.max_stale = max_stale
+        self._flight = SingleFlight()
+        self._entry = None  # (version, result, computed_at)
+        self.computed = 0
+        self.stale_served = 0
+
+    def _compute(self, version):
+        result = self.fn()
+        self._entry = (version, result, time.time())
+        self.computed += 1
+        return result
+
+    def _refresh(self, version):
+        if self._flight.in_flight():
+            return
+        future = self._flight.start(self, lambda: self._compute(version))
+        future.add_done_callback(
+            lambda f: f.exception() and logger.warning(f"Background refresh failed: {f.exception()}")
+        )
+
+    def get(self, version: Hashable, stale_ok: bool = True):
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        if stale_ok and entry is not None:
+            age = time.time() - entry[2]
+            if age < self.max_stale:
+                if age >= self.refresh_interval:
+                    self._refresh(version)
+                self.stale_served += 1
+                return entry[1]
+        return self._flight.do(self, lambda: self._compute(version))
+
+    def age(self) -> Optional[float]:
+        return None if self._entry is None else time.time() - self._entry[2]
+
+    def clear(self):
+        self._entry = None
+
+    def stats(self) -> Dict:
+        return {
+            "computed": self.computed,
+            "stale_served": self.stale_served,
+            "in_flight": self._flight.in_flight(),
+            "age": self.age(),
+        }
@@ -0,0 +1,264 @@
+"""
+Streaming sketches: heavy hitters, frequencies and distinct counts in fixed memory
+"""
+import heapq
+import math
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MASK64 = (1 << 64) - 1
+LEVELS = ("INFO", "WARNING", "ERROR", "CRITICAL")  # anything else is sketched as OTHER
+
+
+def _hash64(value: str) -> int:
+    return hash((value, 0x9E3779B97F4A7C15)) & MASK64
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters (Metwally et al., 2005) with k counters. An item's count
+    is overestimated by at most its error, and any item occurring more than
+    N/k times is guaranteed to be tracked.
+    """
+
+    __slots__ = ("k", "counts", "errors", "_heap")
+
+    def __init__(self, k: int = 20):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, item), one entry per tracked item, possibly stale (counts only grow)
+
+    def add(self, item: str, count: int = 1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        heap = self._heap
+        if len(counts) < self.k:
+            counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(heap, (count, item))
+            return
+        # Refresh stale entries until the top of the heap is the true minimum
+        while heap[0][0] != counts[heap[0][1]]:
+            heapq.heapreplace(heap, (counts[heap[0][1]], heap[0][1]))
+        minimum, victim = heap[0]
+        del counts[victim], self.errors[victim]
+        counts[item] = minimum + count
+        self.errors[item] = minimum
+        heapq.heapreplace(heap, (minimum + count, item))
+
+    def floor(self) -> int:
+        """Upper bound on the count of any untracked item."""
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+
+def merge_top(summaries: List[SpaceSaving], k: int) -> List[Dict]:
+    """Top k over several summaries; counts are summed, untracked items bounded by each floor."""
+    totals, errors = {}, {}
+    for summary in summaries:
+        for item, count in summary.counts.items():
+            totals[item] = totals.get(item, 0) + count
+            errors[item] = errors.get(item, 0) + summary.errors[item]
+    floors = [(summary, summary.floor()) for summary in summaries]
+    for item in totals:
+        for summary, floor in floors:
+            if floor and item not in summary.counts:
+                errors[item] += floor
+    top = heapq.nlargest(k, totals.items(), key=lambda entry: entry[1])
+    return [{"value": item, "count": count, "error": errors[item]} for item, count in top]
+
+
+class CountMinSketch:
+    """
+    Frequency estimates (Cormode & Muthukrishnan, 2005): never below the true
+    count, above it by at most e/width of the total with probability 1 - e^-depth.
+    """
+
+    __slots__ = ("width", "depth", "table")
+
+    def __init__(self, width: int = 512, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = array("q", [0]) * (width * depth)
+
+    def cells(self, item: str) -> List[int]:
+        h = _hash64(item)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1):
+        h = _hash64(item)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        width, table = self.width, self.table
+        for row in range(self.depth):
+            table[row * width + (h1 + row * h2) % width] += count
+
+    def estimate(self, item: str) -> int:
+        return estimate_sum([self], item)
+
+
+def estimate_sum(sketches: List[CountMinSketch], item: str) -> int:
+    """Estimate of item's count summed over sketches of the same shape."""
+    if not sketches:
+        return 0
+    cells = sketches[0].cells(item)
+    return min(sum(sketch.table[cell] for sketch in sketches) for cell in cells)
+
+
+class HyperLogLog:
+    """
+    Distinct count (Flajolet et al., 2007) in 2^precision one-byte registers;
+    standard error about 1.04 / sqrt(2^precision), 1.6% at the default 12.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str):
+        h = _hash64(item)
+        rest_bits = 64 - self.precision
+        index = h >> rest_bits
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        return distinct_union([self])
+
+
+def distinct_union(sketches: List[HyperLogLog]) -> int:
+    """Distinct count of the union of sketches of the same precision."""
+    if not sketches:
+        return 0
+    registers = np.maximum.reduce([np.frombuffer(sketch.registers, dtype=np.uint8) for sketch in sketches])
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int32)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+    return int(round(estimate))
+
+
+class _Pane:
+    __slots__ = ("top", "frequency", "distinct")
+
+    def __init__(self):
+        self.top = {}        # (dimension, level) -> SpaceSaving
+        self.frequency = {}  # (dimension, level) -> CountMinSketch
+        self.distinct = {}   # (dimension, level) -> HyperLogLog
+
+
+class WindowSketches:
+    """
+    Heavy hitters (Space-Saving), frequencies (Count-Min) and distinct counts
+    (HyperLogLog) per dimension and level over a sliding event-time window.
+
+    The window is split into panes of pane_seconds, each holding its own
+    sketches; queries merge the panes overlapping the window (so it may reach
+    up to one pane further back) and expired panes are dropped whole. Memory is
+    fixed whatever the cardinality: at most window/pane + 1 panes, each with one
+    sketch per dimension and level.
+    """
+
+    def __init__(self, window_seconds: float = 60, pane_seconds: float = 10,
+                 dimensions=("service_id", "user_id", "source"), distinct=("user_id", "request_id"),
+                 top_k: int = 20, cm_width: int = 512, cm_depth: int = 4, hll_precision: int = 12):
+        self.window_seconds = window_seconds
+        self.pane_seconds = pane_seconds
+        self.panes_kept = math.ceil(window_seconds / pane_seconds) + 1
+        self.dimensions = tuple(dimensions)
+        self.distinct_dimensions = tuple(distinct)
+        self.top_k = top_k
+        self.cm_width = cm_width
+        self.cm_depth = cm_depth
+        self.hll_precision = hll_precision
+        self._panes = {}  # pane index -> _Pane
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        oldest = math.floor(now / self.pane_seconds) - self.panes_kept
+        for index in [index for index in self._panes if index <= oldest]:
+            del self._panes[index]
+
+    def add(self, log, now: float):
+        """Sketch one record; now is the event clock (records ahead of it go to its pane)."""
+        current = math.floor(now / self.pane_seconds)
+        index = min(math.floor(log["timestamp"] / self.pane_seconds), current)
+        if index <= current - self.panes_kept:
+            return
+        level = log["level"] if log["level"] in LEVELS else "OTHER"
+        with self._lock:
+            pane = self._panes.get(index)
+            if pane is None:
+                self._expire(now)
+                pane = self._panes[index] = _Pane()
+            for dimension in self.dimensions:
+                value = log.get(dimension)
+                if value is None:
+                    continue
+                value = str(value)
+                key = (dimension, level)
+                top = pane.top.get(key)
+                if top is None:
+                    top = pane.top[key] = SpaceSaving(self.top_k)
+                    pane.frequency[key] = CountMinSketch(self.cm_width, self.cm_depth)
+                top.add(value)
+                pane.frequency[key].add(value)
+            for dimension in self.distinct_dimensions:
+                value = log.get(dimension)
+                if value is None:
+                    continue
+                key = (dimension, level)
+                sketch = pane.distinct.get(key)
+                if sketch is None:
+                    sketch = pane.distinct[key] = HyperLogLog(self.hll_precision)
+                sketch.add(str(value))
+
+    def clear(self):
+        with self._lock:
+            self._panes = {}
+
+    def _select(self, kind: str, dimension: str, level: Optional[str], now: float) -> list:
+        with self._lock:
+            self._expire(now)
+            return [
+                sketch
+                for pane in self._panes.values()
+                for (sketch_dimension, sketch_level), sketch in getattr(pane, kind).items()
+                if sketch_dimension == dimension and (level is None or sketch_level == level)
+            ]
+
+    def _check(self, dimension: str, allowed):
+        if dimension not in allowed:
+            raise ValueError(f"Unknown dimension '{dimension}' (expected one of {list(allowed)})")
+
+    def top(self, dimension: str, now: float, level: Optional[str] = None, k: int = 10) -> List[Dict]:
+        """Most frequent values of dimension in the window, for one level or all."""
+        self._check(dimension, self.dimensions)
+        return merge_top(self._select("top", dimension, level, now), k)
+
+    def estimate(self, dimension: str, value: str, now: float, level: Optional[str] = None) -> int:
+        """Occurrences of one value of dimension in the window (never underestimated)."""
+        self._check(dimension, self.dimensions)
+        return estimate_sum(self._select("frequency", dimension, level, now), str(value))
+
+    def distinct(self, dimension: str, now: float, level: Optional[str] = None) -> int:
+        """Approximate number of distinct values of dimension in the window."""
+        self._check(dimension, self.distinct_dimensions)
+        return distinct_union(self._select("distinct", dimension, level, now))
+
+    def summary(self, now: float, level: Optional[str] = None, k: int = 3) -> Dict:
+        return {
+            "top": {dimension: self.top(dimension, now, level, k) for dimension in self.dimensions},
+            "distinct": {dimension: self.distinct(dimension, now, level) for dimension in self.distinct_dimensions},
+        }
@@ -0,0 +1,179 @@
+"""
+Nearest-neighbour index over embedding vectors
+"""
+import math
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first."""
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Cosine-similarity k-nearest-neighbour search over float32 vectors, each
+    with an integer id.
+
+    Up to exact_max vectors every query is one matrix-vector product. Beyond
+    that an inverted file (IVF) is built in the background: spherical k-means
+    puts the vectors into nlist lists (sqrt(n) by default) and keeps them as
+    int8 codes with one scale per vector. A query then scores the codes of the
+    nprobe lists closest to it, reranks the best k * rerank with the float
+    vectors and scans the vectors added since the build exactly; the IVF is
+    rebuilt once more than exact_max vectors were added after it.
+    """
+
+    def __init__(self, exact_max: int = 50000, nlist: Optional[int] = None, nprobe: int = 8,
+                 rerank: int = 4, sample: int = 100000, iterations: int = 10):
+        self.exact_max = exact_max
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.sample = sample
+        self.iterations = iterations
+        self.dim = None
+        self.size = 0
+        self._vectors = None  # (capacity, dim) float32, unit length
+        self._ids = None      # (capacity,) int64
+        self._ivf = None      # _InvertedFile over the first ivf.size vectors
+        self._building = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def mode(self) -> str:
+        return "ivf" if self._ivf is not None else "exact"
+
+    def add(self, ids: Sequence[int], vectors):
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if not len(ids):
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._vectors = np.zeros((1024, self.dim), dtype=np.float32)
+                self._ids = np.zeros(1024, dtype=np.int64)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Vectors of dimension {vectors.shape[1]} do not match the index ({self.dim})")
+            end = self.size + len(ids)
+            if end > len(self._vectors):
+                capacity = max(end, 2 * len(self._vectors))
+                # New arrays rather than in-place resize: searches may still hold views of the old ones
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:self.size] = self._vectors[:self.size]
+                grown_ids = np.zeros(capacity, dtype=np.int64)
+                grown_ids[:self.size] = self._ids[:self.size]
+                self._vectors, self._ids = grown, grown_ids
+            self._vectors[self.size:end] = vectors
+            self._ids[self.size:end] = np.asarray(ids, dtype=np.int64)
+            self.size = end
+            stale = end > self.exact_max and (self._ivf is None or end - self._ivf.size > self.exact_max)
+            if stale and not self._building:
+                self._building = True
+                threading.Thread(target=self._build, daemon=True).start()
+
+    def search(self, query, k: int = 10) -> List[Tuple[int, float]]:
+        """Up to k (id, cosine similarity) pairs, most similar first."""
+        with self._lock:
+            n, vectors, ids, ivf = self.size, self._vectors, self._ids, self._ivf
+        if not n or k <= 0:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        if query.shape != (self.dim,):
+            raise ValueError(f"Query of dimension {query.shape[0]} does not match the index ({self.dim})")
+        if ivf is None:
+            rows = None
+            scores = vectors[:n] @ query
+        else:
+            rows = np.concatenate([ivf.candidates(query, self.nprobe, k * self.rerank), np.arange(ivf.size, n)])
+            scores = vectors[rows] @ query
+        best = _top_k(scores, k)
+        best_rows = best if rows is None else rows[best]
+        return [(int(ids[row]), float(score)) for row, score in zip(best_rows, scores[best])]
+
+    def build(self):
+        """Build the inverted file now (add() does it in the background when needed)."""
+        with self._lock:
+            self._building = True
+        self._build()
+
+    def _build(self):
+        try:
+            with self._lock:
+                n, vectors = self.size, self._vectors
+            nlist = self.nlist or max(int(math.sqrt(n)), 1)
+            ivf = _InvertedFile(vectors[:n], nlist, self.sample, self.iterations)
+            with self._lock:
+                self._ivf = ivf
+            logger.info(f"Built IVF index over {n} vectors in {nlist} lists")
+        except Exception as e:
+            logger.error(f"IVF build failed: {e}")
+        finally:
+            with self._lock:
+                self._building = False
+
+    def clear(self):
+        with self._lock:
+            self.dim, self.size = None, 0
+            self._vectors = self._ids = self._ivf = None
+
+
+class _InvertedFile:
+    """Spherical k-means lists over vectors, stored as int8 codes grouped by list."""
+
+    def __init__(self, vectors: np.ndarray, nlist: int, sample: int, iterations: int, chunk: int = 8192):
+        self.size = len(vectors)
+        rng = np.random.default_rng(0)
+        nlist = min(nlist, self.size)
+        training = vectors[rng.choice(self.size, min(sample, self.size), replace=False)]
+        centroids = training[rng.choice(len(training), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._assign(training, centroids, chunk)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, training)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            sums[empty] = training[rng.choice(len(training), int(empty.sum()))]  # reseed empty lists
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        assignment = self._assign(vectors, centroids, chunk)
+        self.order = np.argsort(assignment, kind="stable")  # rows grouped by list
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(nlist + 1))
+        grouped = vectors[self.order]
+        self.scales = (np.abs(grouped).max(axis=1) / 127.0).astype(np.float32)
+        self.scales[self.scales == 0] = 1.0
+        self.codes = np.round(grouped / self.scales[:, None]).astype(np.int8)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunk)
+        ])
+
+    def candidates(self, query: np.ndarray, nprobe: int, count: int) -> np.ndarray:
+        """Rows of the count best approximate matches within the nprobe nearest lists."""
+        lists = _top_k(self.centroids @ query, nprobe)
+        positions = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists])
+        if not len(positions):
+            return positions
+        approximate = (self.codes[positions].astype(np.float32) @ query) * self.scales[positions]
+        return self.order[positions[_top_k(approximate, count)]]
@@ -0,0 +1,182 @@
+"""
+Event-time window statistics for the analyzer
+"""
+import heapq
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EventTimeWindow:
+    """
+    Per-level log counts over event time (the records' own timestamps), kept in
+    one-second buckets so out-of-order records are inserted and evicted in O(log buckets).
+
+    Event clock: the newest event time seen, moving on with wall-clock time while
+    nothing newer arrives. A backfill therefore advances the clock at its own pace
+    and live traffic keeps it close to real time. Event times more than
+    allowed_lateness ahead of the wall clock do not move the clock.
+
+    Sliding window: the last window_seconds of event time. Records older than
+    that when they arrive are counted in `late` and left out. Besides the bucket
+    counts, each record in the window is a row of parallel NumPy columns
+    (timestamp, level code, template id; 13 bytes per row) for per-record
+    queries such as template_counts(). Rows are appended in arrival order and
+    the ones that left the window are dropped in bulk whenever the columns fill
+    up, so out-of-order records cost nothing extra to evict.
+
+    Tumbling windows: fixed tumbling_seconds intervals. One is closed once the
+    watermark (event clock - allowed_lateness) passes its end; its counts are
+    appended to `closed` (newest max_closed kept). Records for a closed interval
+    are counted in `dropped`.
+    """
+
+    def __init__(self, window_seconds: float = 60, tumbling_seconds: float = 60,
+                 allowed_lateness: float = 10, max_closed: int = 60, capacity: int = 1024):
+        self.window_seconds = window_seconds
+        self.tumbling_seconds = tumbling_seconds
+        self.allowed_lateness = allowed_lateness
+        self.buckets = {}        # second -> {level: count}, sliding window only
+        self._bucket_keys = []   # min-heap of bucket seconds
+        self.totals = {}         # level -> count over the sliding window
+        self.size = 0
+        self.tumbling = {}       # open interval start -> {level: count}
+        self._tumbling_starts = []
+        self.closed = deque(maxlen=max_closed)
+        self.max_event_time = None
+        self._max_seen_at = None
+        self.late = 0
+        self.dropped = 0
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.level_codes = np.empty(capacity, dtype=np.uint8)
+        self.template_ids = np.empty(capacity, dtype=np.int32)
+        self.rows = 0            # filled rows, including some that left the window
+        # Level names are assigned codes on first sight
+        self.level_names = []
+        self.level_index = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def now(self, wall: Optional[float] = None) -> float:
+        """Current event time."""
+        wall = time.time() if wall is None else wall
+        if self.max_event_time is None:
+            return wall
+        return self.max_event_time + max(wall - self._max_seen_at, 0.0)
+
+    def watermark(self, wall: Optional[float] = None) -> float:
+        return self.now(wall) - self.allowed_lateness
+
+    def level_code(self, level: str) -> int:
+        code = self.level_index.get(level)
+        if code is None:
+            if len(self.level_names) >= 255:
+                level = "OTHER"
+                code = self.level_index.get(level)
+            if code is None:
+                code = self.level_index[level] = len(self.level_names)
+                self.level_names.append(level)
+        return code
+
+    def _cutoff(self, now: float) -> int:
+        """Seconds at or before this one have left the sliding window."""
+        return math.floor(now) - self.window_seconds
+
+    def _make_room(self, now: float):
+        live = self.timestamps[:self.rows] >= self._cutoff(now) + 1
+        kept = int(np.count_nonzero(live))
+        capacity = len(self.timestamps)
+        if kept > capacity // 2:
+            capacity *= 2
+        for name in ("timestamps", "level_codes", "template_ids"):
+            column = getattr(self, name)
+            compacted = np.empty(capacity, dtype=column.dtype)
+            compacted[:kept] = column[:self.rows][live]
+            setattr(self, name, compacted)
+        self.rows = kept
+
+    def add(self, timestamp: float, level: str, wall: Optional[float] = None,
+            template_id: Optional[int] = None):
+        wall = time.time() if wall is None else wall
+        clock_time = min(timestamp, wall + self.allowed_lateness)
+        if self.max_event_time is None or clock_time > self.now(wall):
+            self.max_event_time = clock_time
+            self._max_seen_at = wall
+        now = self.advance(wall)
+
+        start = math.floor(timestamp / self.tumbling_seconds) * self.tumbling_seconds
+        if start + self.tumbling_seconds <= now - self.allowed_lateness:
+            self.dropped += 1
+        else:
+            counts = self.tumbling.get(start)
+            if counts is None:
+                counts = self.tumbling[start] = {}
+                heapq.heappush(self._tumbling_starts, start)
+            counts[level] = counts.get(level, 0) + 1
+
+        second = math.floor(timestamp)
+        if second <= self._cutoff(now):
+            self.late += 1
+            return
+        if self.rows == len(self.timestamps):
+            self._make_room(now)
+        row = self.rows
+        self.timestamps[row] = timestamp
+        self.level_codes[row] = self.level_code(level)
+        self.template_ids[row] = -1 if template_id is None else template_id
+        self.rows = row + 1
+        bucket = self.buckets.get(second)
+        if bucket is None:
+            bucket = self.buckets[second] = {}
+            heapq.heappush(self._bucket_keys, second)
+        bucket[level] = bucket.get(level, 0) + 1
+        self.totals[level] = self.totals.get(level, 0) + 1
+        self.size += 1
+
+    def advance(self, wall: Optional[float] = None) -> float:
+        """Move the clock: evict buckets that left the window, close tumbling intervals. Returns now."""
+        now = self.now(wall)
+        expired = self._cutoff(now)
+        keys = self._bucket_keys
+        while keys and keys[0] <= expired:
+            for level, count in self.buckets.pop(heapq.heappop(keys)).items():
+                self.totals[level] -= count
+                self.size -= count
+        watermark = now - self.allowed_lateness
+        starts = self._tumbling_starts
+        while starts and starts[0] + self.tumbling_seconds <= watermark:
+            start = heapq.heappop(starts)
+            self.closed.append({
+                "start": start,
+                "end": start + self.tumbling_seconds,
+                "counts": self.tumbling.pop(start),
+            })
+        return now
+
+    def clear(self):
+        self.__init__(self.window_seconds, self.tumbling_seconds, self.allowed_lateness, self.closed.maxlen,
+                      len(self.timestamps))
+
+    def level_counts(self) -> Dict[str, int]:
+        """Per-level counts over the sliding window, O(number of levels)."""
+        return {level: count for level, count in self.totals.items() if count}
+
+    def template_counts(self, now: float, level: Optional[str] = None, k: int = 10) -> List[Dict]:
+        """The k most frequent template ids in the sliding window (of one level if given), from the columns."""
+        live = self.timestamps[:self.rows] >= self._cutoff(now) + 1
+        live &= self.template_ids[:self.rows] >= 0
+        if level is not None:
+            code = self.level_index.get(level)
+            if code is None:
+                return []
+            live &= self.level_codes[:self.rows] == code
+        template_ids, counts = np.unique(self.template_ids[:self.rows][live], return_counts=True)
+        top = np.argsort(-counts, kind="stable")[:k]
+        return [{"template_id": int(template_ids[i]), "count": int(counts[i])} for i in top]
+
+    def closed_windows(self) -> List[Dict]:
+        return list(self.closed)
@@ -2,47 +2,50 @@ import argparse
 from collector import dir_collector
 from collector import cloudwatch_collector
 from collector import api_collector
+from collector import backfill
 from processor import parser
 from intelligence.analyzer import LogAnalyzer
-import boto3
-
-def get_latest_log_stream(group, region):
-    client = boto3.client('logs', region_name=region)
-    streams = client.describe_log_streams(
-        logGroupName=group,
-        orderBy='LastEventTime',
-        descending=True,
-        limit=1
-    )
-    if streams['logStreams']:
-        return streams['logStreams'][0]['logStreamName']
-    return None
+from collector.checkpoint import Checkpoint
 
 def main():
     parser_arg = argparse.ArgumentParser(description="Intelligent Log Analyzer")
     parser_arg.add_argument('--source', choices=['local', 'cloudwatch', 'api'], default='local', help='Log source: local directory, AWS CloudWatch, or API')
     parser_arg.add_argument('--group', type=str, help='CloudWatch log group name')
-    parser_arg.add_argument('--stream', type=str, help='CloudWatch log stream name')
+    parser_arg.add_argument('--stream', type=str, help='CloudWatch log stream name (default: follow every active stream of the group)')
     parser_arg.add_argument('--region', type=str, default='us-east-1', help='AWS region for CloudWatch')
     parser_arg.add_argument('--api-url', type=str, help='API endpoint for logs')
+    parser_arg.add_argument('--workers', type=int, help='Processes parsing the existing local logs (default: one per CPU)')
     args = parser_arg.parse_args()
 
     analyzer = LogAnalyzer(window_seconds=60)  # 1-min rolling window
 
+    def handle(parsed_log):
+        # Step 2: Feed into analyzer
+        analyzer.add_log(parsed_log)
+
+        # Step 3: Print structured output; the analysis only when a new snapshot is
+        # published (every tick or when an anomaly appears or clears)
+        print("\n Log:", parsed_log)
+        if not analyzer.tick():
+            return
+        analysis = analyzer.snapshot
+        if analysis["anomalies"]:
+            print("Anomalies Detected:", analysis["anomalies"])
+        else:
+            print("Analysis:", dict(analysis))
+
     if args.source == 'cloudwatch':
         if not args.group:
             print("Please provide --group for CloudWatch logs.")
             return
-        if not args.stream:
-            print("No stream specified, fetching latest log stream...")
-            latest_stream = get_latest_log_stream(args.group, args.region)
-            if not latest_stream:
-                print("No log streams found in group.")
-                return
-            args.stream = latest_stream
-            print(f"Auto-selected latest stream: {args.stream}")
-        print(f"🔍 Watching CloudWatch logs: group={args.group}, stream={args.stream}...")
-        log_iter = cloudwatch_collector.cloudwatch_logs(args.group, args.stream, args.region)
+        if args.stream:
+            print(f"🔍 Watching CloudWatch logs: group={args.group}, stream={args.stream}...")
+        else:
+            print(f"🔍 Watching all active streams of CloudWatch group {args.group}...")
+        log_iter = cloudwatch_collector.cloudwatch_group_logs(
+            args.group, args.region, checkpoint=Checkpoint("cloudwatch_tokens.json"),
+            stream_names=[args.stream] if args.stream else None
+        )
     elif args.source == 'api':
         if not args.api_url:
             print("Please provide --api-url for API log source.")
@@ -51,23 +54,21 @@ def main():
         log_iter = api_collector.fetch_logs_from_api(args.api_url)
     else:
         print("🔍 Watching logs/ directory... (append logs to see results)")
-        log_iter = dir_collector.tail_directory("logs")
+        # Lines already on disk are parsed across processes; tailing starts where that stopped
+        offsets = Checkpoint(None)
 
-    for raw_log in log_iter:
-        # Step 1: Parse log
-        parsed_log = parser.parse_log(raw_log["message"])
-        parsed_log.update(raw_log)  # add timestamp + source
+        def handle_batch(parsed_logs):
+            for parsed_log in parsed_logs:
+                handle(parsed_log)
 
-        # Step 2: Feed into analyzer
-        analyzer.add_log(parsed_log)
-        analysis = analyzer.analyze()
+        backfill.backfill_directory("logs", handle_batch, checkpoint=offsets, workers=args.workers)
+        log_iter = dir_collector.tail_directory("logs", checkpoint=offsets)
 
-        # Step 3: Print structured output
-        print("\n Log:", parsed_log)
-        if analysis["anomalies"]:
-            print("Anomalies Detected:", analysis["anomalies"])
-        else:
-            print("Analysis:", analysis)
+    for raw_log in log_iter:
+        # Step 1: Parse log
+        parsed_log = dict(raw_log)  # timestamp + source
+        parsed_log.update(parser.parse_log(raw_log["message"]))
+        handle(parsed_log)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
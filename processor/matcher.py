@@ -0,0 +1,150 @@
+import os
+import re
+import time
+import json
+import threading
+
+import yaml
+
+WORD_CHARS = re.compile(r"\w")
+
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of many keywords in one pass over a line.
+
+    keywords maps a label (a log level, a watch name) to the phrases that
+    signal it. All phrases are compiled once into a single regex shaped like a
+    trie, e.g. err(?:or)?|fa(?:tal|il(?:ed|ure)), wrapped in a lookahead so it is
+    tried at every position and overlapping matches are all found: the longest
+    phrase starting at a position is matched and the shorter phrases that are
+    its prefixes are derived from a table. Per position the engine only walks
+    the trie, so the cost per line barely depends on how many phrases there are.
+
+    Matching is case-insensitive unless case_sensitive is set: lines are
+    lowercased like str.lower() (match positions then refer to the lowered
+    line, which only differs from the original for some non-ASCII text).
+    With whole_words, matches must not touch a letter, digit or underscore.
+    """
+
+    def __init__(self, keywords, case_sensitive=False, whole_words=False):
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self._labels = {}  # phrase -> labels
+        for label, phrases in keywords.items():
+            for phrase in ([phrases] if isinstance(phrases, str) else phrases):
+                phrase = str(phrase) if case_sensitive else str(phrase).lower()
+                if phrase:
+                    self._labels.setdefault(phrase, []).append(label)
+        trie = {}
+        for phrase in self._labels:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = True  # end of a phrase
+        # phrase -> shorter phrases that are its prefixes (longest first)
+        self._prefixes = {}
+        for phrase in self._labels:
+            node, prefixes = trie, []
+            for length, char in enumerate(phrase[:-1], 1):
+                node = node[char]
+                if "" in node:
+                    prefixes.append(phrase[:length])
+            self._prefixes[phrase] = prefixes[::-1]
+        self._regex = re.compile(f"(?=({self._trie_pattern(trie)}))") if self._labels else None
+
+    def _trie_pattern(self, trie):
+        def build(node):
+            ends = "" in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # Greedy optional after a phrase end: the longest phrase wins, its prefixes come from the table
+            return f"(?:{body})?" if ends else body
+
+        return build(trie)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def finditer(self, text):
+        """All (start, end, phrase, labels) in the line, overlapping ones included, by start position."""
+        if self._regex is None:
+            return []
+        if not self.case_sensitive:
+            text = text.lower()
+        matches = []
+        for match in self._regex.finditer(text):
+            start = match.start()
+            longest = match.group(1)
+            for phrase in [longest] + self._prefixes[longest]:
+                end = start + len(phrase)
+                if self.whole_words and (
+                    (start and WORD_CHARS.match(text, start - 1)) or (end < len(text) and WORD_CHARS.match(text, end))
+                ):
+                    continue
+                matches.append((start, end, phrase, self._labels[phrase]))
+        return matches
+
+    def labels(self, text):
+        """Set of labels with at least one phrase in the line."""
+        found = set()
+        for _, _, _, labels in self.finditer(text):
+            found.update(labels)
+        return found
+
+
+class ReloadingMatcher:
+    """
+    KeywordMatcher compiled from a YAML or JSON file mapping labels to phrases
+    (merged over the fixed `keywords`), recompiled when the file's modification
+    time changes; checked at most every check_interval seconds. A file that
+    fails to load keeps the previous matcher.
+    """
+
+    def __init__(self, path, keywords=None, check_interval=5.0, **options):
+        self.path = path
+        self.keywords = dict(keywords or {})
+        self.check_interval = check_interval
+        self.options = options
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._matcher = KeywordMatcher(self.keywords, **options)
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        keywords = dict(self.keywords)
+        if mtime is not None:
+            try:
+                with open(self.path, "r") as f:
+                    loaded = json.load(f) if self.path.endswith(".json") else yaml.safe_load(f)
+                if loaded and not isinstance(loaded, dict):
+                    raise ValueError("expected a mapping of label -> phrases")
+                keywords.update(loaded or {})
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                print(f"[Matcher] Failed to load {self.path}: {e}")
+                return
+        self._matcher = KeywordMatcher(keywords, **self.options)
+        self._mtime = mtime
+        print(f"[Matcher] Compiled {len(self._matcher)} patterns from {self.path}")
+
+    @property
+    def matcher(self):
+        now = time.time()
+        if now - self._checked >= self.check_interval:
+            with self._lock:
+                if now - self._checked >= self.check_interval:
+                    self._checked = now
+                    self._reload()
+        return self._matcher
+
+    def labels(self, text):
+        return self.matcher.labels(text)
@@ -1,5 +1,12 @@
+import os
 import re
+import sys
 import json
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
 
 # Regex patterns to detect log levels
 LOG_LEVELS = {
@@ -9,57 +16,216 @@ LOG_LEVELS = {
     "CRITICAL": re.compile(r"critical", re.IGNORECASE),
 }
 
+# [LEVEL] tag or whole LEVEL word in one search, on the lowercased line
+LEVEL_PATTERN = re.compile(r"\[(error|warning|info|critical)\]|\b(error|warning|info|critical)\b")
+BRACKET_PATTERN = re.compile(r"\[(error|warning|info|critical)\]")
+# Non-ASCII lines keep the case-insensitive patterns: Unicode case folding
+# (e.g. "İ" matching "i") does not survive str.lower()
+BRACKET_PATTERN_I = re.compile(r"\[(ERROR|WARNING|INFO|CRITICAL)\]", re.IGNORECASE)
+WORD_PATTERN_I = re.compile(r"\b(ERROR|WARNING|INFO|CRITICAL)\b", re.IGNORECASE)
+SUBSTRINGS = [(level, pattern.pattern) for level, pattern in LOG_LEVELS.items()]
+JSON_WHITESPACE = " \t\n\r"
+
+# Plain-text header written by log_generator.write_log:
+# 2025-08-26 12:00:00 ERROR [user3] [svc-db] [req-1234] Timeout
+# The time and the [user] [service] [request] fields are optional.
+HEADER_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)?)\s+"
+    r"(?:ERROR|WARNING|WARN|INFO|CRITICAL|DEBUG)\s+"
+    r"(?:\[([^\]]*)\]\s+\[([^\]]*)\]\s+\[([^\]]*)\]\s*)?",
+    re.IGNORECASE,
+)
+JSON_FIELDS = ("user_id", "service_id", "request_id")
+# Layout of the rows returned by parse_batch
+FIELDS = ("timestamp", "level", "message") + JSON_FIELDS
+
+
+def _categorize_text(message: str) -> str:
+    """
+    Level of a plain-text line, by precedence: a [LEVEL] tag, then the first LEVEL
+    word, then any level keyword as a substring (ERROR > WARNING > INFO > CRITICAL).
+    """
+    if not message.isascii():
+        match = BRACKET_PATTERN_I.search(message) or WORD_PATTERN_I.search(message)
+        if match:
+            return match.group(1).upper()
+        for level, pattern in LOG_LEVELS.items():
+            if pattern.search(message):
+                return level
+        return "INFO"
+
+    lowered = message.lower()
+    match = LEVEL_PATTERN.search(lowered)
+    if match:
+        if match.group(1):
+            return match.group(1).upper()
+        # A [LEVEL] tag further on still beats this word
+        if "[" in lowered:
+            tagged = BRACKET_PATTERN.search(lowered, match.end())
+            if tagged:
+                return tagged.group(1).upper()
+        return match.group(2).upper()
+    for level, substring in SUBSTRINGS:
+        if substring in lowered:
+            return level
+    return "INFO"
+
+
+@lru_cache(maxsize=4096)
+def _local_epoch(text: str):
+    # Lines of the same second share the string, so the cache absorbs most calls
+    try:
+        return datetime.fromisoformat(text.replace(",", ".")).timestamp()
+    except ValueError:
+        return None
+
+
+def _epoch(value):
+    """Epoch seconds for a numeric or ISO-8601 timestamp, None if it cannot be read."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        return _local_epoch(value)
+    return None
+
+
+def _intern(value):
+    # Levels, users and services repeat: one shared object each, so a pickled batch
+    # stores them once
+    return sys.intern(value) if type(value) is str else value
+
+
+def _parse_line(message: str) -> tuple:
+    """One line -> (timestamp, level, message, user_id, service_id, request_id); None where absent."""
+    # Only a line starting with '{' can be a JSON object; plain text skips json.loads
+    if message.lstrip(JSON_WHITESPACE)[:1] == "{":
+        try:
+            msg_obj = json.loads(message)
+            if isinstance(msg_obj, dict) and "level" in msg_obj:
+                user_id = msg_obj.get("user_id")
+                service_id = msg_obj.get("service_id")
+                request_id = msg_obj.get("request_id")
+                return (
+                    _epoch(msg_obj.get("timestamp")),
+                    _intern(msg_obj.get("level", "INFO")),
+                    msg_obj.get("message", message),
+                    None if user_id is None else _intern(str(user_id)),
+                    None if service_id is None else _intern(str(service_id)),
+                    None if request_id is None else str(request_id),
+                )
+        except Exception:
+            pass
+
+    level = _categorize_text(message)
+    header = HEADER_PATTERN.match(message)
+    if not header:
+        return None, level, message, None, None, None
+    # A bare date is too coarse for the analyzer windows; keep the receive time then
+    timestamp = _local_epoch(header.group(1)) if len(header.group(1)) > 10 else None
+    user_id, service_id, request_id = header.group(2, 3, 4)
+    return timestamp, level, message[header.end():], _intern(user_id), _intern(service_id), request_id
+
+
+def _apply_row(log: dict, row: tuple) -> dict:
+    timestamp, log["level"], log["message"], user_id, service_id, request_id = row
+    if timestamp is not None:
+        log["timestamp"] = timestamp
+    if user_id is not None:
+        log["user_id"] = user_id
+    if service_id is not None:
+        log["service_id"] = service_id
+    if request_id is not None:
+        log["request_id"] = request_id
+    return log
+
 
 def categorize_log(log: dict) -> dict:
     """
     Takes a log dict (from collector) and adds a 'level' field.
     Example input: {"message": "2025-08-26 ERROR Database down"}
     Example output: {"message": "...", "level": "ERROR"}
-    """
-    message = log.get("message", "")
 
-    # Try to parse JSON log message
-    try:
-        msg_obj = json.loads(message)
-        if isinstance(msg_obj, dict) and "level" in msg_obj:
-            log["level"] = msg_obj.get("level", "INFO")
-            log["message"] = msg_obj.get("message", message)
-            if "timestamp" in msg_obj:
-                log["timestamp"] = msg_obj["timestamp"]
-            return log
-    except Exception:
-        pass
-
-    # Try to extract [LEVEL] from bracketed log lines
-    bracket_match = re.search(r"\[(ERROR|WARNING|INFO|CRITICAL)\]", message, re.IGNORECASE)
-    if bracket_match:
-        log["level"] = bracket_match.group(1).upper()
-        return log
-
-    # Try to extract LEVEL from space-separated log lines (e.g. '2025-08-26 ERROR ...')
-    space_match = re.search(r"\b(ERROR|WARNING|INFO|CRITICAL)\b", message, re.IGNORECASE)
-    if space_match:
-        log["level"] = space_match.group(1).upper()
-        return log
-
-    # Fallback to regex patterns
-    for level, pattern in LOG_LEVELS.items():
-        if pattern.search(message):
-            log["level"] = level
-            return log
-
-    # Default to INFO if nothing matches
-    log["level"] = "INFO"
-    return log
+    When the line carries them, 'timestamp' (epoch seconds), 'user_id', 'service_id'
+    and 'request_id' are set too and 'message' is reduced to the body, for JSON and
+    plain-text lines alike.
+    """
+    return _apply_row(log, _parse_line(log.get("message", "")))
 
 
 def parse_log(log_message: str) -> dict:
     """
     Wrapper for main.py — accepts a raw message string and returns structured log.
+    Collectors merge it over their raw record, so fields found in the line win.
     """
     return categorize_log({"message": log_message})
 
 
+def parse_batch(lines) -> list:
+    """
+    Parse many lines at once. Returns one compact row per line, in order:
+    a tuple laid out as FIELDS, with None for fields the line does not carry.
+    row_to_dict turns a row into the dict parse_log would have returned.
+    """
+    return [_parse_line(line) for line in lines]
+
+
+def row_to_dict(row: tuple) -> dict:
+    return _apply_row({}, row)
+
+
+class ParallelParser:
+    """
+    parse_batch sharded across a process pool, for batches big enough to pay for it.
+
+    Batches are cut into chunks of about chunk_bytes (the line count adapts to the
+    average line length of the batch) and the rows come back in input order.
+    Batches under inline_below lines are parsed in the calling thread.
+    """
+
+    def __init__(self, workers=None, chunk_bytes=256 * 1024, inline_below=2000):
+        self.workers = workers or os.cpu_count()
+        self.chunk_bytes = chunk_bytes
+        self.inline_below = inline_below
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            return self._pool
+
+    def chunk_lines(self, lines) -> int:
+        """Lines per chunk: chunk_bytes divided by the average length of a sample of lines."""
+        sample = lines[:: max(len(lines) // 100, 1)]
+        average = sum(map(len, sample)) / len(sample) + 1
+        return max(int(self.chunk_bytes / average), 1)
+
+    def parse(self, lines) -> list:
+        lines = list(lines)
+        if len(lines) < self.inline_below or self.workers <= 1:
+            return parse_batch(lines)
+        size = self.chunk_lines(lines)
+        chunks = [lines[i:i + size] for i in range(0, len(lines), size)]
+        rows = []
+        for part in self._get_pool().map(parse_batch, chunks):
+            rows.extend(part)
+        return rows
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 if __name__ == "__main__":
     # Test with dummy logs
     sample_logs = [
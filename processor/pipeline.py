@@ -0,0 +1,243 @@
+import time
+import queue
+import threading
+
+
+class Stage:
+    """
+    One pipeline stage: worker threads that pull micro-batches from a bounded queue,
+    run fn(batch) and hand the result to the next stages.
+
+    A full queue blocks the producer (backpressure) unless the stage is lossy, in
+    which case the oldest pending batch is dropped to make room.
+
+    Batches may carry done callbacks. They travel with the records along the first
+    lossless output and are called with True once the last stage has processed the
+    records (or a stage's fn left nothing to pass on), or with False if a stage's fn
+    failed on them.
+    """
+
+    def __init__(self, name, fn, queue_size=1000, batch_size=500, batch_timeout=0.05,
+                 workers=1, lossy=False):
+        self.name = name
+        self.fn = fn
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.workers = workers
+        self.lossy = lossy
+        self.outputs = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "processed": 0, "batches": 0, "errors": 0, "dropped": 0,
+            "latency_ms_avg": 0.0, "latency_ms_max": 0.0, "wait_ms_avg": 0.0,
+        }
+
+    def put(self, batch, timeout=None, done=()):
+        """Enqueue a batch; returns False if it could not be enqueued within timeout."""
+        item = (time.time(), batch, done)
+        if not self.lossy:
+            try:
+                self.queue.put(item, timeout=timeout)
+                return True
+            except queue.Full:
+                return False
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    _, dropped, dropped_done = self.queue.get_nowait()
+                    with self._lock:
+                        self._stats["dropped"] += len(dropped)
+                    for callback in dropped_done:
+                        callback(False)
+                except queue.Empty:
+                    pass
+
+    def _next_batch(self, stop):
+        """Block for one batch, then merge whatever arrives within batch_timeout up to batch_size."""
+        while not stop.is_set():
+            try:
+                enqueued_at, batch, done = self.queue.get(timeout=0.2)
+                break
+            except queue.Empty:
+                continue
+        else:
+            return None, None, None
+        batch = list(batch)
+        done = list(done)
+        deadline = time.time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    _, more, more_done = self.queue.get(timeout=remaining)
+                else:
+                    _, more, more_done = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.extend(more)
+            done.extend(more_done)
+        return enqueued_at, batch, done
+
+    def _run(self, stop):
+        while True:
+            enqueued_at, batch, done = self._next_batch(stop)
+            if batch is None:
+                return
+            started = time.time()
+            try:
+                result = self.fn(batch)
+            except Exception as e:
+                print(f"[Pipeline] Stage {self.name} failed on a batch of {len(batch)}: {e}")
+                with self._lock:
+                    self._stats["errors"] += 1
+                for callback in done:
+                    callback(False)
+                continue
+            latency = (time.time() - started) * 1000
+            wait = (started - enqueued_at) * 1000
+            with self._lock:
+                stats = self._stats
+                stats["processed"] += len(batch)
+                stats["batches"] += 1
+                # Exponentially weighted, seeded with the first batch
+                alpha = 1.0 if stats["batches"] == 1 else 0.1
+                stats["latency_ms_avg"] += (latency - stats["latency_ms_avg"]) * alpha
+                stats["latency_ms_max"] = max(stats["latency_ms_max"], latency)
+                stats["wait_ms_avg"] += (wait - stats["wait_ms_avg"]) * alpha
+            follow = next((output for output in self.outputs if not output.lossy), None) if result else None
+            if follow is None:
+                for callback in done:
+                    callback(True)
+            if result:
+                for output in self.outputs:
+                    # Blocks while a lossless downstream stage is full
+                    while not output.put(result, timeout=0.2, done=done if output is follow else ()):
+                        if stop.is_set():
+                            return
+
+    def start(self, stop):
+        for i in range(self.workers):
+            threading.Thread(target=self._run, args=(stop,), name=f"pipeline-{self.name}-{i}", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["queue_capacity"] = self.queue.maxsize
+        stats["workers"] = self.workers
+        return stats
+
+
+class Pipeline:
+    """
+    collect -> parse -> enrich -> analyze -> persist
+                                         \\-> alert
+
+    Sources submit raw records (collect); each stage processes micro-batches on its
+    own thread(s) and the stages are connected by bounded queues. persist and alert
+    have their own workers, so a slow database or webhook fills their queue and
+    eventually slows the analyze stage instead of stalling parsing directly. The
+    alert stage is lossy: it only ever needs the most recent batches.
+    """
+
+    def __init__(self, parse, enrich, analyze, persist, alert, queue_size=1000, batch_size=500,
+                 batch_timeout=0.05, persist_workers=2):
+        self.parse = Stage("parse", parse, queue_size, batch_size, batch_timeout)
+        self.enrich = Stage("enrich", enrich, queue_size, batch_size, batch_timeout)
+        self.analyze = Stage("analyze", analyze, queue_size, batch_size, batch_timeout)
+        self.persist = Stage("persist", persist, queue_size, batch_size * 4, batch_timeout, workers=persist_workers)
+        self.alert = Stage("alert", alert, queue_size=16, batch_size=batch_size * 4, batch_timeout=0, lossy=True)
+        self.parse.outputs = [self.enrich]
+        self.enrich.outputs = [self.analyze]
+        self.analyze.outputs = [self.persist, self.alert]
+        self.stages = [self.parse, self.enrich, self.analyze, self.persist, self.alert]
+        self._stop = threading.Event()
+        self._collected = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        for stage in self.stages:
+            stage.start(self._stop)
+
+    def stop(self):
+        self._stop.set()
+
+    def submit(self, raw_logs, source="push", timeout=None, done=None):
+        """
+        Collect stage: enqueue a batch of raw records. Returns False if the queue stayed full.
+
+        done, if given, is called with True once the records have been persisted, or with
+        False if a stage failed on them (it is not called when submit returns False).
+        """
+        if not raw_logs:
+            if done:
+                done(True)
+            return True
+        if not self.parse.put(raw_logs, timeout=timeout, done=(done,) if done else ()):
+            return False
+        with self._lock:
+            self._collected[source] = self._collected.get(source, 0) + len(raw_logs)
+        return True
+
+    def run_source(self, name, iterable, batch_size=None, batch_timeout=None):
+        """
+        Feed a collector generator into the pipeline (blocks; call from the collector's thread).
+
+        Records are submitted in micro-batches of up to the parse stage's batch_size. A
+        generator can block for as long as its source is quiet, so it is drained on a
+        reader thread and a partial batch is submitted batch_timeout after its first record.
+        """
+        batch_size = batch_size or self.parse.batch_size
+        batch_timeout = self.parse.batch_timeout if batch_timeout is None else batch_timeout
+        lock, flushing = threading.Lock(), threading.Lock()
+        pending = []
+        started = [0.0]  # arrival of pending's first record
+        finished = threading.Event()
+        failure = []
+
+        def flush():
+            # One flush at a time, so batches reach the parse stage in record order
+            nonlocal pending
+            with flushing:
+                with lock:
+                    batch, pending = pending, []
+                self.submit(batch, source=name)
+
+        def read():
+            try:
+                for raw_log in iterable:
+                    with lock:
+                        pending.append(raw_log)
+                        if len(pending) == 1:
+                            started[0] = time.time()
+                        full = len(pending) >= batch_size
+                    if full:
+                        flush()
+            except Exception as e:
+                failure.append(e)
+            finally:
+                finished.set()
+
+        threading.Thread(target=read, name=f"source-{name}", daemon=True).start()
+        while not finished.wait(batch_timeout / 2 or 0.01):
+            if pending and time.time() - started[0] >= batch_timeout:
+                flush()
+        flush()
+        if failure:
+            raise failure[0]
+
+    def stats(self):
+        with self._lock:
+            collected = dict(self._collected)
+        return {
+            "collect": {"records": collected},
+            **{stage.name: stage.stats() for stage in self.stages},
+        }
@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+
+WILDCARD = "<*>"
+HAS_DIGIT = re.compile(r"\d")
+
+
+class _Template:
+    __slots__ = ("template_id", "tokens", "count", "path", "leaf")
+
+    def __init__(self, template_id, tokens, count, path, leaf):
+        self.template_id = template_id
+        self.tokens = tokens
+        self.count = count
+        self.path = path  # tree keys from the root to the leaf holding this template
+        self.leaf = leaf  # list of template ids in that leaf
+
+
+class TemplateMiner:
+    """
+    Streaming log template miner after Drain (He et al., ICWS 2017).
+
+    Messages are split on whitespace and routed through a fixed-depth prefix tree:
+    first by token count, then by their first depth-2 tokens (tokens with digits,
+    or tokens arriving at a node that already has max_children children, go under
+    <*>). The leaf holds candidate templates. The most similar one, if at least
+    sim_threshold of its tokens match, absorbs the message and positions that
+    differ become <*>; otherwise the message starts a new template.
+    Cost per message is O(tokens x templates in the leaf); memory is bounded by
+    max_children per node and max_templates (least recently matched evicted).
+
+    With a path, templates and counts are saved there every save_interval seconds
+    (atomically, like collector.checkpoint) and loaded again on startup, so
+    template ids stay stable across restarts.
+    """
+
+    def __init__(self, path=None, depth=4, sim_threshold=0.4, max_children=100, max_templates=5000,
+                 save_interval=30.0):
+        self.path = path
+        self.depth = max(depth, 3)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.save_interval = save_interval
+        self._root = {}
+        self._templates = OrderedDict()  # template_id -> _Template, least recently matched first
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        if path:
+            self._load()
+
+    def _route(self, tokens, create):
+        """Leaf list for tokens, or None if it does not exist and create is False."""
+        node = self._root.get(len(tokens))
+        path = [len(tokens)]
+        if node is None:
+            if not create:
+                return None, None
+            node = self._root[len(tokens)] = {}
+        for token in tokens[:self.depth - 2]:
+            key = WILDCARD if HAS_DIGIT.search(token) else token
+            child = node.get(key)
+            if child is None:
+                if create and len(node) < self.max_children:
+                    child = node[key] = {}
+                else:
+                    key = WILDCARD
+                    child = node.get(key)
+                    if child is None:
+                        if not create:
+                            return None, None
+                        child = node[key] = {}
+            node = child
+            path.append(key)
+        leaf = node.get(None)
+        if leaf is None:
+            if not create:
+                return None, None
+            leaf = node[None] = []
+        return leaf, path
+
+    def _best_match(self, leaf, tokens):
+        best, best_sim, best_params = None, -1.0, -1
+        for template_id in leaf:
+            template = self._templates[template_id]
+            same = params = 0
+            for expected, token in zip(template.tokens, tokens):
+                if expected == WILDCARD:
+                    params += 1
+                elif expected == token:
+                    same += 1
+            sim = same / len(tokens) if tokens else 1.0
+            if sim > best_sim or (sim == best_sim and params > best_params):
+                best, best_sim, best_params = template, sim, params
+        if best is not None and best_sim >= self.sim_threshold:
+            return best
+        return None
+
+    def add(self, message):
+        """
+        Assign message to a template, creating or generalizing one as needed.
+        Returns (template_id, params): params are the tokens under the template's <*>.
+        """
+        tokens = message.split()
+        with self._lock:
+            leaf, path = self._route(tokens, create=True)
+            template = self._best_match(leaf, tokens)
+            if template is None:
+                template = _Template(self._next_id, tokens, 0, path, leaf)
+                self._next_id += 1
+                self._templates[template.template_id] = template
+                leaf.append(template.template_id)
+                if len(self._templates) > self.max_templates:
+                    self._evict()
+            else:
+                if any(expected != token and expected != WILDCARD
+                       for expected, token in zip(template.tokens, tokens)):
+                    template.tokens = [
+                        expected if expected == token else WILDCARD
+                        for expected, token in zip(template.tokens, tokens)
+                    ]
+                self._templates.move_to_end(template.template_id)
+            template.count += 1
+            params = [token for expected, token in zip(template.tokens, tokens) if expected == WILDCARD]
+            self._dirty = True
+            due = self.path and time.time() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+        return template.template_id, params
+
+    def _evict(self):
+        _, template = self._templates.popitem(last=False)
+        template.leaf.remove(template.template_id)
+
+    def match(self, message):
+        """Template id for message without learning from it (None if nothing matches)."""
+        tokens = message.split()
+        with self._lock:
+            leaf, _ = self._route(tokens, create=False)
+            template = self._best_match(leaf, tokens) if leaf else None
+            return template.template_id if template else None
+
+    def template(self, template_id):
+        with self._lock:
+            template = self._templates.get(template_id)
+            return " ".join(template.tokens) if template else None
+
+    def templates(self, limit=None):
+        """Templates with their message counts, most frequent first."""
+        with self._lock:
+            rows = [
+                {"template_id": t.template_id, "template": " ".join(t.tokens), "count": t.count}
+                for t in self._templates.values()
+            ]
+        rows.sort(key=lambda row: row["count"], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def __len__(self):
+        return len(self._templates)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps({
+                "next_id": self._next_id,
+                "templates": [
+                    {"id": t.template_id, "tokens": t.tokens, "count": t.count, "path": t.path}
+                    for t in self._templates.values()
+                ],
+            })
+            self._dirty = False
+            self._last_save = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[TemplateMiner] Failed to write {self.path}: {e}")
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for saved in data.get("templates", []):
+            # Rebuild the exact tree path the template was created under
+            length, *keys = saved["path"]
+            node = self._root.setdefault(length, {})
+            for key in keys:
+                node = node.setdefault(key, {})
+            leaf = node.setdefault(None, [])
+            template = _Template(saved["id"], saved["tokens"], saved["count"], saved["path"], leaf)
+            self._templates[template.template_id] = template
+            leaf.append(template.template_id)
+        self._next_id = max(data.get("next_id", 1), max(self._templates, default=0) + 1)
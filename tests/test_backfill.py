@@ -0,0 +1,68 @@
+"""
+collector.backfill.backfill_directory: when file offsets reach the checkpoint
+"""
+import threading
+
+from collector import backfill
+from collector.checkpoint import Checkpoint
+
+
+def write_logs(directory, **files):
+    for name, lines in files.items():
+        (directory / name).write_text("".join(f"2025-08-26 12:00:00 INFO line {i}\n" for i in range(lines)))
+
+
+def offsets(checkpoint):
+    return sorted((value["path"].rsplit("/", 1)[-1], value["offset"])
+                  for value in (checkpoint.get(key) for key in checkpoint.keys()))
+
+
+def test_offsets_are_committed_when_on_batch_returns(tmp_path):
+    write_logs(tmp_path, **{"a.log": 3, "b.log": 2})
+    checkpoint = Checkpoint(None)
+    batches = []
+    stats = backfill.backfill_directory(str(tmp_path), batches.append, checkpoint=checkpoint, workers=1)
+    assert stats["lines"] == 5 and [len(batch) for batch in batches] == [3, 2]
+    assert offsets(checkpoint) == [("a.log", (tmp_path / "a.log").stat().st_size),
+                                   ("b.log", (tmp_path / "b.log").stat().st_size)]
+
+
+def test_acknowledged_offsets_wait_for_every_batch_of_the_file(tmp_path):
+    write_logs(tmp_path, **{"a.log": 5})
+    checkpoint = Checkpoint(None)
+    pending = []
+
+    def on_batch(records, done):
+        pending.append(done)
+
+    finished = threading.Event()
+    thread = threading.Thread(target=lambda: (
+        backfill.backfill_directory(str(tmp_path), on_batch, checkpoint=checkpoint, workers=1,
+                                    batch_size=2, acknowledge=True),
+        finished.set()))
+    thread.start()
+    while len(pending) < 3:
+        assert not finished.wait(0.01)
+    pending[2]()
+    pending[0]()
+    assert offsets(checkpoint) == [] and not finished.is_set()
+    pending[1](True)
+    thread.join(5)
+    assert finished.is_set()
+    assert offsets(checkpoint) == [("a.log", (tmp_path / "a.log").stat().st_size)]
+
+
+def test_a_failed_batch_leaves_the_file_to_be_read_again(tmp_path):
+    write_logs(tmp_path, **{"a.log": 4, "b.log": 1})
+    checkpoint = Checkpoint(None)
+
+    def on_batch(records, done):
+        done(not records[0]["source"].endswith("a.log"))
+
+    backfill.backfill_directory(str(tmp_path), on_batch, checkpoint=checkpoint, workers=1, acknowledge=True)
+    assert [name for name, _ in offsets(checkpoint)] == ["b.log"]
+    again = []
+    backfill.backfill_directory(str(tmp_path), lambda records, done: (again.extend(records), done()),
+                                checkpoint=checkpoint, workers=1, acknowledge=True)
+    assert len(again) == 4
+    assert [name for name, _ in offsets(checkpoint)] == ["a.log", "b.log"]
@@ -0,0 +1,169 @@
+"""
+intelligence.detectors: the detectors themselves and DetectorBank's interval
+bookkeeping, driven by explicit event times
+"""
+import json
+
+import pytest
+
+from intelligence import detectors
+from intelligence.detectors import CusumDetector, Detector, DetectorBank, EwmaDetector, SeasonalDetector
+
+
+class Recorder(Detector):
+    """Remembers every (timestamp, value) it is fed; fires on every non-zero count if asked to."""
+
+    STATE = ("values",)
+
+    def __init__(self, fire: bool = False):
+        self.fire = fire
+        self.values = []
+
+    def update(self, value, timestamp):
+        self.values.append([timestamp, value])
+        return {"expected": 0.0, "score": float(value)} if self.fire and value else None
+
+
+@pytest.fixture(autouse=True)
+def recorder(monkeypatch):
+    monkeypatch.setitem(detectors.DETECTORS, "recorder", Recorder)
+
+
+def error(service="svc-a", template_id=None, level="ERROR"):
+    return {"level": level, "service_id": service, "template_id": template_id}
+
+
+def fed(bank, key):
+    return bank._series[key]["recorder"].values
+
+
+SERVICE_KEY = ("service", "svc-a", "ERROR")
+
+
+def test_counts_are_fed_when_the_event_clock_passes_the_interval_end():
+    bank = DetectorBank(interval=10, detectors={"recorder": {}})
+    for now in (1001.0, 1002.0, 1005.0):
+        bank.observe(error(template_id=7), now)
+    bank.observe(error(level="INFO"), 1006.0)  # not a watched level
+    assert bank.advance(1009.9) == []
+    assert bank._series == {}
+    bank.advance(1010.0)
+    assert fed(bank, SERVICE_KEY) == [[1000, 3]]
+    assert fed(bank, ("template", 7)) == [[1000, 3]]
+    assert ("service", "svc-a", "INFO") not in bank._series
+
+
+def test_late_records_count_toward_the_open_interval():
+    bank = DetectorBank(interval=10, detectors={"recorder": {}})
+    bank.observe(error(), 1015.0)
+    bank.observe(error(), 1003.0)  # the clock stays at 1015
+    bank.advance(1020.0)
+    assert fed(bank, SERVICE_KEY) == [[1010, 2]]
+
+
+def test_silent_intervals_are_replayed_as_zeros_up_to_max_catchup():
+    bank = DetectorBank(interval=10, detectors={"recorder": {}}, max_catchup=2)
+    bank.observe(error(), 1001.0)
+    bank.advance(1010.0)
+    bank.observe(error(), 1012.0)
+    bank.advance(1032.0)
+    assert fed(bank, SERVICE_KEY) == [[1000, 1], [1010, 1], [1020, 0]]
+    bank.advance(2000.0)  # a long gap: only the last two silent intervals are replayed
+    assert fed(bank, SERVICE_KEY)[3:] == [[1030, 0], [1980, 0], [1990, 0]]
+
+
+def test_cooldown_limits_detections_per_series_and_detector():
+    bank = DetectorBank(interval=10, detectors={"recorder": {"fire": True}}, cooldown=30)
+    fired_at = []
+    for start in range(1000, 1100, 10):
+        bank.observe(error(), start + 1.0)
+        fired_at.extend(d["timestamp"] for d in bank.advance(start + 10.0))
+    assert fired_at == [1000, 1030, 1060, 1090]
+    ids = [d["id"] for d in bank.recent()]
+    assert ids == [1, 2, 3, 4] and bank.last_id == 4
+    assert [d["timestamp"] for d in bank.recent(since=1050)] == [1060, 1090]
+
+
+def test_detection_describes_the_series():
+    bank = DetectorBank(interval=10, detectors={"recorder": {"fire": True}})
+    bank.observe(error(template_id=3), 1001.0)
+    new = bank.advance(1010.0)
+    by_subject = {d.get("service") or d.get("template_id"): d for d in new}
+    assert by_subject["svc-a"]["level"] == "ERROR"
+    assert by_subject["svc-a"]["value"] == 1
+    assert by_subject["svc-a"]["detector"] == "recorder"
+    assert by_subject[3]["message"].startswith("Spike of template 3: 1 in 10s")
+
+
+def test_series_beyond_max_series_keep_no_state():
+    bank = DetectorBank(interval=10, detectors={"recorder": {}}, max_series=3)
+    for i in range(50):
+        bank.observe(error(service=f"svc-{i}"), 1001.0)
+    bank.advance(1010.0)
+    assert len(bank._series) == 3
+    assert set(bank._last_seen) == set(bank._series)
+
+
+def test_idle_series_are_dropped():
+    bank = DetectorBank(interval=10, detectors={"recorder": {}}, idle_seconds=30)
+    bank.observe(error(), 1001.0)
+    bank.advance(1040.0)
+    assert SERVICE_KEY in bank._series
+    bank.advance(1050.0)  # silent for more than 30s of event time
+    assert SERVICE_KEY not in bank._series and SERVICE_KEY not in bank._last_seen
+
+
+def test_save_and_load_restore_detector_state(tmp_path):
+    path = str(tmp_path / "detectors.json")
+    bank = DetectorBank(interval=10, detectors={"ewma": {"warmup": 2}, "recorder": {"fire": True}}, path=path)
+    for start in range(1000, 1050, 10):
+        bank.observe(error(), start + 1.0)
+        bank.advance(start + 10.0)
+    bank.save()
+
+    restored = DetectorBank(interval=10, detectors={"ewma": {"warmup": 2}, "recorder": {"fire": True}}, path=path)
+    assert restored._series[SERVICE_KEY]["ewma"].state() == bank._series[SERVICE_KEY]["ewma"].state()
+    assert fed(restored, SERVICE_KEY) == fed(bank, SERVICE_KEY)
+    assert restored._last_seen == bank._last_seen
+    assert restored.last_id == bank.last_id  # detection ids keep counting after a restart
+
+    other_interval = DetectorBank(interval=60, detectors={"ewma": {}}, path=path)
+    assert other_interval._series == {}
+    with open(path) as f:
+        assert json.load(f)["interval"] == 10
+
+
+def test_unknown_detector_names_are_rejected():
+    with pytest.raises(ValueError):
+        DetectorBank(detectors={"nope": {}})
+
+
+def test_ewma_fires_on_a_spike_after_warmup_only():
+    detector = EwmaDetector(threshold=4.0, warmup=10)
+    assert detector.update(100, 0) is None  # no baseline yet
+    detector = EwmaDetector(threshold=4.0, warmup=10)
+    for i in range(20):
+        assert detector.update(5 + i % 2, i * 10) is None
+    result = detector.update(60, 200)
+    assert result is not None and result["expected"] == pytest.approx(5.5, abs=0.5)
+    assert detector.update(2, 210) is None  # below min_count
+
+
+def test_seasonal_detector_compares_the_same_slot_of_earlier_periods():
+    detector = SeasonalDetector(period=40, slot_seconds=10, alpha=0.5, threshold=3.0)
+    for day in range(3):
+        for slot, value in enumerate((5, 50, 5, 5)):
+            assert detector.update(value, day * 40 + slot * 10) is None  # the peak recurs each period
+    assert detector.update(50, 120) is not None  # a peak in a quiet slot
+
+
+def test_cusum_catches_a_sustained_increase_ewma_misses():
+    cusum = CusumDetector(alpha=0.01, k=0.5, h=8.0, warmup=30)
+    ewma = EwmaDetector(threshold=4.0)
+    for i in range(60):
+        value = 10 + (i % 3) - 1
+        assert cusum.update(value, i) is None
+        assert ewma.update(value, i) is None
+    raised = [(cusum.update(15, 60 + i), ewma.update(15, 60 + i)) for i in range(20)]
+    assert any(by_cusum for by_cusum, _ in raised)
+    assert not any(by_ewma for _, by_ewma in raised)
@@ -0,0 +1,185 @@
+"""
+Golden-corpus tests for processor.parser: every line must parse to the row the
+original categorize_log (kept below) implies, plus the fields the line carries.
+"""
+import json
+import random
+import re
+from datetime import datetime
+
+import pytest
+
+from processor import parser
+
+
+def baseline_categorize_log(log):
+    """categorize_log as it was before the fast path and field extraction."""
+    message = log.get("message", "")
+    try:
+        msg_obj = json.loads(message)
+        if isinstance(msg_obj, dict) and "level" in msg_obj:
+            log["level"] = msg_obj.get("level", "INFO")
+            log["message"] = msg_obj.get("message", message)
+            if "timestamp" in msg_obj:
+                log["timestamp"] = msg_obj["timestamp"]
+            return log
+    except Exception:
+        pass
+    bracket_match = re.search(r"\[(ERROR|WARNING|INFO|CRITICAL)\]", message, re.IGNORECASE)
+    if bracket_match:
+        log["level"] = bracket_match.group(1).upper()
+        return log
+    space_match = re.search(r"\b(ERROR|WARNING|INFO|CRITICAL)\b", message, re.IGNORECASE)
+    if space_match:
+        log["level"] = space_match.group(1).upper()
+        return log
+    for level, pattern in parser.LOG_LEVELS.items():
+        if pattern.search(message):
+            log["level"] = level
+            return log
+    log["level"] = "INFO"
+    return log
+
+
+def epoch(text):
+    return datetime.fromisoformat(text.replace(",", ".")).timestamp()
+
+
+def with_fields(expected, **fields):
+    expected.update({name: value for name, value in fields.items() if value is not None})
+    return expected
+
+
+# Plain-text lines in log_generator's layout: (date, time, level word, [user, service, request] or None, body)
+HEADERS = [
+    ("2025-08-26", "12:00:00", "ERROR", ("user3", "svc-db", "req-1234"), "Timeout"),
+    ("2025-08-26", "12:00:00", "INFO", ("user1", "svc-api", "req-1000"), "User login successful"),
+    ("2025-08-26", "23:59:59", "WARNING", ("user10", "svc-cache", "req-9999"), "Disk space low"),
+    ("2025-08-26", "01:02:03", "CRITICAL", ("user2", "svc-auth", "req-1"), "Kernel panic [ERROR] tag"),
+    ("2025-08-26", "T12:00:00", "error", ("user3", "svc-db", "req-7"), "lower-case level word"),
+    ("2025-08-26", " 12:00:00.250", "WARN", ("u", "s", "r"), "fractional seconds"),
+    ("2025-08-26", " 12:00:00,250", "DEBUG", ("u", "s", "r"), "comma fraction, level from the body: error"),
+    ("2025-08-26", "12:00:00", "INFO", ("", "svc-db", ""), "empty user and request"),
+    ("2025-08-26", "12:00:00", "INFO", None, "Server started"),
+    ("2025-08-26", "12:00:00", "ERROR", None, "[user3] [svc-db] only two fields"),  # stay in the body
+    ("2025-08-26", None, "ERROR", None, "Database down"),
+    ("2025-08-26", None, "WARNING", ("user4", "svc-api", "req-5"), "bare date keeps the receive time"),
+]
+
+
+def header_case(date, clock, level, fields, body):
+    timestamp = None
+    line = date
+    if clock is not None:
+        line += clock if clock[0] in "T " else " " + clock
+        timestamp = epoch(line)
+    line += f" {level} "
+    if fields:
+        line += " ".join(f"[{value}]" for value in fields) + " "
+    line += body
+    user_id, service_id, request_id = fields or (None, None, None)
+    expected = {"level": baseline_categorize_log({"message": line})["level"], "message": body}
+    return line, with_fields(expected, timestamp=timestamp, user_id=user_id,
+                             service_id=service_id, request_id=request_id)
+
+
+JSON_OBJECTS = [
+    {"timestamp": 1756209600.5, "level": "ERROR", "message": "Timeout",
+     "user_id": "user3", "service_id": "svc-db", "request_id": "req-1234"},
+    {"timestamp": 1756209600, "level": "INFO", "message": "ok", "user_id": 7, "request_id": 1234},
+    {"timestamp": "2025-08-26T12:00:00", "level": "WARNING", "message": "iso timestamp"},
+    {"timestamp": "2025-08-26 12:00:00,125", "level": "WARNING", "message": "comma fraction"},
+    {"timestamp": "yesterday", "level": "CRITICAL", "message": "unreadable timestamp"},
+    {"timestamp": True, "level": "INFO", "message": "boolean timestamp"},
+    {"timestamp": None, "level": "INFO", "message": "null timestamp", "service_id": None},
+    {"level": "ERROR"},
+    {"level": None, "message": "null level"},
+    {"level": "x", "message": "unknown level kept as is"},
+    {"level": "INFO", "message": "nested", "user_id": {"id": 1}},
+]
+
+
+def json_case(obj, prefix=""):
+    line = prefix + json.dumps(obj)
+    baseline = baseline_categorize_log({"message": line})
+    timestamp = obj.get("timestamp")
+    if isinstance(timestamp, bool) or timestamp is None:
+        timestamp = None
+    elif isinstance(timestamp, str):
+        try:
+            timestamp = epoch(timestamp)
+        except ValueError:
+            timestamp = None
+    else:
+        timestamp = float(timestamp)
+    fields = {name: None if obj.get(name) is None else str(obj[name]) for name in parser.JSON_FIELDS}
+    expected = {"level": baseline["level"], "message": baseline["message"]}
+    return line, with_fields(expected, timestamp=timestamp, **fields)
+
+
+# Not a JSON object with a level, no header: the level comes from the text, the line is the message
+NO_HEADER = [
+    "", " ", "{", "{}", "[]", "null", "42", '"ERROR"', '{"msg": "error here"}', '{"level": "x"} trailing',
+    "{not json ERROR}", '{"level": "ERROR", ', "[ERROR]", "[error]", "[Warning] x", "[WARN] x",
+    "[INFO][ERROR]", "ERROR [INFO]", "warning: errors", "errors", "info_error", "x-ERROR-x",
+    "é ERROR", "éERROR", "criticalerror", "Critical condition", "misinformation warning",
+    "İNFO x", "KERROR", "ERRØR", "[ınfo]", "\tINFO\t", "﻿{\"level\": \"ERROR\"}",
+    "2025-08-26", "2025-08-26 Server started", "26-08-2025 12:00:00 ERROR [u] [s] [r] day first",
+    "note: 2025-08-26 12:00:00 ERROR [u] [s] [r] header not at the start",
+]
+
+FRAGMENTS = ["error", "ERROR", "Error", "warn", "WARN", "warning", "Warning", "info", "INFO",
+             "critical", "CRITICAL", "[", "]", " ", "_", "-", "é", "1", "x", "s", "in", "fo", "{", "}"]
+
+
+def golden_corpus():
+    cases = [header_case(*header) for header in HEADERS]
+    cases += [json_case(obj) for obj in JSON_OBJECTS]
+    cases += [json_case(JSON_OBJECTS[0], prefix=" \n\t")]
+    for line in NO_HEADER:
+        cases.append((line, {"level": baseline_categorize_log({"message": line})["level"], "message": line}))
+    rng = random.Random(7)
+    for _ in range(3000):
+        line = "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8)))
+        cases.append((line, {"level": baseline_categorize_log({"message": line})["level"], "message": line}))
+    return cases
+
+
+CORPUS = golden_corpus()
+
+
+def test_parse_batch_rows_match_golden_corpus():
+    lines = [line for line, _ in CORPUS]
+    rows = parser.parse_batch(lines)
+    assert len(rows) == len(lines)
+    for (line, expected), row in zip(CORPUS, rows):
+        assert len(row) == len(parser.FIELDS)
+        assert parser.row_to_dict(row) == expected, line
+
+
+def test_parse_log_matches_parse_batch():
+    for line, expected in CORPUS:
+        assert parser.parse_log(line) == expected, line
+
+
+def test_categorize_log_keeps_collector_fields():
+    log = {"timestamp": 5.0, "source": "logs/app1.log", "message": "2025-08-26 ERROR Database down"}
+    assert parser.categorize_log(log) == {
+        "timestamp": 5.0, "source": "logs/app1.log", "level": "ERROR", "message": "Database down",
+    }
+
+
+@pytest.mark.parametrize("line", [
+    "2025-08-26 12:00:00 ERROR [user3] [svc-db] [req-1234] Timeout",
+    '{"level": "ERROR", "user_id": "user3", "service_id": "svc-db"}',
+])
+def test_repeated_values_are_interned(line):
+    first, second = parser.parse_batch([line, line])
+    assert first[parser.FIELDS.index("user_id")] is second[parser.FIELDS.index("user_id")]
+    assert first[parser.FIELDS.index("service_id")] is second[parser.FIELDS.index("service_id")]
+
+
+def test_parallel_parser_preserves_order():
+    lines = [line for line, _ in CORPUS]
+    with parser.ParallelParser(workers=2, chunk_bytes=4096, inline_below=0) as parallel:
+        assert parallel.parse(lines) == parser.parse_batch(lines)
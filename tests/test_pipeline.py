@@ -0,0 +1,74 @@
+"""
+processor.pipeline.Pipeline.run_source: micro-batching of collector generators
+"""
+import threading
+import time
+
+import pytest
+
+from processor.pipeline import Pipeline
+
+
+def pipeline(batch_size=50, batch_timeout=0.05):
+    pipe = Pipeline(None, None, None, None, None, batch_size=batch_size, batch_timeout=batch_timeout)
+    submitted = []  # the stages are never started: capture what reaches the parse queue
+    pipe.parse.put = lambda batch, timeout=None, done=(): submitted.append(list(batch)) or True
+    return pipe, submitted
+
+
+def test_records_are_submitted_in_batches_of_the_parse_batch_size():
+    pipe, submitted = pipeline()
+    pipe.run_source("gen", iter(range(120)))
+    assert [len(batch) for batch in submitted] == [50, 50, 20]
+    assert [record for batch in submitted for record in batch] == list(range(120))
+    assert pipe.stats()["collect"]["records"] == {"gen": 120}
+
+
+def test_a_quiet_source_flushes_its_partial_batch_after_batch_timeout():
+    pipe, submitted = pipeline(batch_timeout=0.05)
+
+    def trickle():
+        yield from range(3)
+        time.sleep(0.5)
+        yield 3
+
+    pipe.run_source("gen", trickle())
+    assert submitted == [[0, 1, 2], [3]]
+
+
+def test_generator_errors_reach_the_caller_after_the_pending_records():
+    pipe, submitted = pipeline()
+
+    def failing():
+        yield 1
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError, match="source failed"):
+        pipe.run_source("gen", failing())
+    assert submitted == [[1]]
+
+
+def test_done_is_called_once_the_last_lossless_stage_processed_the_records():
+    persisted, results = [], []
+    pipe = Pipeline(list, list, list, persisted.extend, lambda batch: None, batch_size=10, batch_timeout=0)
+    pipe.start()
+    try:
+        finished = threading.Event()
+        assert pipe.submit([1, 2, 3], done=lambda ok: (results.append((ok, list(persisted))), finished.set()))
+        assert finished.wait(5)
+        assert results == [(True, [1, 2, 3])]
+
+        failed = threading.Event()
+        pipe.enrich.fn = lambda batch: 1 / 0
+        pipe.submit([4], done=lambda ok: (results.append((ok, None)), failed.set()))
+        assert failed.wait(5)
+        assert results[-1] == (False, None)
+    finally:
+        pipe.stop()
+
+
+def test_done_is_called_right_away_for_an_empty_submit():
+    pipe, submitted = pipeline()
+    results = []
+    assert pipe.submit([], done=results.append)
+    assert results == [True] and submitted == []
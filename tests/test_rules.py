@@ -0,0 +1,190 @@
+"""
+intelligence.rules.RuleEngine: each rule type and predicate on explicit event times
+"""
+import pytest
+
+from intelligence.rules import RuleEngine
+
+
+def log(timestamp, level="INFO", message="", service=None, source=None, user=None, watch=None):
+    record = {"timestamp": timestamp, "level": level, "message": message}
+    for name, value in (("service_id", service), ("source", source), ("user_id", user), ("watch", watch)):
+        if value is not None:
+            record[name] = value
+    return record
+
+
+def feed(engine, *logs):
+    for record in logs:
+        engine.observe(record, record["timestamp"])
+
+
+def active(engine, now):
+    return {result["rule"]: result for result in engine.evaluate(now)}
+
+
+def test_default_rule_fires_on_one_critical_log():
+    engine = RuleEngine()
+    feed(engine, log(1000.0, "INFO"))
+    assert active(engine, 1000.0) == {}
+    feed(engine, log(1001.0, "CRITICAL"))
+    assert active(engine, 1001.0)["critical"]["message"] == "Critical system failure detected"
+
+
+def test_count_rule_threshold_and_window_expiry():
+    engine = RuleEngine([{"name": "errors", "type": "count", "level": ["ERROR", "critical"],
+                          "window": 10, "threshold": 3}])
+    feed(engine, log(1000.0, "ERROR"), log(1001.0, "CRITICAL"), log(1001.5, "WARNING"))
+    assert active(engine, 1002.0) == {}
+    feed(engine, log(1005.0, "ERROR"))
+    result = active(engine, 1005.0)["errors"]
+    assert result["value"] == 3 and result["since"] == 1005.0
+    assert "errors: 3 matching logs in 10s" in result["message"]
+    assert "errors" in active(engine, 1009.9)
+    assert active(engine, 1010.0) == {}  # second 1000 left the window: seconds 1001..1010 remain
+    assert engine.states()[0]["value"] == 2
+    engine.refresh(1011.0)
+    assert engine.states()[0]["value"] == 1
+
+
+def test_count_rule_filters_on_service_and_source():
+    engine = RuleEngine([{"name": "db", "level": "ERROR", "service": "svc-db", "source": ["a.log", "b.log"],
+                          "window": 60, "threshold": 2}])
+    feed(engine,
+         log(1000.0, "ERROR", service="svc-db", source="a.log"),
+         log(1001.0, "ERROR", service="svc-api", source="a.log"),
+         log(1002.0, "ERROR", service="svc-db", source="c.log"),
+         log(1003.0, "WARNING", service="svc-db", source="b.log"))
+    assert active(engine, 1003.0) == {}
+    feed(engine, log(1004.0, "ERROR", service="svc-db", source="b.log"))
+    assert active(engine, 1004.0)["db"]["value"] == 2
+
+
+def test_records_already_outside_the_window_are_not_counted():
+    engine = RuleEngine([{"name": "errors", "level": "ERROR", "window": 10, "threshold": 1}])
+    feed(engine, log(1100.0, "INFO"))
+    engine.observe(log(1050.0, "ERROR"), 1100.0)
+    assert active(engine, 1100.0) == {}
+
+
+def test_ratio_rule_needs_min_count_and_a_ratio_above_threshold():
+    engine = RuleEngine([{"name": "error_ratio", "type": "ratio", "numerator": {"level": "ERROR"},
+                          "window": 60, "threshold": 0.5, "min_count": 4}])
+    feed(engine, log(1000.0, "ERROR"), log(1001.0, "ERROR"), log(1002.0, "INFO"))
+    assert active(engine, 1002.0) == {}  # 2/3, but only 3 logs
+    feed(engine, log(1003.0, "INFO"))
+    assert active(engine, 1003.0) == {}  # 2/4 is not above 0.5
+    feed(engine, log(1004.0, "ERROR"))
+    result = active(engine, 1004.0)["error_ratio"]
+    assert result["value"] == 0.6
+    assert "ratio 60%" in result["message"]
+
+
+def test_ratio_rule_with_a_denominator_filter():
+    engine = RuleEngine([{"name": "db_errors", "type": "ratio", "window": 60, "threshold": 0.5,
+                          "numerator": {"level": "ERROR", "service": "svc-db"},
+                          "denominator": {"service": "svc-db"}}])
+    feed(engine, log(1000.0, "ERROR", service="svc-db"), log(1001.0, "INFO", service="svc-api"),
+         log(1002.0, "INFO", service="svc-api"))
+    assert active(engine, 1002.0)["db_errors"]["value"] == 1.0
+
+
+def test_absence_rule_fires_after_a_silent_window_and_clears_on_a_match():
+    engine = RuleEngine([{"name": "no_heartbeat", "type": "absence", "pattern": "heartbeat", "window": 30}])
+    feed(engine, log(1000.0, message="starting"))
+    assert active(engine, 1029.0) == {}  # counted from the first record the engine saw
+    assert active(engine, 1030.0)["no_heartbeat"]["message"] == "no_heartbeat: no matching logs in the last 30s"
+    feed(engine, log(1031.0, message="Service heartbeat OK"))
+    assert active(engine, 1031.0) == {}
+    assert active(engine, 1060.9) == {}
+    assert "no_heartbeat" in active(engine, 1061.0)  # the heartbeat's second left the window
+
+
+def test_sequence_rule_fires_on_steps_in_order_within_the_time_limit():
+    engine = RuleEngine([{"name": "login_then_crash", "type": "sequence", "within": 10, "hold": 5,
+                          "steps": [{"pattern": "login"}, {"level": "ERROR", "pattern": "crash"}]}])
+    feed(engine, log(1000.0, "ERROR", "crash before login"), log(1001.0, message="user login"))
+    assert active(engine, 1001.0) == {}
+    feed(engine, log(1005.0, "ERROR", "Crash detected"))  # case-sensitive pattern: no match
+    assert active(engine, 1005.0) == {}
+    feed(engine, log(1006.0, "ERROR", "crash detected"))
+    result = active(engine, 1006.0)["login_then_crash"]
+    assert result["value"] == 1
+    assert "login_then_crash" in active(engine, 1011.0)
+    assert active(engine, 1012.0) == {}  # hold elapsed
+
+
+def test_sequence_rule_drops_a_sequence_that_took_too_long():
+    engine = RuleEngine([{"name": "seq", "type": "sequence", "within": 10,
+                          "steps": [{"pattern": "first"}, {"pattern": "second"}]}])
+    feed(engine, log(1000.0, message="first"), log(1011.0, message="second"))
+    assert active(engine, 1011.0) == {}
+    feed(engine, log(1012.0, message="first"), log(1013.0, message="second"))
+    assert "seq" in active(engine, 1013.0)
+
+
+def test_sequence_rule_correlates_by_field():
+    engine = RuleEngine([{"name": "fail_then_lock", "type": "sequence", "within": 60, "by": "user_id",
+                          "steps": [{"pattern": "failed"}, {"pattern": "locked"}]}])
+    feed(engine,
+         log(1000.0, message="login failed", user="alice"),
+         log(1001.0, message="account locked", user="bob"),
+         log(1002.0, message="account locked"))  # no user: ignored
+    assert active(engine, 1002.0) == {}
+    feed(engine, log(1003.0, message="account locked", user="alice"))
+    assert active(engine, 1003.0)["fail_then_lock"]["value"] == 1
+
+
+def test_regex_and_watch_predicates():
+    engine = RuleEngine([
+        {"name": "timeouts", "pattern": r"time(d )?out", "window": 60, "threshold": 2},
+        {"name": "timeout_errors", "level": "ERROR", "pattern": r"time(d )?out", "window": 60, "threshold": 1},
+        {"name": "payments", "watch": ["payments", "billing"], "window": 60, "threshold": 1},
+    ])
+    feed(engine, log(1000.0, "WARNING", "Request timed out"), log(1001.0, "INFO", "no match"))
+    assert set(active(engine, 1001.0)) == set()
+    feed(engine, log(1002.0, "ERROR", "Database timeout"), log(1003.0, "INFO", "x", watch=("search",)))
+    assert set(active(engine, 1003.0)) == {"timeouts", "timeout_errors"}
+    feed(engine, log(1004.0, "INFO", "x", watch=("billing",)))
+    assert "payments" in active(engine, 1004.0)
+
+
+def test_identical_filters_share_one_predicate():
+    engine = RuleEngine([
+        {"name": "a", "level": "error", "pattern": "db", "window": 60},
+        {"name": "b", "level": ["ERROR"], "pattern": "db", "window": 30},
+        {"name": "c", "type": "ratio", "numerator": {"level": "ERROR", "pattern": "db"}, "window": 60},
+    ])
+    assert len(engine._predicates) == 2  # the shared filter and the empty denominator
+    assert len(engine._counters) == 3    # windows 60 and 30 on it, plus the denominator
+
+
+def test_activation_ids_and_version():
+    engine = RuleEngine([{"name": "errors", "level": "ERROR", "window": 5, "threshold": 1}])
+    feed(engine, log(1000.0, "ERROR"))
+    assert engine.refresh(1000.0) is True
+    first = engine.states()[0]["activation"]
+    assert engine.refresh(1001.0) is False  # nothing changed
+    assert engine.refresh(1006.0) is True   # expired
+    feed(engine, log(1007.0, "ERROR"))
+    engine.refresh(1007.0)
+    second = engine.states()[0]["activation"]
+    assert second > first
+    engine.clear()
+    feed(engine, log(1008.0, "ERROR"))
+    engine.refresh(1008.0)
+    assert engine.states()[0]["activation"] > second  # ids never repeat across clear()
+
+
+@pytest.mark.parametrize("rules, message", [
+    ([{"name": "a"}, {"name": "a"}], "Duplicate rule name"),
+    ([{"type": "count"}], "without a name"),
+    ([{"name": "a", "type": "median"}], "unknown type"),
+    ([{"name": "a", "pattern": "("}], "invalid pattern"),
+    ([{"name": "a", "host": "x"}], "unknown filter fields"),
+    ([{"name": "a", "type": "ratio"}], "numerator"),
+    ([{"name": "a", "type": "sequence", "steps": [{"level": "ERROR"}]}], "at least two steps"),
+])
+def test_invalid_rules_are_rejected(rules, message):
+    with pytest.raises(ValueError, match=message):
+        RuleEngine(rules)
@@ -0,0 +1,148 @@
+"""
+intelligence.sketches: pane expiry of WindowSketches on explicit event times and
+the error bounds of the sketches once merged across panes
+"""
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from intelligence.sketches import (CountMinSketch, HyperLogLog, SpaceSaving, WindowSketches, distinct_union,
+                                   estimate_sum, merge_top)
+
+
+def log(timestamp, level="ERROR", service=None, user=None, request=None):
+    return {"timestamp": timestamp, "level": level, "service_id": service, "user_id": user, "request_id": request}
+
+
+def skewed_stream(seed, n, items=200):
+    """n item names drawn with Zipf-like weights 1/rank, so a few items dominate."""
+    rng = random.Random(seed)
+    names = [f"item-{rank}" for rank in range(items)]
+    return rng.choices(names, weights=[1 / (rank + 1) for rank in range(items)], k=n)
+
+
+def test_panes_expire_as_the_event_clock_advances():
+    sketches = WindowSketches(window_seconds=60, pane_seconds=10)
+    assert sketches.panes_kept == 7
+    sketches.add(log(1000.0, service="svc-a"), 1000.0)
+    sketches.add(log(1035.0, service="svc-b"), 1035.0)
+    assert sketches.estimate("service_id", "svc-a", 1069.9) == 1  # pane [1000, 1010) still merged
+    assert sketches.estimate("service_id", "svc-a", 1070.0) == 0  # the window reaches back one pane at most
+    assert [entry["value"] for entry in sketches.top("service_id", 1070.0)] == ["svc-b"]
+    assert sketches.top("service_id", 1110.0) == []
+    assert sketches._panes == {}
+
+
+def test_records_behind_the_kept_panes_are_ignored_and_future_ones_join_the_current_pane():
+    sketches = WindowSketches(window_seconds=60, pane_seconds=10)
+    sketches.add(log(1000.0, service="svc-a"), 1070.0)  # pane 100 <= 107 - 7: already expired
+    assert sketches.top("service_id", 1070.0) == []
+    sketches.add(log(5000.0, service="svc-a"), 1070.0)
+    assert list(sketches._panes) == [107]
+    assert sketches.estimate("service_id", "svc-a", 1070.0) == 1
+
+
+def test_pane_count_stays_bounded():
+    sketches = WindowSketches(window_seconds=60, pane_seconds=10)
+    for second in range(1000, 2000):
+        sketches.add(log(float(second), service=f"svc-{second % 7}", user=f"user{second}"), float(second))
+        assert len(sketches._panes) <= sketches.panes_kept
+    assert sketches.distinct("user_id", 1999.0) == pytest.approx(70, abs=5)  # panes 193..199
+
+
+def test_levels_are_sketched_separately():
+    sketches = WindowSketches()
+    sketches.add(log(1000.0, "ERROR", service="svc-a"), 1000.0)
+    sketches.add(log(1000.0, "INFO", service="svc-a"), 1000.0)
+    sketches.add(log(1000.0, "debug", service="svc-a"), 1000.0)
+    assert sketches.estimate("service_id", "svc-a", 1000.0) == 3
+    assert sketches.estimate("service_id", "svc-a", 1000.0, "ERROR") == 1
+    assert sketches.estimate("service_id", "svc-a", 1000.0, "OTHER") == 1
+    assert sketches.top("service_id", 1000.0, "WARNING") == []
+
+
+def test_unknown_dimensions_are_rejected():
+    sketches = WindowSketches()
+    with pytest.raises(ValueError):
+        sketches.top("request_id", 1000.0)  # only sketched for distinct counts
+    with pytest.raises(ValueError):
+        sketches.distinct("service_id", 1000.0)
+
+
+def test_space_saving_bounds_hold_after_merging_panes():
+    k, panes = 20, 6
+    summaries, truth = [], Counter()
+    for pane in range(panes):
+        stream = skewed_stream(pane, 2000)
+        truth.update(stream)
+        summary = SpaceSaving(k)
+        for item in stream:
+            summary.add(item)
+        summaries.append(summary)
+    merged = merge_top(summaries, k)
+    assert len(merged) == k
+    for entry in merged:
+        # Overestimated where a pane tracks the item, missing where one does not: error covers both
+        assert abs(truth[entry["value"]] - entry["count"]) <= entry["error"]
+    # Items above the summed floors cannot be missed
+    floors = sum(summary.floor() for summary in summaries)
+    reported = {entry["value"] for entry in merge_top(summaries, k * panes)}
+    assert {item for item, count in truth.items() if count > floors} <= reported
+    assert [entry["value"] for entry in merged[:3]] == [item for item, _ in truth.most_common(3)]
+
+
+def test_merge_charges_the_floor_of_panes_that_do_not_track_an_item():
+    full = SpaceSaving(2)
+    for item in ["a", "a", "a", "b", "b", "c"]:  # c evicts b: floor 3
+        full.add(item)
+    assert full.floor() == 3
+    partial = SpaceSaving(2)
+    partial.add("b", 4)
+    by_value = {entry["value"]: entry for entry in merge_top([full, partial], 3)}
+    assert by_value["b"] == {"value": "b", "count": 4, "error": 3}
+    assert by_value["c"]["error"] == 2  # evicted b's count carried over, nothing from partial (floor 0)
+
+
+def test_count_min_never_underestimates_and_stays_within_its_bound_across_panes():
+    width, depth = 256, 4
+    sketches, truth = [], Counter()
+    for pane in range(4):
+        stream = skewed_stream(10 + pane, 5000, items=1000)
+        truth.update(stream)
+        sketch = CountMinSketch(width, depth)
+        for item in stream:
+            sketch.add(item)
+        sketches.append(sketch)
+    total = sum(truth.values())
+    overestimates = []
+    for item, count in truth.items():
+        estimate = estimate_sum(sketches, item)
+        assert estimate >= count
+        overestimates.append(estimate - count)
+    # Each row overestimates by total / width on average; the minimum of depth rows by less
+    assert sum(overestimates) / len(overestimates) <= total / width
+    heavy = [item for item, _ in truth.most_common(10)]
+    assert all(estimate_sum(sketches, item) - truth[item] <= math.e * total / width for item in heavy)
+    assert estimate_sum(sketches, "never-seen") <= math.e * total / width
+    assert estimate_sum([], "item-0") == 0
+
+
+def test_hyperloglog_union_counts_values_shared_by_panes_once():
+    sketches = []
+    for pane in range(5):
+        sketch = HyperLogLog(12)
+        for value in range(pane * 2000, pane * 2000 + 6000):  # consecutive panes overlap by 4000
+            sketch.add(f"user{value}")
+        sketches.append(sketch)
+    true_distinct = 4 * 2000 + 6000
+    standard_error = 1.04 / math.sqrt(1 << 12)
+    assert abs(distinct_union(sketches) - true_distinct) <= 4 * standard_error * true_distinct
+    assert abs(sketches[0].estimate() - 6000) <= 4 * standard_error * 6000
+    small = HyperLogLog(12)
+    for value in range(50):
+        small.add(str(value))
+        small.add(str(value))
+    assert abs(small.estimate() - 50) <= 5  # linear counting for small cardinalities
+    assert distinct_union([]) == 0
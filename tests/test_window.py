@@ -0,0 +1,118 @@
+"""
+intelligence.window.EventTimeWindow on explicit event and wall-clock times
+"""
+from intelligence.window import EventTimeWindow
+
+
+def make_window(**kwargs):
+    settings = {"window_seconds": 60, "tumbling_seconds": 10, "allowed_lateness": 5}
+    settings.update(kwargs)
+    return EventTimeWindow(**settings)
+
+
+def test_event_clock_follows_newest_record_then_wall_time():
+    window = make_window()
+    assert window.now(wall=500.0) == 500.0  # nothing seen yet
+    window.add(1000.0, "INFO", wall=2000.0)  # backfill: event time far behind the wall clock
+    assert window.now(wall=2000.0) == 1000.0
+    assert window.now(wall=2003.0) == 1003.0
+    window.add(1001.0, "INFO", wall=2003.0)  # older than the running clock: no change
+    assert window.now(wall=2003.0) == 1003.0
+    window.add(1010.0, "INFO", wall=2003.0)
+    assert window.now(wall=2003.0) == 1010.0
+    assert window.watermark(wall=2003.0) == 1005.0
+
+
+def test_future_records_move_the_clock_at_most_allowed_lateness_ahead():
+    window = make_window()
+    window.add(5000.0, "ERROR", wall=1000.0)
+    assert window.now(wall=1000.0) == 1005.0
+    assert window.level_counts() == {"ERROR": 1}
+
+
+def test_out_of_order_records_within_the_window_are_counted():
+    window = make_window()
+    for timestamp in (1050.0, 1010.0, 1049.5, 1001.0):
+        window.add(timestamp, "ERROR", wall=1050.0)
+    window.add(1030.0, "WARNING", wall=1050.0)
+    assert window.level_counts() == {"ERROR": 4, "WARNING": 1}
+    assert len(window) == 5
+    assert window.late == 0
+
+
+def test_records_older_than_the_window_are_late_and_left_out():
+    window = make_window()
+    window.add(1100.0, "INFO", wall=1100.0)
+    window.add(1040.9, "ERROR", wall=1100.0)  # second 1040 = floor(now) - window: already gone
+    window.add(1041.0, "ERROR", wall=1100.0)
+    assert window.late == 1
+    assert window.level_counts() == {"INFO": 1, "ERROR": 1}
+
+
+def test_buckets_leave_the_window_as_the_clock_advances():
+    window = make_window()
+    window.add(1000.0, "ERROR", wall=1000.0)
+    window.add(1030.0, "INFO", wall=1030.0)
+    window.advance(wall=1059.9)
+    assert window.level_counts() == {"ERROR": 1, "INFO": 1}
+    window.advance(wall=1060.0)  # second 1000 drops out
+    assert window.level_counts() == {"INFO": 1}
+    window.advance(wall=1091.0)
+    assert window.level_counts() == {}
+    assert len(window) == 0
+
+
+def test_tumbling_windows_close_when_the_watermark_passes_their_end():
+    window = make_window()
+    window.add(1001.0, "INFO", wall=1001.0)
+    window.add(1009.0, "ERROR", wall=1009.0)
+    window.add(1012.0, "INFO", wall=1012.0)
+    assert window.closed_windows() == []  # watermark 1007 < 1010
+    window.advance(wall=1015.0)  # watermark 1010
+    assert window.closed_windows() == [{"start": 1000, "end": 1010, "counts": {"INFO": 1, "ERROR": 1}}]
+
+
+def test_records_for_a_closed_tumbling_window_are_dropped():
+    window = make_window()
+    window.add(1001.0, "INFO", wall=1001.0)
+    window.add(1016.0, "INFO", wall=1016.0)  # watermark 1011 closes [1000, 1010)
+    window.add(1004.0, "ERROR", wall=1016.0)
+    assert window.dropped == 1
+    assert window.closed_windows()[0]["counts"] == {"INFO": 1}
+    # Still inside the sliding window
+    assert window.level_counts() == {"INFO": 2, "ERROR": 1}
+
+
+def test_late_record_within_allowed_lateness_joins_its_open_tumbling_window():
+    window = make_window()
+    window.add(1013.0, "INFO", wall=1013.0)  # watermark 1008: [1000, 1010) still open
+    window.add(1008.0, "ERROR", wall=1013.0)
+    assert window.dropped == 0
+    window.advance(wall=1020.0)
+    assert window.closed_windows() == [{"start": 1000, "end": 1010, "counts": {"ERROR": 1}}]
+
+
+def test_template_counts_come_from_rows_still_in_the_window():
+    window = make_window(capacity=4)  # small columns: forces compaction and growth
+    for i in range(40):
+        window.add(1000.0 + i, "ERROR" if i % 4 == 0 else "INFO", wall=1000.0 + i, template_id=i % 3)
+    window.add(1039.0, "INFO", wall=1039.0)  # no template: not counted
+    now = window.advance(wall=1069.0)  # seconds 1010..1039 remain
+    assert window.level_counts() == {"ERROR": 7, "INFO": 24}
+    assert window.template_counts(now) == [
+        {"template_id": 0, "count": 10}, {"template_id": 1, "count": 10}, {"template_id": 2, "count": 10},
+    ]
+    errors = window.template_counts(now, "ERROR")
+    assert sum(entry["count"] for entry in errors) == 7
+    assert window.template_counts(now, "ERROR", k=1) == errors[:1]
+    assert window.template_counts(now, "DEBUG") == []
+    assert window.rows <= len(window.timestamps)
+
+
+def test_clear_resets_counts_clock_and_rows():
+    window = make_window()
+    window.add(1000.0, "ERROR", wall=1000.0, template_id=1)
+    window.clear()
+    assert len(window) == 0 and window.rows == 0
+    assert window.level_counts() == {}
+    assert window.now(wall=50.0) == 50.0